@@ -0,0 +1,312 @@
+"""
+Nearest-neighbour indexes over scholarship embeddings
+ExactIndex scores every vector, across several cores when given a
+ShardedScorer; IVFIndex only scores the closest clusters
+"""
+
+import threading
+
+import numpy as np
+
+from scoring import normalize, top_k
+
+
+class ExactIndex:
+    """Brute-force index: one matrix-vector product over every stored vector
+
+    With a `scorer` (parallel_scoring.ShardedScorer) the vectors move into
+    shared memory once the buffer holds scorer.min_rows rows, and searches
+    over at least that many rows are split across its processes. Removed rows are masked out and reclaimed once they
+    outnumber the live ones.
+    """
+
+    def __init__(self, scorer=None):
+        self._scorer = scorer
+        self._lock = threading.Lock()
+        self._ids = []
+        self._rows = {}
+        self._vectors = None
+        # Whether _vectors lives in the scorer's shared segment
+        self._shared = False
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, scholarship_id):
+        return str(scholarship_id) in self._rows
+
+    def ids(self):
+        """Ids currently in the index"""
+        return list(self._rows)
+
+    def _allocate(self, capacity, dim):
+        # Smaller buffers stay private, so /dev/shm is only used where the scorer is
+        self._shared = self._scorer is not None and capacity >= self._scorer.min_rows
+        if self._shared:
+            return self._scorer.allocate(capacity, dim)
+        return np.zeros((capacity, dim), dtype=np.float32)
+
+    def _reserve(self, count, dim):
+        """Grow the vector buffer so `count` more rows fit"""
+        needed = self._size + count
+        if self._vectors is None:
+            capacity = max(needed, 1024)
+            self._vectors = self._allocate(capacity, dim)
+            self._alive = np.zeros(capacity, dtype=bool)
+        elif needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            vectors = self._allocate(capacity, dim)
+            vectors[:self._size] = self._vectors[:self._size]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._vectors, self._alive = vectors, alive
+
+    def add(self, scholarship_ids, vectors):
+        """Insert vectors, replacing any existing entry with the same id"""
+        vectors = normalize(np.asarray(vectors, dtype=np.float32).reshape(len(scholarship_ids), -1))
+        with self._lock:
+            self._remove([str(i) for i in scholarship_ids])
+            self._reserve(len(vectors), vectors.shape[1])
+            start = self._size
+            self._vectors[start:start + len(vectors)] = vectors
+            self._alive[start:start + len(vectors)] = True
+            for offset, scholarship_id in enumerate(scholarship_ids):
+                self._rows[str(scholarship_id)] = start + offset
+                self._ids.append(str(scholarship_id))
+            self._size += len(vectors)
+            self._added(start, vectors)
+
+    def remove(self, scholarship_ids):
+        """Drop entries; unknown ids are ignored"""
+        with self._lock:
+            self._remove([str(i) for i in scholarship_ids])
+
+    def _remove(self, scholarship_ids):
+        for scholarship_id in scholarship_ids:
+            row = self._rows.pop(scholarship_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._rows):
+            self._compact()
+
+    def _compact(self):
+        """Copy the live rows into a new buffer and renumber them
+
+        The old buffer is left as it was, so a search scoring a snapshot of it
+        is not disturbed.
+        """
+        kept = np.flatnonzero(self._alive[:self._size])
+        capacity = max(len(kept), 1024)
+        vectors = self._allocate(capacity, self._vectors.shape[1])
+        vectors[:len(kept)] = self._vectors[kept]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(kept)] = True
+        self._vectors, self._alive, self._size, self._dead = vectors, alive, len(kept), 0
+        self._ids = [self._ids[row] for row in kept]
+        self._rows = {scholarship_id: row for row, scholarship_id in enumerate(self._ids)}
+        self._compacted(kept)
+
+    def _compacted(self, kept):
+        """Hook for subclasses; row kept[i] is now row i"""
+
+    def _added(self, start, vectors):
+        """Hook for subclasses that maintain extra structure per row"""
+
+    def _allowed_mask(self, allowed):
+        """Boolean mask over rows that are alive and, if given, in `allowed`"""
+        if allowed is None:
+            return self._alive[:self._size].copy()
+        mask = np.zeros(self._size, dtype=bool)
+        rows = [self._rows[i] for i in map(str, allowed) if i in self._rows]
+        mask[rows] = True
+        return mask
+
+    def _rank(self, query, rows, k):
+        """Score candidate rows and return (ids, scores) best first"""
+        scores = self._vectors[rows] @ query
+        best = top_k(scores, k)
+        return [self._ids[row] for row in rows[best]], scores[best]
+
+    def search(self, query, k, allowed=None):
+        """Return (ids, scores) of the k most similar vectors, best first
+
+        `allowed` restricts results to an iterable of scholarship ids.
+        """
+        query = normalize(query)
+        with self._lock:
+            if self._size == 0:
+                return [], np.empty(0, dtype=np.float32)
+            mask = self._allowed_mask(allowed)
+            if self._shared:
+                # A shared segment is freed once the index outgrows it, so it is only read under the lock
+                return self._rank_masked(query, mask, k)
+            # Rows below _size are never rewritten (growing and compacting copy
+            # into a new buffer), so the snapshot is scored without the lock
+            vectors, ids = self._vectors[:self._size], self._ids
+        return _rank_all(vectors, ids, query, mask, k)
+
+    def _rank_masked(self, query, mask, k):
+        """Score every row in place and rank only those in `mask`"""
+        if self._shared and self._size >= self._scorer.min_rows:
+            rows, scores = self._scorer.search(self._size, query, mask, k)
+            return [self._ids[row] for row in rows], scores
+        return _rank_all(self._vectors[:self._size], self._ids, query, mask, k)
+
+
+def _rank_all(vectors, ids, query, mask, k):
+    """Score every row of `vectors` and return (ids, scores) of the best k in `mask`"""
+    scores = vectors @ query
+    scores[~mask] = -np.inf
+    best = top_k(scores, min(k, int(mask.sum())))
+    return [ids[row] for row in best], scores[best]
+
+
+class IVFIndex(ExactIndex):
+    """Inverted-file index: vectors are bucketed by their nearest k-means centroid
+
+    A search scores the query against the centroids and only scans the
+    `n_probe` closest buckets. Raising `n_probe` trades latency for recall;
+    `n_probe == n_lists` is an exact search. Until `min_train_size` vectors
+    have been added the index falls back to exact search.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, min_train_size=4096, kmeans_iterations=10, seed=0, scorer=None):
+        super().__init__(scorer)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.kmeans_iterations = kmeans_iterations
+        self._seed = seed
+        self._centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists = []
+        self._list_arrays = {}
+
+    @property
+    def trained(self):
+        return self._centroids is not None
+
+    def _reserve(self, count, dim):
+        super()._reserve(count, dim)
+        if len(self._assign) < len(self._alive):
+            assign = np.full(len(self._alive), -1, dtype=np.int32)
+            assign[:self._size] = self._assign[:self._size]
+            self._assign = assign
+
+    def _compacted(self, kept):
+        assign = np.full(len(self._alive), -1, dtype=np.int32)
+        assign[:len(kept)] = self._assign[kept]
+        self._assign = assign
+        if self.trained:
+            self._lists = [[] for _ in range(len(self._centroids))]
+            for row, centroid in enumerate(assign[:len(kept)]):
+                self._lists[centroid].append(row)
+            self._list_arrays = {}
+
+    def _added(self, start, vectors):
+        if not self.trained:
+            if len(self._rows) >= self.min_train_size:
+                self._train()
+            return
+
+        assignments = self._nearest_centroids(vectors)
+        self._assign[start:start + len(vectors)] = assignments
+        for offset, centroid in enumerate(assignments):
+            self._lists[centroid].append(start + offset)
+            self._list_arrays.pop(centroid, None)
+
+    def _nearest_centroids(self, vectors, chunk_size=16384):
+        """Index of the closest centroid for each vector"""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self._centroids.T, axis=1)
+        return assignments
+
+    def _train(self):
+        """Run spherical k-means over the live vectors and rebuild the buckets"""
+        rows = np.flatnonzero(self._alive[:self._size])
+        vectors = self._vectors[rows]
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(rows))))
+        n_lists = min(n_lists, len(rows))
+
+        rng = np.random.default_rng(self._seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            self._centroids = centroids
+            assignments = self._nearest_centroids(vectors)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            empty = ~np.any(sums, axis=1)
+            # Re-seed empty clusters from random vectors so every list is used
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            centroids = normalize(sums)
+
+        self._centroids = centroids
+        self.n_lists = n_lists
+        self._rebuild_lists()
+
+    def _rebuild_lists(self):
+        rows = np.flatnonzero(self._alive[:self._size])
+        self._assign[rows] = self._nearest_centroids(self._vectors[rows])
+        self._lists = [[] for _ in range(len(self._centroids))]
+        for row, centroid in zip(rows, self._assign[rows]):
+            self._lists[centroid].append(row)
+        self._list_arrays = {}
+
+    def compact(self):
+        """Drop removed rows from the buckets"""
+        with self._lock:
+            if self.trained:
+                self._rebuild_lists()
+
+    def _list_rows(self, centroid):
+        rows = self._list_arrays.get(centroid)
+        if rows is None:
+            rows = np.asarray(self._lists[centroid], dtype=np.intp)
+            self._list_arrays[centroid] = rows
+        return rows
+
+    def search(self, query, k, allowed=None, n_probe=None):
+        """Return (ids, scores) of approximately the k most similar vectors
+
+        Probing widens automatically when the probed buckets hold fewer than
+        k live, allowed vectors.
+        """
+        query = normalize(query)
+        with self._lock:
+            if self._size == 0:
+                return [], np.empty(0, dtype=np.float32)
+
+            mask = self._allowed_mask(allowed)
+            if not self.trained:
+                return self._rank_masked(query, mask, k)
+
+            order = top_k(self._centroids @ query, len(self._centroids))
+            n_probe = min(n_probe or self.n_probe, len(order))
+            available = int(mask.sum())
+            while True:
+                rows = np.concatenate([self._list_rows(c) for c in order[:n_probe]])
+                rows = rows[mask[rows]]
+                if len(rows) >= min(k, available) or n_probe >= len(order):
+                    return self._rank(query, rows, k)
+                n_probe = min(2 * n_probe, len(order))
+
+
+INDEX_TYPES = {
+    'exact': ExactIndex,
+    'ivf': IVFIndex
+}
+
+
+def make_index(kind='exact', **params):
+    """Create an index by name ('exact' or 'ivf')"""
+    try:
+        index_type = INDEX_TYPES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown index type: {kind}")
+    return index_type(**params)
@@ -1,19 +1,39 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask import Flask, request, jsonify, render_template, session, redirect, url_for, g, has_request_context, Response, stream_with_context
 from flask_cors import CORS
-from supabase import create_client, Client
-from sentence_transformers import SentenceTransformer
-import bcrypt
+from supabase import Client
+from postgrest.exceptions import APIError
 import os
+import hmac
 from dotenv import load_dotenv
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import requests
 import json
 from datetime import datetime, timedelta
 import uuid
+import threading
+import logging
+import time
+import contextvars
+from embeddings import ScholarshipEmbeddingStore, UserEmbeddingCache, content_hash, encode, get_model, missing_profile_fields, scholarship_text, profile_text
+from ann_index import make_index
+from catalog import ScholarshipCatalog
+from match_cache import FRESH, STALE, RECOMPUTED, MatchEntry, MatchResultCache, StaleCursor, decode_cursor, encode_cursor
+from sms_outbox import SmsOutbox
+from write_buffer import RejectedWrite, WriteBehindBuffer
+from data_access import DataAccess, make_client
+from batch_matching import coerce_profile, format_cohort_match, match_cohort
+from feedback import FEEDBACK_SIGN, FeedbackRanker
+from lexical_index import BM25Index, get_fusion, profile_query
+from parallel_scoring import ShardedScorer
+from scoring import cosine_scores, top_k
+from password_pool import DEFAULT_ROUNDS, PasswordPool, PoolSaturated
+from metrics import configure_logging, match_stage_seconds, registry
 
 load_dotenv()
 
+# LOG_SAMPLE_RATE keeps that share of DEBUG/INFO lines; warnings and errors are always logged
+configure_logging(os.getenv('LOG_LEVEL', 'INFO'), float(os.getenv('LOG_SAMPLE_RATE', 1.0)))
+logger = logging.getLogger('scholarship_matcher')
+
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
 CORS(app)
@@ -21,94 +41,425 @@ CORS(app)
 # Supabase configuration
 supabase_url = os.getenv('SUPABASE_URL')
 supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-supabase: Client = create_client(supabase_url, supabase_key)
 
-# Hugging Face model for embeddings
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+# Requests served outside Flask (the ASGI match endpoint in asgi.py) count
+# their round trips in a one-item list held here instead of in `g`
+db_round_trip_counter = contextvars.ContextVar('db_round_trip_counter', default=None)
+
+def count_round_trip():
+    """Count Supabase HTTP round trips made while handling the current request"""
+    if has_request_context():
+        g.db_round_trips = g.get('db_round_trips', 0) + 1
+    else:
+        counter = db_round_trip_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+# One keep-alive connection pool shared by every query
+supabase: Client = make_client(supabase_url, supabase_key, on_request=count_round_trip)
+db = DataAccess(supabase)
+
+db_round_trips = registry.histogram(
+    'db_round_trips_per_request', 'Supabase HTTP requests per web request', buckets=(0, 1, 2, 3, 5, 8, 13)
+)
+
+@app.after_request
+def add_round_trip_header(response):
+    """Report the request's database round trips in X-DB-Round-Trips"""
+    round_trips = g.get('db_round_trips', 0)
+    db_round_trips.observe(round_trips)
+    response.headers['X-DB-Round-Trips'] = str(round_trips)
+    return response
+
+# Hugging Face model for embeddings, loaded on the first request that needs it.
+# PRELOAD_MODEL=1 loads it at import instead, so with gunicorn --preload the
+# workers forked from the master share one copy of the weights copy-on-write.
+if os.getenv('PRELOAD_MODEL', '').lower() in ('1', 'true', 'yes'):
+    get_model()
+
+# Scholarship embeddings are encoded once and persisted between requests
+embedding_store = ScholarshipEmbeddingStore(
+    os.getenv('EMBEDDING_STORE_DIR', 'embedding_store'),
+    encode=encode
+)
+
+# Profile embeddings are reused until the profile text changes
+user_embedding_cache = UserEmbeddingCache(int(os.getenv('USER_EMBEDDING_CACHE_SIZE', 10000)))
+
+# Nearest-neighbour index over the stored scholarship vectors
+# ANN_INDEX=ivf trades a little recall for sub-linear search on large catalogs
+ann_index_type = os.getenv('ANN_INDEX', 'exact')
+index_params = {}
+if ann_index_type == 'ivf':
+    index_params = {
+        'n_lists': int(os.getenv('ANN_NLIST', 0)) or None,
+        'n_probe': int(os.getenv('ANN_NPROBE', 8))
+    }
+# Exact searches over large catalogs can be split across cores (opt in:
+# each worker then keeps catalogs of PARALLEL_SCORING_MIN_ROWS or more in /dev/shm)
+scoring_processes = int(os.getenv('SCORING_PROCESSES', 1)) or 1
+if scoring_processes > 1:
+    index_params['scorer'] = ShardedScorer(
+        scoring_processes,
+        min_rows=int(os.getenv('PARALLEL_SCORING_MIN_ROWS', 50000))
+    )
+scholarship_index = make_index(ann_index_type, **index_params)
+
+# HYBRID_RETRIEVAL=1 takes candidates from a BM25 index over the scholarship
+# text and re-ranks only those by embedding similarity, fusing both scores
+lexical_index = BM25Index() if os.getenv('HYBRID_RETRIEVAL', '').lower() in ('1', 'true', 'yes') else None
+LEXICAL_CANDIDATES = int(os.getenv('LEXICAL_CANDIDATES', 300))
+HYBRID_ALPHA = float(os.getenv('HYBRID_ALPHA', 0.7))
+fuse_scores = get_fusion(os.getenv('HYBRID_FUSION', 'weighted'))
+
+catalog_loads = registry.counter('catalog_loads_total', 'Catalog snapshots loaded after a version change')
+
+def load_scholarship_vectors(snapshot):
+    """Encode new or changed scholarships and bring the search index in line with the catalog
+
+    Encoding needs the full rows, which only a freshly read snapshot has; a
+    snapshot trimmed at the day boundary only drops scholarships.
+    """
+    catalog_loads.inc()
+    changed_ids = set()
+    if snapshot.rows is not None:
+        with match_stage_seconds.time(stage='scholarship_encoding'):
+            changed_ids.update(embedding_store.sync(snapshot.rows))
+    # Rows encoded earlier (or by another worker) are in the store but not yet in our index
+    changed_ids.update(i for i in snapshot.by_id if i not in scholarship_index)
+    if changed_ids:
+        changed_ids = list(changed_ids)
+        scholarship_index.add(changed_ids, embedding_store.lookup(changed_ids))
+    scholarship_index.remove([i for i in scholarship_index.ids() if i not in snapshot.by_id])
+    if lexical_index is not None:
+        if snapshot.rows is not None:
+            lexical_changed = set(changed_ids) | {i for i in snapshot.by_id if i not in lexical_index}
+            lexical_index.add(row for row in snapshot.rows if str(row['id']) in lexical_changed)
+        lexical_index.remove([i for i in lexical_index.ids() if i not in snapshot.by_id])
+
+# Active scholarships cached per worker, reloaded only when the table changes
+scholarship_catalog = ScholarshipCatalog(
+    supabase,
+    ttl=int(os.getenv('CATALOG_TTL_SECONDS', 60)),
+    on_load=load_scholarship_vectors,
+    text_cache_size=int(os.getenv('CATALOG_TEXT_CACHE_SIZE', 5000))
+)
+
+# Ranked matches per user, served until the profile or catalog changes
+# The whole ranked list is kept so later pages are served without re-ranking
+RANKED_MATCHES = int(os.getenv('RANKED_MATCHES', 100))
+DEFAULT_PAGE_SIZE = 3
+MAX_PAGE_SIZE = 50
+
+# Batch matching for counselors (user ids listed in BATCH_MATCH_COUNSELORS):
+# cohort size per request, and an optional key for partner integrations that
+# call it without a user session
+BATCH_MATCH_MAX_PROFILES = int(os.getenv('BATCH_MATCH_MAX_PROFILES', 1000))
+BATCH_MATCH_API_KEY = os.getenv('BATCH_MATCH_API_KEY')
+BATCH_MATCH_COUNSELORS = {user_id.strip() for user_id in os.getenv('BATCH_MATCH_COUNSELORS', '').split(',') if user_id.strip()}
+BATCH_MATCH_MAX_K = 50
+_catalog_matrix = {'version': None, 'matrix': None}
+_catalog_matrix_lock = threading.Lock()
+match_cache = MatchResultCache(int(os.getenv('MATCH_CACHE_SIZE', 10000)))
+
+# Like/dislike feedback nudges each user's ranking; disliked scholarships are
+# always hidden. Twice RANKED_MATCHES candidates are scored so liked-like
+# scholarships can move up from just below the cut.
+FEEDBACK_WEIGHT = float(os.getenv('FEEDBACK_WEIGHT', 0.1))
+FEEDBACK_CANDIDATES = 2 * RANKED_MATCHES
+feedback_ranker = FeedbackRanker(
+    user_weight=FEEDBACK_WEIGHT,
+    scholarship_weight=FEEDBACK_WEIGHT / 2,
+    max_users=int(os.getenv('USER_EMBEDDING_CACHE_SIZE', 10000))
+)
+match_cache_lookups = registry.counter('match_cache_lookups_total', 'Match cache lookups by outcome', labels=('result',))
+match_request_seconds = registry.histogram('match_request_seconds', '/api/match handling time', labels=('freshness',))
+registry.value('user_embedding_cache_hits_total', 'Profile embeddings served from cache', lambda: user_embedding_cache.hits, kind='counter')
+registry.value('user_embedding_cache_misses_total', 'Profile embeddings encoded', lambda: user_embedding_cache.misses, kind='counter')
+registry.value('user_embedding_cache_entries', 'Profile embeddings cached', lambda: len(user_embedding_cache))
+registry.value('match_cache_entries', 'Users with a cached ranking', lambda: len(match_cache))
+registry.value('feedback_users', 'Users whose feedback is loaded for re-ranking', lambda: len(feedback_ranker))
+
+# Feedback is spooled to local disk and acknowledged at once; a background
+# flusher writes it as one upsert every WRITE_BUFFER_FLUSH_SECONDS, or as soon
+# as WRITE_BUFFER_MAX_BATCH rows are pending
+FEEDBACK_BATCH_MAX_EVENTS = int(os.getenv('FEEDBACK_BATCH_MAX_EVENTS', 100))
+
+def write_buffered_rows(table, rows):
+    """Upsert a batch; a repeat vote replaces the stored one"""
+    try:
+        db.upsert_rows(table, rows)
+    except APIError as e:
+        # Postgres data exceptions and constraint violations: the rows are bad, not the connection
+        if str(e.code or '')[:2] in ('22', '23'):
+            raise RejectedWrite(e.message)
+        raise
+
+write_buffer = WriteBehindBuffer(
+    os.getenv('WRITE_BUFFER_DIR', 'write_spool'),
+    write_buffered_rows,
+    {'user_feedback': ('user_id', 'scholarship_id')},
+    max_batch=int(os.getenv('WRITE_BUFFER_MAX_BATCH', 200)),
+    flush_interval=float(os.getenv('WRITE_BUFFER_FLUSH_SECONDS', 1.0)),
+    fsync=os.getenv('WRITE_BUFFER_FSYNC', '').lower() in ('1', 'true', 'yes')
+)
+registry.value('write_buffer_pending', 'Buffered rows waiting to be written', lambda: len(write_buffer))
+registry.value('write_buffer_rows_written_total', 'Buffered rows written to the database', lambda: write_buffer.written, kind='counter')
+registry.value('write_buffer_rows_coalesced_total', 'Buffered rows replaced by a later event before being written', lambda: write_buffer.coalesced, kind='counter')
+registry.value('write_buffer_rows_dropped_total', 'Buffered rows rejected by the database', lambda: write_buffer.dropped, kind='counter')
 
 # Instasend API configuration
 INSTASEND_API_KEY = os.getenv('INSTASEND_API_KEY')
-INSTASEND_API_URL = "https://api.instasend.io/v1/sms"
+INSTASEND_API_URL = os.getenv('INSTASEND_API_URL', "https://api.instasend.io/v1/sms")
+
+# SMS notifications are queued and delivered by a background dispatcher,
+# so a slow SMS provider never holds up a request
+sms_outbox = SmsOutbox(
+    INSTASEND_API_URL,
+    INSTASEND_API_KEY,
+    batch_url=os.getenv('INSTASEND_BATCH_URL'),
+    batch_size=int(os.getenv('SMS_BATCH_SIZE', 50)),
+    rate=float(os.getenv('SMS_RATE_PER_SECOND', 5))
+)
 
 def send_sms(phone_number, message):
-    """Send SMS using Instasend API"""
-    headers = {
-        'Authorization': f'Bearer {INSTASEND_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    payload = {
-        'to': phone_number,
-        'message': message
-    }
-    
-    try:
-        response = requests.post(INSTASEND_API_URL, headers=headers, json=payload)
-        return response.status_code == 200
-    except Exception as e:
-        print(f"Error sending SMS: {e}")
-        return False
+    """Queue an SMS for delivery through the Instasend API"""
+    return sms_outbox.enqueue(phone_number, message)
+
+# bcrypt runs on a small dedicated pool so login bursts cannot starve matching;
+# when it is saturated, login and signup answer 503 instead of queueing forever
+password_pool = PasswordPool(
+    rounds=int(os.getenv('BCRYPT_ROUNDS', DEFAULT_ROUNDS)),
+    workers=int(os.getenv('PASSWORD_POOL_SIZE', 2)),
+    max_queue=int(os.getenv('PASSWORD_QUEUE_SIZE', 32))
+)
 
 def hash_password(password):
     """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_pool.hash(password)
 
 def verify_password(password, hashed):
     """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return password_pool.verify(password, hashed)
+
+def server_busy():
+    """503 response for when the password pool is saturated"""
+    response = jsonify({'success': False, 'message': 'Server is busy, please try again in a moment'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def create_user_embedding(profile):
-    """Create embedding for user profile"""
-    profile_text = f"Age: {profile['age']}, Country: {profile['country']}, Education: {profile['education_level']}, GPA: {profile['gpa']}, Field: {profile['field_of_study']}, Financial Need: {profile['financial_need']}"
-    return model.encode(profile_text)
+    """Create embedding for user profile, reusing the cached vector when unchanged"""
+    if profile.get('id') is None:
+        return encode(profile_text(profile))
+    return user_embedding_cache.get_or_encode(profile['id'], profile, encode)
 
 def create_scholarship_embedding(scholarship):
     """Create embedding for scholarship"""
-    scholarship_text = f"Name: {scholarship['name']}, Description: {scholarship['description']}, Requirements: {scholarship['requirements']}, Field: {scholarship['field_of_study']}, Country: {scholarship['country']}"
-    return model.encode(scholarship_text)
+    return encode(scholarship_text(scholarship))
 
-def calculate_similarity(user_embedding, scholarship_embedding):
-    """Calculate cosine similarity between user and scholarship embeddings"""
-    return cosine_similarity([user_embedding], [scholarship_embedding])[0][0]
+def load_feedback(user_id, user_embedding, rows=None, version=None):
+    """Read a user's feedback into the ranker unless it is loaded at `version` already
 
-def filter_eligible_scholarships(user_profile, scholarships):
-    """Apply rule-based filtering"""
-    eligible = []
-    
-    for scholarship in scholarships:
-        # Basic eligibility checks with proper null handling
-        if scholarship.get('min_gpa') is not None and user_profile.get('gpa') is not None:
-            if user_profile['gpa'] < scholarship['min_gpa']:
-                continue
-        
-        if scholarship.get('min_age') is not None and user_profile.get('age') is not None:
-            if user_profile['age'] < scholarship['min_age']:
-                continue
-        
-        if scholarship.get('max_age') is not None and user_profile.get('age') is not None:
-            if user_profile['age'] > scholarship['max_age']:
-                continue
-            
-        # Country matching (if scholarship is country-specific)
-        if scholarship.get('country') and scholarship['country'] != 'International':
-            if user_profile.get('country') != scholarship['country']:
-                continue
-                
-        # Education level matching
-        if scholarship.get('education_level') and user_profile.get('education_level'):
-            if scholarship['education_level'] != user_profile['education_level']:
-                continue
-            
-        # Field of study matching (partial match)
-        if scholarship.get('field_of_study') and user_profile.get('field_of_study'):
-            user_field = user_profile['field_of_study'].lower()
-            scholarship_field = scholarship['field_of_study'].lower()
-            if not any(field in user_field for field in scholarship_field.split()) and not any(field in scholarship_field for field in user_field.split()):
-                continue
-                
-        eligible.append(scholarship)
+    `version` is the profile's feedback_version, so feedback given through
+    another worker is read again once it is stored. `rows` may be the user's
+    feedback rows if they were already fetched.
+    """
+    if feedback_ranker.is_current(user_id, version):
+        return
+    if rows is None:
+        rows = db.get_feedback(user_id)
+    rows = [r for r in rows if str(r['scholarship_id']) in embedding_store]
+    vectors = embedding_store.lookup([r['scholarship_id'] for r in rows]) if rows else []
+    feedback_ranker.load_user(user_id, rows, vectors, user_embedding, version)
+
+def ranking_hash(user_profile):
+    """Cache key of a user's ranking: the profile text and the version of their stored feedback"""
+    return content_hash(f"{profile_text(user_profile)}|feedback {user_profile.get('feedback_version')}")
+
+def hybrid_search(user_profile, user_embedding, eligible_ids, k):
+    """(ids, cosine scores, fused scores) of the best k lexical candidates by fused score
+
+    The fused score only orders the candidates; the cosine score stays the
+    reported confidence, comparable with dense-only ranking. When the lexical
+    index finds fewer than k candidates, the best semantic matches fill the
+    rest, with no lexical score.
+    """
+    ids, lexical_scores = lexical_index.search(profile_query(user_profile), LEXICAL_CANDIDATES, allowed=eligible_ids)
+    if len(ids) < k and len(ids) < len(eligible_ids):
+        found = set(ids)
+        semantic_ids, _ = scholarship_index.search(user_embedding, k, allowed=eligible_ids)
+        extra = [i for i in semantic_ids if i not in found]
+        ids = ids + extra
+        lexical_scores = np.concatenate([lexical_scores, np.zeros(len(extra), dtype=np.float32)])
+    if not ids:
+        return [], np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+    semantic_scores = cosine_scores(user_embedding, embedding_store.lookup(ids))
+    fused = fuse_scores(semantic_scores, lexical_scores, HYBRID_ALPHA)
+    best = top_k(fused, k)
+    return [ids[i] for i in best], semantic_scores[best], fused[best]
+
+def rank_scholarships(user_profile, snapshot, feedback_rows=None):
+    """Rank the eligible scholarships in a catalog snapshot for a profile"""
+    with match_stage_seconds.time(stage='filtering'):
+        eligible_scholarships = snapshot.eligibility.filter(user_profile)
+    if not eligible_scholarships:
+        return MatchEntry(ranking_hash(user_profile), snapshot.version, [], [])
     
-    return eligible
+    user_id = user_profile['id']
+    with match_stage_seconds.time(stage='user_encoding'):
+        user_embedding = create_user_embedding(user_profile)
+    with match_stage_seconds.time(stage='feedback_load'):
+        load_feedback(user_id, user_embedding, feedback_rows, user_profile.get('feedback_version'))
+        disliked = feedback_ranker.disliked(user_id)
+    with match_stage_seconds.time(stage='scoring'):
+        eligible_ids = [str(s['id']) for s in eligible_scholarships if str(s['id']) not in disliked]
+        rank_by = None
+        if lexical_index is not None:
+            top_ids, top_scores, rank_by = hybrid_search(user_profile, user_embedding, eligible_ids, FEEDBACK_CANDIDATES)
+        else:
+            top_ids, top_scores = scholarship_index.search(user_embedding, FEEDBACK_CANDIDATES, allowed=eligible_ids)
+    with match_stage_seconds.time(stage='reranking'):
+        top_ids, top_scores = feedback_ranker.rerank(
+            user_id, user_embedding, top_ids, top_scores, embedding_store.lookup(top_ids), rank_by
+        )
+        top_ids, top_scores = top_ids[:RANKED_MATCHES], top_scores[:RANKED_MATCHES]
+    return MatchEntry(ranking_hash(user_profile), snapshot.version, top_ids, top_scores)
+
+def refresh_matches(user_profile):
+    """Recompute a user's cached matches in the background"""
+    match_cache.refresh_async(
+        user_profile['id'],
+        lambda: rank_scholarships(user_profile, scholarship_catalog.snapshot())
+    )
+
+def format_match(scholarship, score, text):
+    """Serialize a scholarship, its display text and its similarity score for the match response"""
+    return {
+        'id': scholarship['id'],
+        'name': scholarship['name'],
+        'description': text.get('description'),
+        'amount': scholarship['amount'],
+        'deadline': scholarship['deadline'],
+        'confidence': round(score * 100, 1),
+        'requirements': text.get('requirements'),
+        'application_url': scholarship['application_url']
+    }
+
+def iter_matches(entry, snapshot, offset, limit):
+    """Yield (next offset, match) for up to `limit` ranked matches from `offset`
+
+    Scholarships that left the catalog since the ranking was made are skipped.
+    Display text is read for the page in one go, and for any scholarship
+    past it that stands in for a skipped one.
+    """
+    texts = snapshot.texts(entry.ids[offset:offset + limit])
+    position = offset
+    count = 0
+    while position < len(entry.ids) and count < limit:
+        scholarship_id = entry.ids[position]
+        scholarship = snapshot.get(scholarship_id)
+        position += 1
+        if scholarship is not None:
+            count += 1
+            text = texts.get(scholarship_id) or snapshot.texts([scholarship_id]).get(scholarship_id, {})
+            yield position, format_match(scholarship, entry.scores[position - 1], text)
+
+def next_cursor(entry, position, count, limit):
+    """Cursor for the page after one that ended at `position`, or None at the end of the ranking"""
+    if count < limit or position >= len(entry.ids):
+        return None
+    return encode_cursor(entry, position)
+
+def cached_ranking(user_profile, snapshot, cursor_key):
+    """(entry, freshness) from the match cache; entry is None when it must be re-ranked
+
+    Raises StaleCursor when `cursor_key` is not the cached ranking's, since
+    its offset would skip or repeat matches in any other ranking.
+    """
+    profile_hash = ranking_hash(user_profile)
+    entry, status = match_cache.lookup(user_profile['id'], profile_hash, snapshot.version)
+    if cursor_key is not None:
+        if entry is None or entry.key != cursor_key:
+            match_cache_lookups.inc(result='stale_cursor')
+            raise StaleCursor('Your matches have changed since this page was loaded; start again from the first page')
+        # Later pages come from the same ranking as the first one
+        match_cache_lookups.inc(result='page')
+        return entry, status
+    if status == STALE and entry.profile_hash == profile_hash:
+        # A catalog change is refreshed in the background
+        match_cache_lookups.inc(result='stale')
+        refresh_matches(user_profile)
+        return entry, status
+    if status == FRESH:
+        match_cache_lookups.inc(result='fresh')
+        return entry, status
+    match_cache_lookups.inc(result='miss')
+    return None, RECOMPUTED
+
+def rerank(user_profile, snapshot, feedback_rows=None):
+    entry = rank_scholarships(user_profile, snapshot, feedback_rows)
+    match_cache.store(user_profile['id'], entry)
+    return entry
+
+def match_params(params, accept=''):
+    """(limit, offset, cursor key, stream) from /api/match parameters; raises ValueError"""
+    # Paging: `limit` matches per page, `cursor` from the previous page's next_cursor
+    # Streaming: `stream` or Accept: application/x-ndjson sends one match per line
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    offset, cursor_key = decode_cursor(params['cursor']) if params.get('cursor') else (0, None)
+    stream = str(params.get('stream', '')).lower() in ('1', 'true', 'yes') or 'application/x-ndjson' in accept
+    return limit, offset, cursor_key, stream
+
+def profile_error(user_profile):
+    """Response body for a profile that cannot be matched, or None"""
+    if user_profile is None:
+        return {'success': False, 'message': 'User profile not found'}
+    missing_fields = missing_profile_fields(user_profile)
+    if missing_fields:
+        return {
+            'success': False,
+            'message': f'Please complete your profile. Missing: {", ".join(missing_fields)}'
+        }
+    return None
+
+def match_page(entry, snapshot, status, offset, limit):
+    """Response body for one page of a ranking"""
+    if not entry.ids:
+        return {'success': True, 'matches': [], 'message': 'No eligible scholarships found', 'freshness': status, 'next_cursor': None}
+    with match_stage_seconds.time(stage='serialization'):
+        matches = []
+        position = offset
+        for position, match in iter_matches(entry, snapshot, offset, limit):
+            matches.append(match)
+        return {
+            'success': True,
+            'matches': matches,
+            'freshness': status,
+            'total': len(entry.ids),
+            'next_cursor': next_cursor(entry, position, len(matches), limit)
+        }
+
+def stream_matches(user_profile, snapshot, entry, status, offset, limit, started):
+    """NDJSON lines: an optional scoring notice, meta, one line per match, then end"""
+    try:
+        if entry is None:
+            yield json.dumps({'type': 'status', 'message': 'Scoring scholarships'}) + '\n'
+            entry = rerank(user_profile, snapshot)
+        yield json.dumps({'type': 'meta', 'freshness': status, 'total': len(entry.ids)}) + '\n'
+        position = offset
+        count = 0
+        for position, match in iter_matches(entry, snapshot, offset, limit):
+            count += 1
+            yield json.dumps({'type': 'match', 'match': match}) + '\n'
+        yield json.dumps({'type': 'end', 'next_cursor': next_cursor(entry, position, count, limit)}) + '\n'
+        match_request_seconds.observe(time.perf_counter() - started, freshness=status)
+    except Exception as e:
+        logger.exception("Error in stream_matches")
+        yield json.dumps({'type': 'error', 'message': f'An error occurred: {str(e)}'}) + '\n'
 
 @app.route('/')
 def index():
@@ -119,39 +470,39 @@ def index():
 def login():
     """Login page and logic"""
     if request.method == 'POST':
-        print(f"LOGIN POST request received")
-        print(f"Content-Type: {request.content_type}")
-        print(f"Raw data: {request.get_data()}")
+        logger.debug("Login attempt, Content-Type: %s", request.content_type)
         
         try:
             data = request.get_json()
-            print(f"Parsed JSON: {data}")
         except Exception as e:
-            print(f"JSON parsing error: {e}")
+            logger.info("Login JSON parsing error: %s", e)
             return jsonify({'success': False, 'message': f'Invalid JSON: {str(e)}'}), 400
         
         email = data.get('email')
         password = data.get('password')
         
-        print(f"Email: {email}, Password length: {len(password) if password else 0}")
-        
         try:
             # Get user from database
-            response = supabase.table('users').select('*').eq('email', email).execute()
+            user = db.get_login_user(email)
             
-            if response.data and verify_password(password, response.data[0]['password_hash']):
-                session['user_id'] = response.data[0]['id']
+            if user and verify_password(password, user['password_hash']):
+                # Bring hashes made at an older BCRYPT_ROUNDS up to date
+                if password_pool.needs_rehash(user['password_hash']):
+                    user_id = user['id']
+                    password_pool.rehash_later(password, lambda new_hash: db.update_password_hash(user_id, new_hash))
+                session['user_id'] = user['id']
                 session['email'] = email
-                print(f"Login successful for user: {email}")
+                logger.info("Login successful for user %s", user['id'])
                 return jsonify({'success': True, 'message': 'Login successful'})
             else:
-                print(f"Login failed for user: {email}")
+                logger.info("Login failed")
                 return jsonify({'success': False, 'message': 'Invalid credentials'})
+        except PoolSaturated:
+            return server_busy()
         except Exception as e:
-            print(f"Database error: {e}")
+            logger.exception("Database error during login")
             return jsonify({'success': False, 'message': str(e)})
     
-    print(f"LOGIN GET request received")
     return render_template('login.html')
 
 
@@ -159,9 +510,8 @@ def login():
 @app.route('/api/test', methods=['POST'])
 def test_api():
     """Test route for debugging"""
-    print("Test API endpoint called")
     data = request.get_json()
-    print(f"Received test data: {data}")
+    logger.debug("Test API endpoint called")
     return jsonify({
         'success': True,
         'message': 'Backend is working',
@@ -182,26 +532,21 @@ def signup():
         name = data.get('name')
         
         try:
-            # Check if user already exists
-            existing_user = supabase.table('users').select('*').eq('email', email).execute()
-            
-            if existing_user.data:
-                return jsonify({'success': False, 'message': 'User already exists'})
-            
-            # Hash password and create user
+            # Hash password and create user; the unique email constraint
+            # reports an existing account
             hashed_password = hash_password(password)
             
-            new_user = supabase.table('users').insert({
-                'email': email,
-                'password_hash': hashed_password,
-                'name': name,
-                'created_at': datetime.now().isoformat()
-            }).execute()
+            new_user = db.create_user(email, hashed_password, name, datetime.now().isoformat())
+            
+            if new_user is None:
+                return jsonify({'success': False, 'message': 'User already exists'})
             
-            session['user_id'] = new_user.data[0]['id']
+            session['user_id'] = new_user['id']
             session['email'] = email
             
             return jsonify({'success': True, 'message': 'Registration successful'})
+        except PoolSaturated:
+            return server_busy()
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
     
@@ -218,7 +563,7 @@ def profile():
         
         try:
             # Update user profile
-            supabase.table('users').update({
+            updated = db.update_profile(session['user_id'], {
                 'age': data['age'],
                 'country': data['country'],
                 'education_level': data['education_level'],
@@ -227,7 +572,12 @@ def profile():
                 'financial_need': data['financial_need'],
                 'phone_number': data.get('phone_number', ''),
                 'updated_at': datetime.now().isoformat()
-            }).eq('id', session['user_id']).execute()
+            })
+            
+            # Re-encode the updated profile and re-rank its matches in the background
+            user_embedding_cache.invalidate(session['user_id'])
+            if updated:
+                refresh_matches(updated)
             
             return jsonify({'success': True, 'message': 'Profile updated successfully'})
         except Exception as e:
@@ -249,94 +599,135 @@ def get_matches():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not authenticated'})
     
+    params = dict(request.args)
+    params.update(request.get_json(silent=True) or {})
+    try:
+        limit, offset, cursor_key, stream = match_params(params, request.headers.get('Accept', ''))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    started = time.perf_counter()
     try:
         # Get user profile
-        user_response = supabase.table('users').select('*').eq('id', session['user_id']).execute()
-        if not user_response.data:
-            return jsonify({'success': False, 'message': 'User profile not found'})
-        
-        user_profile = user_response.data[0]
+        with match_stage_seconds.time(stage='profile_fetch'):
+            user_profile = db.get_match_profile(session['user_id'])
         
         # Validate required profile fields
-        required_fields = ['age', 'country', 'education_level', 'gpa', 'field_of_study', 'financial_need']
-        
-        def is_missing_value(value):
-            # Treat None and empty strings as missing
-            if value is None:
-                return True
-            if isinstance(value, str) and value.strip() == '':
-                return True
-            # Numeric 0 or 0.0 and boolean False are VALID values
-            return False
-
-        missing_fields = [field for field in required_fields if is_missing_value(user_profile.get(field))]
-        
-        if missing_fields:
-            return jsonify({
-                'success': False, 
-                'message': f'Please complete your profile. Missing: {", ".join(missing_fields)}'
-            })
+        error = profile_error(user_profile)
+        if error:
+            return jsonify(error)
         
-        # Get all scholarships
-        scholarships_response = supabase.table('scholarships').select('*').execute()
-        scholarships = scholarships_response.data
+        # Get the cached catalog of active scholarships
+        with match_stage_seconds.time(stage='catalog_fetch'):
+            snapshot = scholarship_catalog.snapshot()
         
-        if not scholarships:
+        if not snapshot.scholarships:
             return jsonify({'success': True, 'matches': [], 'message': 'No scholarships available'})
         
-        # Filter eligible scholarships
-        eligible_scholarships = filter_eligible_scholarships(user_profile, scholarships)
+        # Serve the cached ranking when it is still usable
+        entry, status = cached_ranking(user_profile, snapshot, cursor_key)
         
-        if not eligible_scholarships:
-            return jsonify({'success': True, 'matches': [], 'message': 'No eligible scholarships found'})
+        if stream:
+            return Response(
+                stream_with_context(stream_matches(user_profile, snapshot, entry, status, offset, limit, started)),
+                mimetype='application/x-ndjson'
+            )
         
-        # Create user embedding
-        user_embedding = create_user_embedding(user_profile)
+        if entry is None:
+            entry = rerank(user_profile, snapshot)
         
-        # Calculate similarities
-        similarities = []
-        for scholarship in eligible_scholarships:
-            try:
-                scholarship_embedding = create_scholarship_embedding(scholarship)
-                similarity = calculate_similarity(user_embedding, scholarship_embedding)
-                similarities.append({
-                    'scholarship': scholarship,
-                    'similarity': similarity
-                })
-            except Exception as e:
-                print(f"Error processing scholarship {scholarship.get('id', 'unknown')}: {e}")
-                continue
+        # Format this page from the ranking
+        response = jsonify(match_page(entry, snapshot, status, offset, limit))
+        match_request_seconds.observe(time.perf_counter() - started, freshness=status)
+        return response
         
-        if not similarities:
-            return jsonify({'success': True, 'matches': [], 'message': 'Error processing scholarships'})
-        
-        # Sort by similarity and get top 3
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
-        top_matches = similarities[:3]
+    except StaleCursor as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error in get_matches")
+        return jsonify({'success': False, 'message': f'An error occurred: {str(e)}'})
+
+def catalog_matrix(snapshot):
+    """Stored vectors of the snapshot's scholarships, row for row, cached per catalog version"""
+    with _catalog_matrix_lock:
+        if _catalog_matrix['version'] != snapshot.version:
+            _catalog_matrix['matrix'] = embedding_store.lookup([str(s['id']) for s in snapshot.scholarships])
+            _catalog_matrix['version'] = snapshot.version
+        return _catalog_matrix['matrix']
+
+@app.route('/api/match/batch', methods=['POST'])
+def get_batch_matches():
+    """Top-k matches for a cohort of profiles in one request"""
+    api_key = request.headers.get('X-API-Key', '')
+    if not (BATCH_MATCH_API_KEY and hmac.compare_digest(api_key.encode(), BATCH_MATCH_API_KEY.encode())):
+        if 'user_id' not in session:
+            return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+        if str(session['user_id']) not in BATCH_MATCH_COUNSELORS:
+            return jsonify({'success': False, 'message': 'Batch matching is for counselors'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    profiles = data.get('profiles')
+    if not isinstance(profiles, list) or not profiles:
+        return jsonify({'success': False, 'message': 'profiles must be a non-empty list'}), 400
+    if len(profiles) > BATCH_MATCH_MAX_PROFILES:
+        return jsonify({'success': False, 'message': f'At most {BATCH_MATCH_MAX_PROFILES} profiles per request'}), 413
+    try:
+        k = min(max(int(data.get('k', 10)), 1), BATCH_MATCH_MAX_K)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'k must be an integer'}), 400
+    
+    try:
+        snapshot = scholarship_catalog.snapshot()
+        matrix = catalog_matrix(snapshot)
         
-        # Format results
-        matches = []
-        for match in top_matches:
-            scholarship = match['scholarship']
-            confidence = round(match['similarity'] * 100, 1)
-            
-            matches.append({
-                'id': scholarship['id'],
-                'name': scholarship['name'],
-                'description': scholarship['description'],
-                'amount': scholarship['amount'],
-                'deadline': scholarship['deadline'],
-                'confidence': confidence,
-                'requirements': scholarship['requirements'],
-                'application_url': scholarship['application_url']
-            })
+        # A malformed profile gets its own error instead of failing the whole cohort
+        results = [None] * len(profiles)
+        valid, positions = [], []
+        for i, raw in enumerate(profiles):
+            try:
+                valid.append(coerce_profile(raw))
+                positions.append(i)
+            except ValueError as e:
+                profile_id = raw.get('id', i) if isinstance(raw, dict) else i
+                results[i] = {'profile_id': profile_id, 'matches': [], 'error': str(e)}
         
-        return jsonify({'success': True, 'matches': matches})
+        for i, (profile, matches, error) in zip(positions, match_cohort(valid, snapshot, matrix, encode, k)):
+            result = {'profile_id': profile.get('id', i), 'matches': [format_cohort_match(s, score) for s, score in matches]}
+            if error:
+                result['error'] = f'Please complete the profile. {error}'
+            results[i] = result
         
+        return jsonify({'success': True, 'results': results})
     except Exception as e:
-        print(f"Error in get_matches: {e}")
+        logger.exception("Error in get_batch_matches")
         return jsonify({'success': False, 'message': f'An error occurred: {str(e)}'})
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def buffer_feedback(user_id, scholarship_id, feedback_type):
+    """Validate and buffer one vote and fold it into re-ranking; returns an error message or None
+
+    Checking the vote and the scholarship here keeps a bad row out of the
+    batch it would otherwise share with other users' feedback.
+    """
+    if feedback_type not in FEEDBACK_SIGN:
+        return f'Unknown feedback type: {feedback_type}'
+    if scholarship_catalog.get(scholarship_id) is None:
+        return 'Scholarship not found'
+    write_buffer.submit('user_feedback', {
+        'user_id': user_id,
+        'scholarship_id': str(scholarship_id),
+        'feedback_type': feedback_type,
+        'created_at': datetime.now().isoformat()
+    })
+    # Fold the vote into this worker's preference vectors; the next match request re-ranks
+    if str(scholarship_id) in embedding_store:
+        feedback_ranker.record(user_id, scholarship_id, feedback_type, embedding_store.lookup([scholarship_id])[0])
+    return None
+
 @app.route('/api/feedback', methods=['POST'])
 def submit_feedback():
     """Submit user feedback on scholarship matches"""
@@ -348,18 +739,50 @@ def submit_feedback():
     feedback_type = data.get('feedback_type')  # 'like' or 'dislike'
     
     try:
-        # Store feedback
-        supabase.table('user_feedback').insert({
-            'user_id': session['user_id'],
-            'scholarship_id': scholarship_id,
-            'feedback_type': feedback_type,
-            'created_at': datetime.now().isoformat()
-        }).execute()
+        error = buffer_feedback(session['user_id'], scholarship_id, feedback_type)
+        if error:
+            return jsonify({'success': False, 'message': error})
+        match_cache.invalidate(session['user_id'])
         
         return jsonify({'success': True, 'message': 'Feedback submitted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/feedback/batch', methods=['POST'])
+def submit_feedback_batch():
+    """Submit several feedback events in one request
+
+    Body: {"events": [{"scholarship_id": ..., "feedback_type": "like"}, ...]},
+    applied in order. Returns how many were accepted and the index and reason
+    of each one that was not.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not authenticated'})
+    
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list) or not events:
+        return jsonify({'success': False, 'message': 'events must be a non-empty list'}), 400
+    if len(events) > FEEDBACK_BATCH_MAX_EVENTS:
+        return jsonify({'success': False, 'message': f'At most {FEEDBACK_BATCH_MAX_EVENTS} events per batch'}), 400
+    
+    try:
+        rejected = []
+        for position, event in enumerate(events):
+            if not isinstance(event, dict):
+                rejected.append({'index': position, 'message': 'Event must be an object'})
+                continue
+            error = buffer_feedback(session['user_id'], event.get('scholarship_id'), event.get('feedback_type'))
+            if error:
+                rejected.append({'index': position, 'message': error})
+        if len(rejected) < len(events):
+            match_cache.invalidate(session['user_id'])
+        
+        return jsonify({'success': True, 'accepted': len(events) - len(rejected), 'rejected': rejected})
+    except Exception as e:
+        logger.exception("Error in submit_feedback_batch")
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/apply', methods=['POST'])
 def apply_scholarship():
     """Handle scholarship application and send SMS notification"""
@@ -370,25 +793,21 @@ def apply_scholarship():
     scholarship_id = data.get('scholarship_id')
     
     try:
-        # Get user and scholarship details
-        user_response = supabase.table('users').select('*').eq('id', session['user_id']).execute()
-        user = user_response.data[0]
-        
-        scholarship_response = supabase.table('scholarships').select('*').eq('id', scholarship_id).execute()
-        scholarship = scholarship_response.data[0]
-        
-        # Store application
-        supabase.table('applications').insert({
-            'user_id': session['user_id'],
-            'scholarship_id': scholarship_id,
-            'status': 'applied',
-            'applied_at': datetime.now().isoformat()
-        }).execute()
+        # Applications are written at once rather than buffered: whether the row is
+        # new decides whether the confirmation SMS goes out, in any worker
+        application = db.apply(
+            session['user_id'],
+            scholarship_id,
+            datetime.now().isoformat(),
+            lookup_scholarship=scholarship_catalog.get
+        )
+        if application is None:
+            return jsonify({'success': False, 'message': 'You have already applied for this scholarship'})
         
-        # Send SMS notification if phone number exists
-        if user.get('phone_number'):
-            message = f"Hi {user['name']}! You've successfully applied for {scholarship['name']}. We'll notify you about the status soon!"
-            send_sms(user['phone_number'], message)
+        # Queue an SMS notification if phone number exists
+        if application.get('user_phone'):
+            message = f"Hi {application['user_name']}! You've successfully applied for {application['scholarship_name']}. We'll notify you about the status soon!"
+            send_sms(application['user_phone'], message)
         
         return jsonify({'success': True, 'message': 'Application submitted successfully'})
     except Exception as e:
@@ -0,0 +1,184 @@
+"""
+ASGI entry point for Scholarship Matchmaker
+POST /api/match is served on the event loop: the profile, catalog and feedback
+reads run concurrently on I/O threads, and encoding and scoring run on a small
+inference pool, so one worker keeps many requests in flight while the number
+of busy threads stays bounded. Every other route is the Flask app, run through asgiref.
+
+Run with: gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+
+import app as web
+from match_cache import StaleCursor
+from metrics import match_stage_seconds
+
+logger = logging.getLogger(__name__)
+
+# Blocking Supabase reads wait on the network, so many can share a core;
+# inference is CPU-bound and gets about one thread per core
+io_pool = ThreadPoolExecutor(int(os.getenv('ASYNC_IO_THREADS', 32)), thread_name_prefix='supabase-io')
+inference_pool = ThreadPoolExecutor(int(os.getenv('INFERENCE_THREADS', 1)), thread_name_prefix='inference')
+
+flask_application = WsgiToAsgi(web.app)
+
+
+def run_in(pool, fn, *args):
+    """Run fn(*args) on `pool` with this request's context (for round-trip counting)"""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(pool, context.run, fn, *args)
+
+
+def timed(stage, fn, *args):
+    with match_stage_seconds.time(stage=stage):
+        return fn(*args)
+
+
+def session_user_id(headers):
+    """user_id from the Flask session cookie, or None if it is missing or not signed by us"""
+    morsel = SimpleCookie(headers.get('cookie', '')).get(web.app.config['SESSION_COOKIE_NAME'])
+    serializer = web.app.session_interface.get_signing_serializer(web.app)
+    if morsel is None or serializer is None:
+        return None
+    try:
+        data = serializer.loads(morsel.value, max_age=int(web.app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get('user_id')
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_response(send, body, status=200, content_type='application/json', round_trips=0):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'x-db-round-trips', str(round_trips).encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def stream_response(send, lines, round_trips):
+    """Send NDJSON lines as they are produced; each one may rank, so it runs on the inference pool"""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'application/x-ndjson'),
+            (b'x-db-round-trips', str(round_trips).encode())
+        ]
+    })
+    while True:
+        line = await run_in(inference_pool, next, lines, None)
+        if line is None:
+            break
+        await send({'type': 'http.response.body', 'body': line.encode(), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def get_matches(scope, receive, send):
+    """Async twin of app.get_matches; same parameters and response bodies"""
+    body = await read_body(receive)
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    counter = [0]
+    web.db_round_trip_counter.set(counter)
+
+    def reply(data, status=200):
+        web.db_round_trips.observe(counter[0])
+        return send_response(send, json.dumps(data).encode(), status, round_trips=counter[0])
+
+    user_id = session_user_id(headers)
+    if user_id is None:
+        return await reply({'success': False, 'message': 'Not authenticated'})
+
+    params = dict(parse_qsl(scope.get('query_string', b'').decode()))
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        payload = {}
+    params.update(payload if isinstance(payload, dict) else {})
+    try:
+        limit, offset, cursor_key, stream = web.match_params(params, headers.get('accept', ''))
+    except ValueError as e:
+        return await reply({'success': False, 'message': str(e)}, 400)
+
+    started = time.perf_counter()
+    try:
+        # Independent reads run at the same time, including the user's
+        # feedback when this worker has not ranked for them yet
+        reads = [
+            run_in(io_pool, timed, 'profile_fetch', web.db.get_match_profile, user_id),
+            run_in(io_pool, timed, 'catalog_fetch', web.scholarship_catalog.snapshot)
+        ]
+        if user_id not in web.feedback_ranker:
+            reads.append(run_in(io_pool, timed, 'feedback_fetch', web.db.get_feedback, user_id))
+        user_profile, snapshot, *feedback_rows = await asyncio.gather(*reads)
+        error = web.profile_error(user_profile)
+        if error:
+            return await reply(error)
+        if not snapshot.scholarships:
+            return await reply({'success': True, 'matches': [], 'message': 'No scholarships available'})
+
+        entry, status = web.cached_ranking(user_profile, snapshot, cursor_key)
+        if stream:
+            web.db_round_trips.observe(counter[0])
+            lines = web.stream_matches(user_profile, snapshot, entry, status, offset, limit, started)
+            return await stream_response(send, lines, counter[0])
+
+        if entry is None:
+            if not feedback_rows and not web.feedback_ranker.is_current(user_id, user_profile.get('feedback_version')):
+                # Feedback changed through another worker since it was loaded here
+                feedback_rows = [await run_in(io_pool, timed, 'feedback_fetch', web.db.get_feedback, user_id)]
+            entry = await run_in(inference_pool, web.rerank, user_profile, snapshot, *feedback_rows)
+        # The page may read display text from Supabase, so it is built off the event loop
+        data = await run_in(io_pool, web.match_page, entry, snapshot, status, offset, limit)
+        web.match_request_seconds.observe(time.perf_counter() - started, freshness=status)
+        return await reply(data)
+    except StaleCursor as e:
+        return await reply({'success': False, 'message': str(e)}, 400)
+    except Exception as e:
+        logger.exception("Error in get_matches")
+        return await reply({'success': False, 'message': f'An error occurred: {str(e)}'})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            io_pool.shutdown(wait=False)
+            inference_pool.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/api/match' and scope['method'] == 'POST':
+        await get_matches(scope, receive, send)
+    else:
+        await flask_application(scope, receive, send)
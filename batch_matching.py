@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Scholarship Matchmaker - Batch Matching
+Matches a whole cohort of student profiles against the catalog at once: each
+chunk of profiles is encoded in one batched call and scored with blocked
+matrix-matrix products, so memory stays bounded however large the cohort is.
+
+    python batch_matching.py cohort.jsonl --output matches.jsonl --k 10
+
+Also used by the /api/match/batch endpoint.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from embeddings import MATCH_PROFILE_FIELDS, missing_profile_fields, profile_text
+from scoring import top_k_batch
+
+INT_FIELDS = {'age'}
+FLOAT_FIELDS = {'gpa'}
+TEXT_FIELDS = set(MATCH_PROFILE_FIELDS) - INT_FIELDS - FLOAT_FIELDS
+
+
+def match_cohort(profiles, snapshot, matrix, encode, k=10, chunk_size=256, batch_size=64):
+    """Yield (profile, [(scholarship, score), ...], error) for each profile, in order
+
+    `matrix` holds the normalized vectors of snapshot.scholarships, row for
+    row. Profiles with missing fields are yielded with an error message and
+    no matches.
+    """
+    for start in range(0, len(profiles), chunk_size):
+        chunk = profiles[start:start + chunk_size]
+        valid = [profile for profile in chunk if not missing_profile_fields(profile)]
+
+        results = {}
+        if valid and len(matrix):
+            user_vectors = np.asarray(encode([profile_text(p) for p in valid], batch_size=batch_size), dtype=np.float32)
+            allowed = np.stack([snapshot.eligibility.mask(p) for p in valid])
+            rows, scores = top_k_batch(user_vectors, matrix, k, allowed=allowed)
+            for i, profile in enumerate(valid):
+                results[id(profile)] = [
+                    (snapshot.scholarships[row], float(score))
+                    for row, score in zip(rows[i], scores[i]) if row >= 0
+                ]
+
+        for profile in chunk:
+            missing = missing_profile_fields(profile)
+            if missing:
+                yield profile, [], f'Missing: {", ".join(missing)}'
+            else:
+                yield profile, results.get(id(profile), []), None
+
+
+def format_cohort_match(scholarship, score):
+    """Compact match record for batch responses"""
+    return {
+        'id': scholarship['id'],
+        'name': scholarship['name'],
+        'amount': scholarship['amount'],
+        'deadline': scholarship['deadline'],
+        'confidence': round(score * 100, 1),
+        'application_url': scholarship['application_url']
+    }
+
+
+def read_profiles(path):
+    """Profiles from a .csv or .jsonl file, with numeric fields coerced"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    return [coerce_profile(row) for row in rows]
+
+
+def coerce_profile(row):
+    """Copy of a raw profile with blanks as None and numeric fields coerced
+
+    Raises ValueError if the profile is not an object, a numeric field does
+    not parse or a text field holds something other than text.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('Profile must be an object')
+    profile = {key: (value.strip() or None) if isinstance(value, str) else value for key, value in row.items()}
+    for field in INT_FIELDS | FLOAT_FIELDS:
+        if profile.get(field) is not None:
+            try:
+                profile[field] = int(float(profile[field])) if field in INT_FIELDS else float(profile[field])
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f'{field} must be a number')
+    for field in TEXT_FIELDS:
+        if profile.get(field) is not None and not isinstance(profile[field], str):
+            raise ValueError(f'{field} must be text')
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match a cohort of student profiles in one batch')
+    parser.add_argument('source', help='Profiles as .csv or .jsonl')
+    parser.add_argument('--output', help='JSONL file for the results (default: stdout)')
+    parser.add_argument('--k', type=int, default=10, help='Matches per profile')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Profiles encoded and scored together')
+    parser.add_argument('--batch-size', type=int, default=64, help='model.encode batch size')
+    parser.add_argument('--store-dir', help='Embedding store directory (default: EMBEDDING_STORE_DIR)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ File not found: {args.source}", file=sys.stderr)
+        sys.exit(1)
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    from catalog import ScholarshipCatalog
+    from embeddings import ScholarshipEmbeddingStore, encode
+
+    load_dotenv()
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    store = ScholarshipEmbeddingStore(args.store_dir or os.getenv('EMBEDDING_STORE_DIR', 'embedding_store'), encode=encode)
+
+    started = time.perf_counter()
+    snapshot = ScholarshipCatalog(supabase, on_load=lambda loaded: store.sync(loaded.rows or [])).snapshot()
+    matrix = store.lookup([str(s['id']) for s in snapshot.scholarships])
+    profiles = read_profiles(args.source)
+    print(f"📚 {len(snapshot):,} scholarships, {len(profiles):,} profiles", file=sys.stderr)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for i, (profile, matches, error) in enumerate(
+            match_cohort(profiles, snapshot, matrix, encode, args.k, args.chunk_size, args.batch_size)
+        ):
+            record = {'profile_id': profile.get('id', i)}
+            if error:
+                record['error'] = error
+            record['matches'] = [format_cohort_match(s, score) for s, score in matches]
+            out.write(json.dumps(record) + '\n')
+    finally:
+        if args.output:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Matched {len(profiles):,} profiles in {elapsed:.1f}s ({len(profiles) / elapsed:,.0f} profiles/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall@k and latency of the IVF index against exact ranking
+Run with: python benchmarks/bench_ann.py [catalog_size]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import ExactIndex, IVFIndex
+
+DIM = 384
+TOP_K = 10
+QUERIES = 200
+N_PROBES = [1, 2, 4, 8, 16, 32, 64]
+
+
+def synthetic_embeddings(n, clusters=500, seed=42):
+    """Clustered vectors, closer to real sentence embeddings than pure noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 2.0 * rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def timed_searches(index, queries, **params):
+    """Run every query, returning (results, mean latency in ms)"""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, TOP_K, **params)[0])
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    vectors = synthetic_embeddings(size)
+    ids = [str(i) for i in range(size)]
+    # Queries are perturbed catalog vectors, as profiles land near real scholarships
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.choice(size, QUERIES)] + 0.7 * rng.standard_normal((QUERIES, DIM)).astype(np.float32)
+
+    print(f"📥 Building indexes over {size:,} vectors...")
+    exact = ExactIndex()
+    exact.add(ids, vectors)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(min_train_size=1)
+    ivf.add(ids, vectors)
+    print(f"✅ IVF trained with {ivf.n_lists} lists in {time.perf_counter() - start:.1f}s")
+
+    truth, exact_ms = timed_searches(exact, queries)
+
+    print(f"\n📊 recall@{TOP_K} over {QUERIES} queries")
+    print("=" * 48)
+    print(f"{'index':>12} | {'recall':>8} | {'latency (ms)':>12} | {'speedup':>7}")
+    print("-" * 48)
+    print(f"{'exact':>12} | {1.0:>8.3f} | {exact_ms:>12.2f} | {1.0:>6.1f}x")
+
+    for n_probe in N_PROBES:
+        if n_probe > ivf.n_lists:
+            break
+        results, ivf_ms = timed_searches(ivf, queries, n_probe=n_probe)
+        recall = np.mean([len(set(r) & set(t)) / TOP_K for r, t in zip(results, truth)])
+        print(f"{'ivf/' + str(n_probe):>12} | {recall:>8.3f} | {ivf_ms:>12.2f} | {exact_ms / ivf_ms:>6.1f}x")
+
+    print("=" * 48)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/match under concurrent load, gunicorn sync workers vs the ASGI app
+Each server runs benchmarks/fake_server.py (synthetic catalog, simulated
+Supabase latency, hashing encoder) with the same number of worker processes;
+clients log in as different users, so the first request per user ranks and
+later ones hit the match cache.
+Run with: python benchmarks/bench_async.py [--workers 2] [--concurrency 1,16,64,256] [--requests 1000]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+from flask import Flask
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import make_profiles
+
+SECRET_KEY = 'bench-async-secret'
+
+
+def servers(args, port):
+    bind = f'127.0.0.1:{port}'
+    return {
+        'gunicorn sync': ['gunicorn', '-k', 'sync', '-w', str(args.workers), '--threads', '1', '-b', bind, 'fake_server:app'],
+        f'gunicorn gthread x{args.threads}': [
+            'gunicorn', '-k', 'gthread', '-w', str(args.workers), '--threads', str(args.threads), '-b', bind, 'fake_server:app'
+        ],
+        # Same process manager as the WSGI runs, so only the worker model differs
+        'uvicorn asgi': [
+            'gunicorn', '-k', 'uvicorn.workers.UvicornWorker', '-w', str(args.workers), '-b', bind, 'fake_server:application'
+        ],
+    }
+
+
+def session_cookies(users):
+    """Signed Flask session cookies, one per synthetic user"""
+    signer = Flask(__name__)
+    signer.secret_key = SECRET_KEY
+    serializer = signer.session_interface.get_signing_serializer(signer)
+    return [serializer.dumps({'user_id': profile['id']}) for profile in make_profiles(users, seed=1)]
+
+
+async def wait_until_up(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url + '/metrics')
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.25)
+    raise RuntimeError(f'server at {url} did not start')
+
+
+async def load(url, cookies, concurrency, total):
+    """Return (requests/s, p50 ms, p95 ms, errors)"""
+    latencies = []
+    errors = 0
+    next_request = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal next_request, errors
+            while next_request < total:
+                i = next_request
+                next_request += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        '/api/match', json={'limit': 10},
+                        headers={'Cookie': f'session={cookies[i % len(cookies)]}'}
+                    )
+                    ok = response.status_code == 200 and response.json().get('success')
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return 0.0, float('nan'), float('nan'), errors
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker (gunicorn.conf.py default)')
+    parser.add_argument('--concurrency', default='1,16,64,256', help='Concurrent clients to test')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per concurrency level')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--catalog-size', type=int, default=5000)
+    parser.add_argument('--db-latency-ms', type=float, default=20, help='Simulated latency per Supabase query')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--settle', type=float, default=10, help='Seconds to let every worker start')
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ, SECRET_KEY=SECRET_KEY, BENCH_USERS=str(args.users),
+        BENCH_CATALOG_SIZE=str(args.catalog_size), BENCH_DB_LATENCY_MS=str(args.db_latency_ms)
+    )
+    cookies = session_cookies(args.users)
+    url = f'http://127.0.0.1:{args.port}'
+
+    print(f"📊 /api/match: {args.workers} worker(s), {args.catalog_size:,} scholarships, "
+          f"{args.db_latency_ms:g} ms per Supabase query, {os.cpu_count()} CPU(s)")
+    print("=" * 78)
+    print(f"{'server':<22} | {'clients':>7} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'errors':>6}")
+    print("-" * 78)
+    for name, command in servers(args, args.port).items():
+        # Started from benchmarks/ so gunicorn does not pick up the repo's gunicorn.conf.py
+        try:
+            server = subprocess.Popen(command, cwd=BENCH_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            print(f"{name:<22} | not installed")
+            continue
+        try:
+            asyncio.run(wait_until_up(url))
+            # The first worker answers before the others finish encoding the catalog
+            time.sleep(args.settle)
+            for concurrency in [int(n) for n in args.concurrency.split(',')]:
+                throughput, p50, p95, errors = asyncio.run(load(url, cookies, concurrency, args.requests))
+                print(f"{name:<22} | {concurrency:>7} | {throughput:>8.1f} | {p50:>8.1f} | {p95:>8.1f} | {errors:>6}")
+        finally:
+            server.terminate()
+            server.wait()
+        print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
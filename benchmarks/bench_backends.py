@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: embedding inference backends (torch, torch-int8, onnx)
+Checks that each backend ranks the sample catalog from database_setup.sql the
+same way as torch (top-3 per fixture profile), then measures single-text
+latency and batch throughput.
+Run with: python benchmarks/bench_backends.py [--backends torch,torch-int8,onnx] [--batch 64]
+
+Exits with status 1 when a backend's top-3 disagrees with torch.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from embedding_backends import BACKENDS, make_backend
+from embeddings import DEFAULT_MODEL_NAME, profile_text, scholarship_text
+from scoring import cosine_scores, normalize, top_k
+
+FIXTURE_PROFILES = [
+    {'age': 20, 'country': 'Kenya', 'education_level': 'Undergraduate', 'gpa': 3.9,
+     'field_of_study': 'Computer Science', 'financial_need': 'High'},
+    {'age': 24, 'country': 'Nigeria', 'education_level': 'Graduate', 'gpa': 3.6,
+     'field_of_study': 'Medicine', 'financial_need': 'Medium'},
+    {'age': 27, 'country': 'India', 'education_level': 'Graduate', 'gpa': 3.4,
+     'field_of_study': 'Mechanical Engineering', 'financial_need': 'Low'},
+    {'age': 19, 'country': 'Ghana', 'education_level': 'Undergraduate', 'gpa': 3.2,
+     'field_of_study': 'Business Administration', 'financial_need': 'High'},
+    {'age': 22, 'country': 'Brazil', 'education_level': 'Undergraduate', 'gpa': 3.7,
+     'field_of_study': 'Literature', 'financial_need': 'Medium'},
+    {'age': 25, 'country': 'Canada', 'education_level': 'Graduate', 'gpa': 3.8,
+     'field_of_study': 'Environmental Science', 'financial_need': 'Low'},
+]
+
+
+def load_sample_scholarships(path=os.path.join(ROOT, 'database_setup.sql')):
+    """Parse the sample INSERT INTO scholarships rows out of the schema file"""
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+    match = re.search(r"INSERT INTO scholarships \(([^)]*)\) VALUES(.*?);", sql, re.S)
+    columns = [column.strip() for column in match.group(1).split(',')]
+    values = []
+    for quoted, number in re.findall(r"'((?:[^']|'')*)'|(-?\d+(?:\.\d+)?)", match.group(2)):
+        values.append(quoted.replace("''", "'") if number == '' else float(number))
+    rows = [dict(zip(columns, values[i:i + len(columns)])) for i in range(0, len(values), len(columns))]
+    for i, row in enumerate(rows):
+        row['id'] = str(i)
+    return rows
+
+
+def top3_rankings(model, scholarships, profiles):
+    matrix = normalize(np.asarray(model.encode([scholarship_text(s) for s in scholarships]), dtype=np.float32))
+    rankings = []
+    for profile in profiles:
+        user_vector = np.asarray(model.encode(profile_text(profile)), dtype=np.float32)
+        rows = top_k(cosine_scores(user_vector, matrix), 3)
+        rankings.append([scholarships[row]['id'] for row in rows])
+    return matrix, rankings
+
+
+def measure(model, texts, batch_size, repeats=50):
+    """(p50 single-text latency in ms, batch throughput in texts/s)"""
+    model.encode(texts[0])
+    latencies = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        model.encode(texts[i % len(texts)])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    batch = (texts * (-(-batch_size * 4 // len(texts))))[:batch_size * 4]
+    started = time.perf_counter()
+    model.encode(batch, batch_size=batch_size)
+    return float(np.median(latencies)), len(batch) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma-separated backends to compare')
+    parser.add_argument('--batch', type=int, default=64, help='Batch size for the throughput run')
+    args = parser.parse_args()
+
+    model_name = os.getenv('MODEL_NAME', DEFAULT_MODEL_NAME)
+    scholarships = load_sample_scholarships()
+    texts = [scholarship_text(s) for s in scholarships] + [profile_text(p) for p in FIXTURE_PROFILES]
+    names = ['torch'] + [name for name in args.backends.split(',') if name != 'torch']
+
+    print(f"📊 {model_name}: {len(scholarships)} sample scholarships, {len(FIXTURE_PROFILES)} profiles")
+    print("=" * 78)
+    print(f"{'backend':>12} | {'load s':>7} | {'p50 ms':>7} | {'texts/s':>8} | {'top-3 match':>11} | {'min cos':>7}")
+    print("-" * 78)
+
+    reference_matrix = reference_rankings = None
+    mismatched = []
+    for name in names:
+        try:
+            started = time.perf_counter()
+            model = make_backend(name, model_name)
+            load_seconds = time.perf_counter() - started
+        except ImportError as e:
+            print(f"{name:>12} | skipped: {e}")
+            if name == 'torch':
+                print("❌ The torch backend is required as the reference")
+                sys.exit(1)
+            continue
+
+        matrix, rankings = top3_rankings(model, scholarships, FIXTURE_PROFILES)
+        if reference_rankings is None:
+            reference_matrix, reference_rankings = matrix, rankings
+        agreeing = sum(a == b for a, b in zip(rankings, reference_rankings))
+        min_cos = float(np.min(np.sum(matrix * reference_matrix, axis=1)))
+        if agreeing != len(rankings):
+            mismatched.append(name)
+
+        p50, throughput = measure(model, texts, args.batch)
+        print(f"{name:>12} | {load_seconds:>7.1f} | {p50:>7.1f} | {throughput:>8.0f} | "
+              f"{agreeing:>5}/{len(rankings):<5} | {min_cos:>7.4f}")
+    print("=" * 78)
+
+    if mismatched:
+        print(f"❌ Top-3 rankings differ from torch for: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("✅ All backends agree with torch on the top-3")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by the in-memory catalog per worker
+Loads synthetic scholarships the way the catalog reads them (JSON from
+PostgREST, so every row has its own strings) and measures with tracemalloc
+what stays allocated once the snapshot is built: the full row dicts the
+catalog used to keep, against compact records with the display text left out.
+Run with: python benchmarks/bench_catalog_memory.py [--sizes 10000,100000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from catalog import MATCH_COLUMNS, CatalogSnapshot, _deadline
+from eligibility import EligibilityIndex
+from synthetic import make_scholarships
+
+
+def dict_snapshot(rows):
+    """What a snapshot held before records: sorted row dicts, deadlines, id map and eligibility index"""
+    rows = sorted(rows, key=_deadline)
+    return rows, [str(s.get('deadline'))[:10] for s in rows], {str(s['id']): s for s in rows}, EligibilityIndex(rows)
+
+
+def compact_snapshot(rows):
+    snapshot = CatalogSnapshot(rows, 'v1')
+    snapshot.release_rows()
+    return snapshot
+
+
+def retained(payload, build):
+    """(bytes still allocated after build() of freshly decoded rows, build seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    rows = json.loads(payload)
+    started = time.perf_counter()
+    kept = build(rows)
+    elapsed = time.perf_counter() - started
+    del rows
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='Catalog sizes')
+    args = parser.parse_args()
+
+    columns = [c.strip() for c in MATCH_COLUMNS.split(',')]
+    print("📊 Catalog memory per worker (tracemalloc, after the snapshot is built)")
+    print("=" * 72)
+    print(f"{'scholarships':>12} | {'layout':<15} | {'MiB':>8} | {'bytes/row':>9} | {'build s':>7}")
+    print("-" * 72)
+    for size in [int(n) for n in args.sizes.split(',')]:
+        # Only the columns the catalog selects
+        payload = json.dumps([{c: s[c] for c in columns} for s in make_scholarships(size, seed=size)])
+        for name, build in (('row dicts', dict_snapshot), ('compact records', compact_snapshot)):
+            size_bytes, elapsed = retained(payload, build)
+            print(f"{size:>12,} | {name:<15} | {size_bytes / 2**20:>8.1f} | {size_bytes / size:>9.0f} | {elapsed:>7.2f}")
+        print("-" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent single-text encoding, direct vs the micro-batching service
+Run with: python benchmarks/bench_embedding_service.py [--clients 32] [--requests 20] [--simulate]
+
+--simulate replaces the model with a cost model (fixed per-call overhead plus
+a per-text cost, serialized like a saturated CPU) so the batching behaviour
+can be measured on machines without torch installed.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_service import EmbeddingServiceClient, MicroBatcher, make_server
+
+SAMPLE_TEXT = "Age: 20, Country: Kenya, Education: Undergraduate, GPA: 3.7, Field: Computer Science, Financial Need: High"
+
+
+class SimulatedModel:
+    """model.encode stand-in: 4 ms per call + 0.3 ms per text, one call at a time"""
+
+    def __init__(self, call_ms=4.0, text_ms=0.3, dim=384):
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+        self.dim = dim
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=None):
+        single = isinstance(texts, str)
+        count = 1 if single else len(texts)
+        with self._lock:
+            time.sleep((self.call_ms + self.text_ms * count) / 1000)
+        vectors = np.zeros((count, self.dim), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+def run_load(encode_one, clients, requests_per_client):
+    """Fire requests from `clients` threads; return (throughput/s, latencies in ms)"""
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients + 1)
+
+    def client():
+        start_barrier.wait()
+        local = []
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            encode_one(SAMPLE_TEXT)
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, np.array(latencies)
+
+
+def report(name, throughput, latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:>22} | {throughput:>10.0f} | {p50:>8.1f} | {p95:>8.1f} | {p99:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=20, help='Requests per client')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--simulate', action='store_true', help='Use a cost model instead of the real model')
+    args = parser.parse_args()
+
+    if args.simulate:
+        model = SimulatedModel()
+        print("⚠️  Simulated model: 4 ms per call + 0.3 ms per text")
+    else:
+        from embeddings import get_model
+
+        print("📥 Loading embedding model...")
+        model = get_model()
+        model.encode(SAMPLE_TEXT)
+
+    batcher = MicroBatcher(
+        lambda texts: model.encode(texts, batch_size=args.max_batch),
+        max_batch_size=args.max_batch,
+        max_wait_ms=args.max_wait_ms
+    )
+    server = make_server('127.0.0.1', 0, batcher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = EmbeddingServiceClient(f"http://127.0.0.1:{server.server_address[1]}")
+
+    print(f"\n📊 {args.clients} concurrent clients x {args.requests} single-text requests")
+    print("=" * 70)
+    print(f"{'mode':>22} | {'texts/s':>10} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print("-" * 70)
+    report('direct model.encode', *run_load(model.encode, args.clients, args.requests))
+    report('service (batched)', *run_load(client.encode, args.clients, args.requests))
+    print("=" * 70)
+    print(f"Service formed {batcher.batches} batches, {batcher.texts / max(batcher.batches, 1):.1f} texts each on average")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
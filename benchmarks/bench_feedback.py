@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scoring overhead of feedback re-ranking
+Compares the plain top-100 search with the feedback path (top-200 search,
+vector lookup and re-rank) for a user without feedback and one with 50 votes,
+while 10% of the catalog carries other users' feedback. Also times one
+incremental feedback update.
+Run with: python benchmarks/bench_feedback.py [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import ExactIndex
+from feedback import FeedbackRanker
+from scoring import normalize
+
+DIM = 384
+RANKED = 100
+VOTES = 50
+
+
+def best_of(fn, repeat=20):
+    """Best wall time of `repeat` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Catalog sizes')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"📊 Feedback re-ranking overhead (top-{RANKED}, {DIM}-dim)")
+    print("=" * 82)
+    print(f"{'scholarships':>12} | {'plain (ms)':>10} | {'no votes (ms)':>13} | {'50 votes (ms)':>13} | {'added (ms)':>10} | {'update (us)':>11}")
+    print("-" * 82)
+
+    for size in [int(n) for n in args.sizes.split(',')]:
+        ids = [f's{i}' for i in range(size)]
+        matrix = normalize(rng.standard_normal((size, DIM)).astype(np.float32))
+        rows = {scholarship_id: row for row, scholarship_id in enumerate(ids)}
+        lookup = lambda wanted: matrix[[rows[i] for i in wanted]]
+        index = ExactIndex()
+        index.add(ids, matrix)
+        user_vector = normalize(rng.standard_normal(DIM).astype(np.float32))
+
+        ranker = FeedbackRanker(dim=DIM)
+        # Other users' feedback on 10% of the catalog
+        for user in range(size // 10):
+            voted = [int(rng.integers(size))]
+            ranker.load_user(
+                f'other{user}', [{'scholarship_id': ids[voted[0]], 'feedback_type': 'like'}],
+                matrix[voted], normalize(rng.standard_normal(DIM).astype(np.float32))
+            )
+        voted = rng.choice(size, VOTES, replace=False)
+        ranker.load_user('voter', [
+            {'scholarship_id': ids[row], 'feedback_type': 'like' if i % 3 else 'dislike'} for i, row in enumerate(voted)
+        ], matrix[voted], user_vector)
+        ranker.load_user('new', [], [], user_vector)
+
+        def feedback_path(user_id):
+            disliked = ranker.disliked(user_id)
+            allowed = [i for i in ids if i not in disliked]
+            top_ids, top_scores = index.search(user_vector, 2 * RANKED, allowed=allowed)
+            top_ids, top_scores = ranker.rerank(user_id, user_vector, top_ids, top_scores, lookup(top_ids))
+            return top_ids[:RANKED]
+
+        plain = best_of(lambda: index.search(user_vector, RANKED, allowed=ids))
+        new = best_of(lambda: feedback_path('new'))
+        voter = best_of(lambda: feedback_path('voter'))
+
+        updates = 1000
+        started = time.perf_counter()
+        for i in range(updates):
+            ranker.record('voter', ids[i % size], 'like' if i % 2 else 'dislike', matrix[i % size])
+        update_us = (time.perf_counter() - started) / updates * 1e6
+
+        print(f"{size:>12,} | {plain:>10.2f} | {new:>13.2f} | {voter:>13.2f} | {voter - plain:>10.2f} | {update_us:>11.1f}")
+
+    print("=" * 82)
+
+
+if __name__ == "__main__":
+    main()
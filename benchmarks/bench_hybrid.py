@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: hybrid BM25 + embedding retrieval vs pure semantic ranking
+For synthetic catalogs and profiles, times the BM25 candidate step alone and
+the app's top-200 search done semantically and with each fusion strategy.
+Ranking quality is nDCG@10 against a synthetic relevance grade (same field
++2, same education level +1, mentions financial need for a high-need
+profile +1), and overlap@10 with the semantic top 10.
+
+Uses the hashing encoder from synthetic.py unless BENCH_REAL_MODEL=1, so
+"semantic" here is itself bag-of-words; rerun with the real model for
+quality numbers that mean something.
+Run with: python benchmarks/bench_hybrid.py [--sizes 10000,50000,100000] [--profiles 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# app.py reads these at import; nothing ever connects to them
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ['HYBRID_RETRIEVAL'] = '1'
+
+import app as web
+from embeddings import profile_text
+from lexical_index import get_fusion, profile_query
+from synthetic import FakeSupabase, hashing_encode, make_profiles, make_scholarships, wire_app
+
+K = 200
+
+
+def relevance(profile, scholarship):
+    grade = 2 * (scholarship['field_of_study'] == profile['field_of_study'])
+    grade += scholarship.get('education_level') == profile['education_level']
+    text = f"{scholarship['description']} {scholarship['requirements']}".lower()
+    grade += profile['financial_need'] == 'High' and 'financial need' in text
+    return grade
+
+
+def ndcg_at_10(ranked_grades, all_grades):
+    discounts = 1 / np.log2(np.arange(2, 12))
+    ideal = np.sort(all_grades)[::-1][:10]
+    best = (ideal * discounts[:len(ideal)]).sum()
+    gained = (np.asarray(ranked_grades[:10], dtype=float) * discounts[:len(ranked_grades[:10])]).sum()
+    return gained / best if best > 0 else 1.0
+
+
+def percentiles(times):
+    times = np.asarray(times) * 1000
+    return np.percentile(times, 50), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,50000,100000', help='Catalog sizes')
+    parser.add_argument('--profiles', type=int, default=200)
+    args = parser.parse_args()
+
+    encode = hashing_encode
+    if os.getenv('BENCH_REAL_MODEL', '').lower() in ('1', 'true', 'yes'):
+        from embeddings import encode
+    profiles = make_profiles(args.profiles, seed=3)
+
+    print(f"📊 Hybrid vs semantic retrieval (top-{K} of {web.LEXICAL_CANDIDATES} lexical candidates, "
+          f"alpha {web.HYBRID_ALPHA}, {'model' if encode is not hashing_encode else 'hashing'} encoder)")
+    print("=" * 78)
+    print(f"{'scholarships':>12} | {'method':<16} | {'p50 ms':>7} | {'p95 ms':>7} | {'nDCG@10':>7} | {'overlap@10':>10}")
+    print("-" * 78)
+
+    for size in [int(n) for n in args.sizes.split(',')]:
+        catalog = make_scholarships(size, seed=size)
+        with tempfile.TemporaryDirectory() as store_dir:
+            wire_app(setattr, web, FakeSupabase(scholarships=catalog, users=profiles), encode, store_dir)
+            snapshot = web.scholarship_catalog.snapshot()
+            # The snapshot keeps compact records without display text; grade against the source rows
+            source_rows = {str(s['id']): s for s in catalog}
+
+            # Incremental update cost: re-index 1% of the catalog
+            changed = snapshot.scholarships[:max(1, size // 100)]
+            started = time.perf_counter()
+            web.lexical_index.add(changed)
+            update_us = (time.perf_counter() - started) / len(changed) * 1e6
+
+            cases = []
+            for profile in profiles:
+                eligible = snapshot.eligibility.filter(profile)
+                if not eligible:
+                    continue
+                eligible_ids = [str(s['id']) for s in eligible]
+                grades = {str(s['id']): relevance(profile, source_rows[str(s['id'])]) for s in eligible}
+                vector = encode(profile_text(profile))
+                cases.append((profile, vector, eligible_ids, grades))
+
+            methods = {
+                'semantic': lambda p, v, ids: web.scholarship_index.search(v, K, allowed=ids)[0],
+                'bm25 candidates': lambda p, v, ids: web.lexical_index.search(profile_query(p), web.LEXICAL_CANDIDATES, allowed=ids)[0],
+                'hybrid weighted': ('weighted', lambda p, v, ids: web.hybrid_search(p, v, ids, K)[0]),
+                'hybrid rrf': ('rrf', lambda p, v, ids: web.hybrid_search(p, v, ids, K)[0])
+            }
+            semantic_top = {}
+            for name, method in methods.items():
+                if isinstance(method, tuple):
+                    web.fuse_scores = get_fusion(method[0])
+                    method = method[1]
+                times, ndcgs, overlaps = [], [], []
+                for profile, vector, eligible_ids, grades in cases:
+                    started = time.perf_counter()
+                    ranked = method(profile, vector, eligible_ids)
+                    times.append(time.perf_counter() - started)
+                    if name == 'semantic':
+                        semantic_top[profile['id']] = set(ranked[:10])
+                    ndcgs.append(ndcg_at_10([grades[i] for i in ranked], list(grades.values())))
+                    overlaps.append(len(semantic_top[profile['id']] & set(ranked[:10])) / 10)
+                p50, p95 = percentiles(times)
+                print(f"{size:>12,} | {name:<16} | {p50:>7.2f} | {p95:>7.2f} | {np.mean(ndcgs):>7.3f} | {np.mean(overlaps):>10.2f}")
+            print(f"{'':>12} | BM25 update: {update_us:.1f} us per scholarship")
+            print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
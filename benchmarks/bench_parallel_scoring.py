@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: exact top-200 search, serial vs sharded across processes
+Each catalog is searched with half of it eligible, first by the plain
+ExactIndex and then by a ShardedScorer with 1, 2, 4... processes (up to
+the core count). Speedup is relative to the serial search.
+Run with: python benchmarks/bench_parallel_scoring.py [--sizes 50000,200000,500000] [--processes 1,2,4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import ExactIndex
+from parallel_scoring import ShardedScorer
+
+DIM = 384
+K = 200
+
+
+def best_of(fn, repeat=10):
+    """Best wall time of `repeat` runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def default_processes():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    return sorted(set(counts + [cores]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='50000,200000,500000', help='Catalog sizes')
+    parser.add_argument('--processes', default=','.join(map(str, default_processes())), help='Process counts')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    counts = [int(n) for n in args.processes.split(',')]
+    print(f"📊 Sharded exact search (top-{K}, {DIM}-dim, {os.cpu_count()} core(s))")
+    print("=" * 64)
+    print(f"{'scholarships':>12} | {'processes':>9} | {'ms':>8} | {'speedup':>7} | {'same top-k':>10}")
+    print("-" * 64)
+
+    for size in [int(n) for n in args.sizes.split(',')]:
+        ids = [f's{i}' for i in range(size)]
+        vectors = rng.standard_normal((size, DIM)).astype(np.float32)
+        query = rng.standard_normal(DIM).astype(np.float32)
+        allowed = ids[::2]
+
+        serial = ExactIndex()
+        serial.add(ids, vectors)
+        expected = serial.search(query, K, allowed=allowed)[0]
+        baseline = best_of(lambda: serial.search(query, K, allowed=allowed), args.repeat)
+        print(f"{size:>12,} | {'serial':>9} | {baseline:>8.2f} | {1.0:>6.2f}x | {'':>10}")
+        del serial
+
+        for processes in counts:
+            scorer = ShardedScorer(processes, min_rows=0)
+            index = ExactIndex(scorer=scorer)
+            index.add(ids, vectors)
+            # The first search starts the worker processes
+            same = index.search(query, K, allowed=allowed)[0] == expected
+            elapsed = best_of(lambda: index.search(query, K, allowed=allowed), args.repeat)
+            print(f"{size:>12,} | {processes:>9} | {elapsed:>8.2f} | {baseline / elapsed:>6.2f}x | {str(same):>10}")
+            scorer.close()
+        print("-" * 64)
+
+
+if __name__ == "__main__":
+    main()
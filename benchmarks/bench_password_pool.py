@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: login throughput through the bcrypt pool at different pool sizes
+Many concurrent clients verify a password while a background thread measures
+how long a small numpy scoring task waits for CPU, as a stand-in for /api/match.
+Run with: python benchmarks/bench_password_pool.py [--clients 32] [--logins 8] [--rounds 10] [--sizes 1,2,4,8]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_pool import PasswordPool, PoolSaturated
+
+
+def match_probe(stop, latencies):
+    """Repeatedly time a small matrix-vector product, like scoring a catalog"""
+    matrix = np.random.default_rng(0).standard_normal((5000, 384)).astype(np.float32)
+    vector = matrix[0]
+    while not stop.is_set():
+        started = time.perf_counter()
+        np.argpartition(matrix @ vector, -10)[-10:]
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+
+
+def run(pool, hashed, clients, logins):
+    """Return (logins/s, p95 login ms, rejected, p95 match probe ms)"""
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client():
+        barrier.wait()
+        for _ in range(logins):
+            started = time.perf_counter()
+            try:
+                pool.verify('correct horse battery staple', hashed)
+            except PoolSaturated:
+                with lock:
+                    rejected[0] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    stop = threading.Event()
+    probe_latencies = []
+    probe = threading.Thread(target=match_probe, args=(stop, probe_latencies))
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    probe.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe.join()
+
+    login_p95 = np.percentile(latencies, 95) if latencies else float('nan')
+    return len(latencies) / elapsed, login_p95, rejected[0], np.percentile(probe_latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent login clients')
+    parser.add_argument('--logins', type=int, default=8, help='Logins per client')
+    parser.add_argument('--rounds', type=int, default=10, help='bcrypt cost factor')
+    parser.add_argument('--sizes', default='1,2,4,8', help='Pool sizes to compare')
+    parser.add_argument('--max-queue', type=int, default=32)
+    parser.add_argument('--wait', type=float, default=5.0, help='Seconds a login waits for a pool slot')
+    args = parser.parse_args()
+
+    hashed = PasswordPool(rounds=args.rounds, workers=1).hash('correct horse battery staple')
+
+    print(f"📊 {args.clients} clients x {args.logins} logins, bcrypt cost {args.rounds}, {os.cpu_count()} CPU(s)")
+    print("=" * 72)
+    print(f"{'pool size':>9} | {'logins/s':>9} | {'p95 login ms':>12} | {'503s':>5} | {'p95 match probe ms':>18}")
+    print("-" * 72)
+    for size in [int(n) for n in args.sizes.split(',')]:
+        pool = PasswordPool(rounds=args.rounds, workers=size, max_queue=args.max_queue, wait=args.wait)
+        throughput, login_p95, rejected, probe_p95 = run(pool, hashed, args.clients, args.logins)
+        print(f"{size:>9} | {throughput:>9.1f} | {login_p95:>12.0f} | {rejected:>5} | {probe_p95:>18.1f}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
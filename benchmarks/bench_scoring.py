@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-pair sklearn cosine_similarity vs vectorized scoring
+Run with: python benchmarks/bench_scoring.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import cosine_scores, normalize, top_k
+
+DIM = 384
+TOP_K = 3
+SIZES = [1_000, 10_000, 100_000]
+
+
+def per_pair_ranking(user_vector, scholarship_vectors):
+    """The original get_matches loop: one sklearn call per scholarship, then a full sort"""
+    similarities = []
+    for index, vector in enumerate(scholarship_vectors):
+        similarities.append({
+            'index': index,
+            'similarity': cosine_similarity([user_vector], [vector])[0][0]
+        })
+    similarities.sort(key=lambda x: x['similarity'], reverse=True)
+    return [match['index'] for match in similarities[:TOP_K]]
+
+
+def vectorized_ranking(user_vector, scholarship_matrix):
+    """One matrix-vector product over pre-normalized rows plus argpartition"""
+    scores = cosine_scores(user_vector, scholarship_matrix)
+    return list(top_k(scores, TOP_K))
+
+
+def best_of(fn, repeat):
+    """Best wall time of `repeat` runs, in seconds"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    rng = np.random.default_rng(42)
+    user_vector = rng.standard_normal(DIM).astype(np.float32)
+
+    print("📊 Similarity scoring benchmark (top-%d of %d-dim vectors)" % (TOP_K, DIM))
+    print("=" * 64)
+    print(f"{'scholarships':>12} | {'per-pair (ms)':>14} | {'vectorized (ms)':>15} | {'speedup':>8}")
+    print("-" * 64)
+
+    for size in SIZES:
+        raw = rng.standard_normal((size, DIM)).astype(np.float32)
+        matrix = normalize(raw)
+
+        # The per-pair path is slow at 100k, so it only runs once there
+        per_pair_time, expected = best_of(lambda: per_pair_ranking(user_vector, raw), 1 if size >= 100_000 else 3)
+        vectorized_time, actual = best_of(lambda: vectorized_ranking(user_vector, matrix), 20)
+
+        assert actual == expected, f"ranking mismatch at {size}: {actual} != {expected}"
+        print(f"{size:>12,} | {per_pair_time * 1000:>14.1f} | {vectorized_time * 1000:>15.3f} | {per_pair_time / vectorized_time:>7.0f}x")
+
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker startup cost
+Measures `import app` time and memory in a fresh interpreter, the slowest
+imports (via -X importtime), and the cost of the first model load.
+Run with: python benchmarks/bench_startup.py [--json results.json]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+result = {
+    'import_seconds': imported - start,
+    'import_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}
+import embeddings
+result['model_loaded_at_import'] = embeddings.model_loaded()
+if LOAD_MODEL:
+    from embeddings import get_model
+    start = time.perf_counter()
+    get_model().encode('warm up')
+    result['model_load_seconds'] = time.perf_counter() - start
+    result['model_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+"""
+
+
+def probe_env():
+    """Environment for a child interpreter; dummy Supabase settings are enough to import"""
+    env = dict(os.environ)
+    env.setdefault('SUPABASE_URL', 'http://localhost:54321')
+    env.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+    env.pop('PRELOAD_MODEL', None)
+    return env
+
+
+def run_probe(load_model):
+    code = PROBE.replace('LOAD_MODEL', str(load_model))
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=probe_env(),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit=10):
+    """Modules imported directly by app, by cumulative import time in milliseconds"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=probe_env(),
+        capture_output=True, text=True, check=True
+    ).stderr
+    # importtime prints children before their parent, indented two spaces per level
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == 'app':
+                break
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    return sorted(children, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    print("⏱️  Worker startup benchmark")
+    print("=" * 50)
+
+    results = run_probe(load_model=False)
+    print(f"import app:        {results['import_seconds'] * 1000:8.0f} ms  ({results['import_rss_mb']:.0f} MB RSS)")
+    print(f"model loaded at import: {results['model_loaded_at_import']}")
+
+    try:
+        import sentence_transformers  # noqa: F401
+        with_model = run_probe(load_model=True)
+        results.update({k: v for k, v in with_model.items() if k.startswith('model_')})
+        print(f"first model load:  {results['model_load_seconds'] * 1000:8.0f} ms  ({results['model_rss_mb']:.0f} MB RSS)")
+    except ImportError:
+        print("⚠️  sentence_transformers not installed; skipping model load")
+
+    results['slowest_imports_ms'] = slowest_imports()
+    print("\nSlowest imports (cumulative ms):")
+    for package, ms in results['slowest_imports_ms']:
+        print(f"  {package:<24} {ms:8.1f}")
+    print("=" * 50)
+
+    if '--json' in sys.argv:
+        path = sys.argv[sys.argv.index('--json') + 1]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
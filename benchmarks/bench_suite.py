@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: eligibility filtering, embedding, scoring and /api/match
+on synthetic catalogs of several sizes, served from an in-memory Supabase
+stand-in (see synthetic.py). Needs pytest-benchmark.
+
+Run with: python benchmarks/bench_suite.py [pytest args...]
+Results are written to benchmarks/results/<commit>.json; compare two runs with
+    pytest-benchmark compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+BENCH_CATALOG_SIZES (default 1000,10000,50000) picks the catalog sizes. The
+model is only loaded for the embedding cases (skipped when it is not
+installed); the pipeline cases use a deterministic hashing encoder so they
+measure the code around the model, unless BENCH_REAL_MODEL=1.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    if __name__ == "__main__":
+        sys.exit("❌ pytest-benchmark is not installed: pip install pytest-benchmark")
+    pytest.skip('pytest-benchmark is not installed', allow_module_level=True)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# app.py reads these at import; nothing ever connects to them
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from eligibility import EligibilityIndex, filter_eligible_scholarships
+from embeddings import profile_text, scholarship_text
+from scoring import cosine_scores, normalize, top_k
+from synthetic import FakeSupabase, hashing_encode, make_profiles, make_scholarships, wire_app
+
+SIZES = [int(n) for n in os.getenv('BENCH_CATALOG_SIZES', '1000,10000,50000').split(',')]
+PROFILES = make_profiles(50, seed=1)
+
+
+@pytest.fixture(scope='module', params=SIZES, ids=lambda n: f'{n}')
+def catalog(request):
+    return [s for s in make_scholarships(request.param, seed=request.param) if s['is_active']]
+
+
+@pytest.fixture(scope='module')
+def model_encode():
+    """embeddings.encode with the configured model, or skip when it cannot be loaded"""
+    from embeddings import encode, get_model
+
+    try:
+        get_model()
+    except (ImportError, OSError) as e:
+        pytest.skip(f'embedding model unavailable: {e}')
+    return encode
+
+
+def pipeline_encode():
+    if os.getenv('BENCH_REAL_MODEL', '').lower() in ('1', 'true', 'yes'):
+        from embeddings import encode
+        return encode, 'model'
+    return hashing_encode, 'hashing'
+
+
+def test_filter_eligible_scholarships(benchmark, catalog):
+    profile = PROFILES[0]
+    benchmark.extra_info['catalog_size'] = len(catalog)
+    benchmark(filter_eligible_scholarships, profile, catalog)
+
+
+def test_eligibility_index_filter(benchmark, catalog):
+    index = EligibilityIndex(catalog)
+    profile = PROFILES[0]
+    benchmark.extra_info['catalog_size'] = len(catalog)
+    result = benchmark(index.filter, profile)
+    assert [s['id'] for s in result] == [s['id'] for s in filter_eligible_scholarships(profile, catalog)]
+
+
+def test_encode_profile(benchmark, model_encode):
+    benchmark(model_encode, profile_text(PROFILES[0]))
+
+
+def test_encode_scholarship_batch(benchmark, model_encode):
+    texts = [scholarship_text(s) for s in make_scholarships(256)]
+    benchmark.extra_info['batch'] = len(texts)
+    benchmark(model_encode, texts, batch_size=64)
+
+
+def test_cosine_top_k(benchmark, catalog):
+    rng = np.random.default_rng(0)
+    matrix = normalize(rng.standard_normal((len(catalog), 384)).astype(np.float32))
+    user_vector = rng.standard_normal(384).astype(np.float32)
+    benchmark.extra_info['catalog_size'] = len(catalog)
+    benchmark(lambda: top_k(cosine_scores(user_vector, matrix), 100))
+
+
+@pytest.fixture(scope='module')
+def match_app(catalog):
+    """app.py wired to FakeSupabase and a throwaway embedding store"""
+    import app
+
+    encode, encoder_name = pipeline_encode()
+    patch = pytest.MonkeyPatch()
+    with tempfile.TemporaryDirectory() as store_dir:
+        wire_app(patch.setattr, app, FakeSupabase(scholarships=catalog, users=PROFILES), encode, store_dir)
+
+        client = app.app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = PROFILES[0]['id']
+        yield app, client, encoder_name
+    patch.undo()
+
+
+def post_match(client):
+    response = client.post('/api/match', json={'limit': 10})
+    body = response.get_json()
+    assert body['success'], body
+    return body
+
+
+def test_api_match_uncached(benchmark, match_app, catalog):
+    """Full request with the ranking and profile embedding recomputed every round"""
+    app, client, encoder_name = match_app
+    benchmark.extra_info.update(catalog_size=len(catalog), encoder=encoder_name)
+
+    def clear_caches():
+        app.match_cache.invalidate(PROFILES[0]['id'])
+        app.user_embedding_cache.invalidate(PROFILES[0]['id'])
+
+    body = benchmark.pedantic(post_match, args=(client,), setup=clear_caches, rounds=30, warmup_rounds=2)
+    assert body['freshness'] == 'recomputed'
+
+
+def test_api_match_cached(benchmark, match_app, catalog):
+    """Full request served from the cached ranking"""
+    app, client, encoder_name = match_app
+    benchmark.extra_info.update(catalog_size=len(catalog), encoder=encoder_name)
+    post_match(client)
+    body = benchmark(post_match, client)
+    assert body['freshness'] == 'fresh'
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    results_dir = os.path.join(BENCH_DIR, 'results')
+    os.makedirs(results_dir, exist_ok=True)
+    output = os.path.join(results_dir, f'{git_revision()}.json')
+    code = pytest.main([__file__, '-q', f'--benchmark-json={output}', '--benchmark-sort=fullname'] + sys.argv[1:])
+    if os.path.exists(output):
+        print(f"💾 Results saved to {output}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
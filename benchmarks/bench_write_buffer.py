@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: feedback writes, one insert per vote vs the write-behind buffer
+Several client threads each send a stream of votes (a third of them repeat
+votes on a scholarship) against a stand-in database that takes --latency ms
+per round trip plus a little per row. Reports the time to acknowledge a vote,
+total wall time and round trips, for direct inserts and for the buffer with
+and without fsync.
+Run with: python benchmarks/bench_write_buffer.py [--votes 2000] [--clients 8] [--latency 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from write_buffer import WriteBehindBuffer
+
+KEYS = {'user_feedback': ('user_id', 'scholarship_id')}
+
+
+class SlowDatabase:
+    """Counts round trips and rows; each call sleeps like a remote write"""
+
+    def __init__(self, latency, per_row=0.00005):
+        self.latency = latency
+        self.per_row = per_row
+        self.round_trips = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def write(self, table, rows):
+        time.sleep(self.latency + self.per_row * len(rows))
+        with self._lock:
+            self.round_trips += 1
+            self.rows += len(rows)
+
+
+def make_votes(count, clients, seed=0):
+    rng = random.Random(seed)
+    per_client = []
+    for client in range(clients):
+        votes = []
+        for _ in range(count // clients):
+            # A third of the votes change or repeat one on a scholarship already voted on
+            scholarship = rng.randrange(max(1, len(votes))) if votes and rng.random() < 1 / 3 else len(votes)
+            votes.append({'user_id': f'u{client}', 'scholarship_id': f's{scholarship}',
+                          'feedback_type': rng.choice(('like', 'dislike'))})
+        per_client.append(votes)
+    return per_client
+
+
+def run(per_client, submit):
+    """Per-vote acknowledgement times (seconds) and wall time of all clients"""
+    times = []
+    lock = threading.Lock()
+
+    def client(votes):
+        local = []
+        for vote in votes:
+            started = time.perf_counter()
+            submit(vote)
+            local.append(time.perf_counter() - started)
+        with lock:
+            times.extend(local)
+
+    threads = [threading.Thread(target=client, args=(votes,)) for votes in per_client]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.asarray(times), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--votes', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=20, help='Database round trip, ms')
+    args = parser.parse_args()
+
+    per_client = make_votes(args.votes, args.clients)
+    print(f"📊 {args.votes} votes from {args.clients} clients, {args.latency:.0f} ms per database round trip")
+    print("=" * 84)
+    print(f"{'method':<20} | {'ack p50 ms':>10} | {'ack p99 ms':>10} | {'wall s':>7} | {'round trips':>11} | {'rows written':>12}")
+    print("-" * 84)
+
+    database = SlowDatabase(args.latency / 1000)
+    times, wall = run(per_client, lambda vote: database.write('user_feedback', [vote]))
+    print(f"{'direct insert':<20} | {np.percentile(times, 50) * 1000:>10.2f} | {np.percentile(times, 99) * 1000:>10.2f} | "
+          f"{wall:>7.2f} | {database.round_trips:>11,} | {database.rows:>12,}")
+
+    for name, fsync in (('buffer', False), ('buffer + fsync', True)):
+        database = SlowDatabase(args.latency / 1000)
+        with tempfile.TemporaryDirectory() as spool_dir:
+            buffer = WriteBehindBuffer(spool_dir, database.write, KEYS, fsync=fsync)
+            times, wall = run(per_client, lambda vote: buffer.submit('user_feedback', vote))
+            started = time.perf_counter()
+            buffer.flush()
+            wall += time.perf_counter() - started
+        print(f"{name:<20} | {np.percentile(times, 50) * 1000:>10.2f} | {np.percentile(times, 99) * 1000:>10.2f} | "
+              f"{wall:>7.2f} | {database.round_trips:>11,} | {database.rows:>12,}")
+    print("-" * 84)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Scholarship Matchmaker on synthetic data, for load tests
+Serves the real app against FakeSupabase (BENCH_DB_LATENCY_MS of simulated
+network latency per query) and the hashing encoder, so servers can be
+compared without a Supabase project or the model. Started by bench_async.py
+from inside benchmarks/:
+
+    gunicorn fake_server:app
+    uvicorn fake_server:application
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import app as web
+import asgi
+from synthetic import FakeSupabase, hashing_encode, make_profiles, make_scholarships, wire_app
+
+CATALOG_SIZE = int(os.getenv('BENCH_CATALOG_SIZE', 5000))
+USERS = int(os.getenv('BENCH_USERS', 500))
+DB_LATENCY = float(os.getenv('BENCH_DB_LATENCY_MS', 20)) / 1000
+
+store_dir = tempfile.mkdtemp(prefix='bench-store-')
+client = FakeSupabase(
+    latency=DB_LATENCY,
+    scholarships=make_scholarships(CATALOG_SIZE),
+    users=make_profiles(USERS, seed=1)
+)
+wire_app(setattr, web, client, hashing_encode, store_dir)
+
+app = web.app
+application = asgi.application
@@ -0,0 +1,229 @@
+"""
+Synthetic data and an in-memory Supabase stand-in for benchmarks
+Scholarships and profiles follow the columns in database_setup.sql and the
+choices offered by the profile form, and are reproducible for a given seed.
+FakeSupabase answers the postgrest query chains the app issues, so the whole
+/api/match path can be timed without a live project.
+"""
+
+import random
+import re
+import time
+import uuid
+import zlib
+from datetime import date, timedelta
+
+import numpy as np
+
+DIM = 384
+
+COUNTRIES = [
+    'United States', 'Canada', 'United Kingdom', 'Australia', 'Germany', 'France', 'Japan',
+    'South Korea', 'Singapore', 'Netherlands', 'Sweden', 'Switzerland', 'Norway', 'Denmark',
+    'Finland', 'New Zealand', 'Ireland', 'Belgium', 'Austria', 'Italy', 'Spain', 'Portugal'
+]
+EDUCATION_LEVELS = ['High School', 'Undergraduate', 'Graduate', 'PhD']
+FIELDS = [
+    'Computer Science', 'Engineering', 'Medicine', 'Business Administration', 'Arts and Humanities',
+    'Environmental Science', 'Technology', 'STEM', 'Mathematics', 'Physics', 'Chemistry', 'Biology',
+    'Psychology', 'Economics', 'Political Science', 'History', 'Law', 'Architecture', 'Nursing',
+    'Agriculture', 'Journalism', 'Finance', 'Education', 'Music'
+]
+FINANCIAL_NEED = ['High', 'Medium', 'Low']
+
+KINDS = ['Merit Scholarship', 'Research Fellowship', 'Innovation Grant', 'Leadership Award',
+         'Excellence Award', 'Access Bursary', 'Community Scholarship', 'Travel Grant']
+FOCUS = ['outstanding academic results', 'research potential', 'leadership and community service',
+         'students from underrepresented groups', 'first-generation university students',
+         'sustainability projects', 'entrepreneurial ideas', 'students with financial need']
+REQUIREMENTS = ['Strong academic record', 'Two letters of recommendation', 'Personal statement',
+                'Research proposal', 'Evidence of financial need', 'Portfolio of work',
+                'Community service record', 'Leadership experience']
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _maybe(rng, probability, value):
+    return value if rng.random() < probability else None
+
+
+def make_scholarships(n, seed=0, today=None):
+    """`n` scholarship rows; deadlines fall within the year after `today`"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    scholarships = []
+    for i in range(n):
+        field = rng.choice(FIELDS)
+        kind = rng.choice(KINDS)
+        focus = rng.choice(FOCUS)
+        min_age = _maybe(rng, 0.5, rng.randint(16, 22))
+        scholarships.append({
+            'id': _uuid(rng),
+            'name': f'{field} {kind} #{i}',
+            'description': f'A {kind.lower()} for {field.lower()} students, recognising {focus}.',
+            'amount': float(rng.randrange(500, 50000, 250)),
+            'currency': 'USD',
+            'deadline': (today + timedelta(days=rng.randint(1, 365))).isoformat(),
+            'requirements': ', '.join(rng.sample(REQUIREMENTS, 2)),
+            'field_of_study': field,
+            'country': 'International' if rng.random() < 0.6 else rng.choice(COUNTRIES),
+            'education_level': _maybe(rng, 0.8, rng.choice(EDUCATION_LEVELS)),
+            'min_gpa': _maybe(rng, 0.6, round(rng.uniform(2.5, 3.9), 2)),
+            'min_age': min_age,
+            'max_age': _maybe(rng, 0.5, (min_age or 16) + rng.randint(5, 15)),
+            'application_url': f'https://example.com/scholarships/{i}',
+            'is_active': rng.random() >= 0.05,
+            'created_at': '2024-01-01T00:00:00+00:00',
+            'updated_at': f'2024-01-01T00:00:{i % 60:02d}+00:00'
+        })
+    return scholarships
+
+
+def make_profiles(n, seed=0):
+    """`n` complete user rows, as saved by the profile form"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(n):
+        profiles.append({
+            'id': _uuid(rng),
+            'email': f'student{i}@example.com',
+            'password_hash': '',
+            'name': f'Student {i}',
+            'age': rng.randint(16, 35),
+            'country': rng.choice(COUNTRIES),
+            'education_level': rng.choice(EDUCATION_LEVELS),
+            'gpa': round(rng.uniform(2.0, 4.0), 2),
+            'field_of_study': rng.choice(FIELDS),
+            'financial_need': rng.choice(FINANCIAL_NEED),
+            'phone_number': f'+1555{i:07d}'
+        })
+    return profiles
+
+
+def hashing_encode(texts, batch_size=32):
+    """Deterministic bag-of-words vectors, for timing the pipeline without the model
+
+    Same call signature and output shape as embeddings.encode; similar texts
+    get similar vectors, so rankings are meaningful enough to exercise top-k.
+    """
+    single = isinstance(texts, str)
+    batch = [texts] if single else texts
+    vectors = np.zeros((len(batch), DIM), dtype=np.float32)
+    for row, text in enumerate(batch):
+        for token in re.findall(r'[a-z0-9]+', text.lower()):
+            h = zlib.crc32(token.encode('utf-8'))
+            vectors[row, h % DIM] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    return vectors[0] if single else vectors
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """The subset of the postgrest query builder the app uses"""
+
+    def __init__(self, client, table, columns, count):
+        self.client = client
+        self.columns = [c.strip() for c in columns.split(',')] if columns and columns != '*' else None
+        self.count = count
+        self.rows = client.tables.setdefault(table, [])
+
+    def _where(self, test):
+        self.rows = [r for r in self.rows if test(r)]
+        return self
+
+    def eq(self, column, value):
+        return self._where(lambda r: r.get(column) == value)
+
+    def gte(self, column, value):
+        return self._where(lambda r: r.get(column) is not None and r[column] >= value)
+
+    def lte(self, column, value):
+        return self._where(lambda r: r.get(column) is not None and r[column] <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._where(lambda r: r.get(column) in values)
+
+    def order(self, column, desc=False):
+        self.rows = sorted(self.rows, key=lambda r: r[column], reverse=desc)
+        return self
+
+    def limit(self, n):
+        self._window = (0, n)
+        return self
+
+    def range(self, start, end):
+        self._window = (start, end + 1)
+        return self
+
+    def execute(self):
+        self.client.round_trips += 1
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        matched = len(self.rows)
+        start, stop = getattr(self, '_window', (0, None))
+        rows = self.rows[start:stop]
+        if self.columns:
+            rows = [{c: r.get(c) for c in self.columns} for r in rows]
+        else:
+            rows = [dict(r) for r in rows]
+        return FakeResponse(rows, matched if self.count else None)
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def select(self, *columns, count=None):
+        return FakeQuery(self.client, self.name, ', '.join(columns), count)
+
+
+class FakeSupabase:
+    """In-memory stand-in for supabase.Client: table(name).select(...)...execute()
+
+    `latency` seconds are slept per query, like a network round trip.
+    """
+
+    def __init__(self, latency=0.0, **tables):
+        self.tables = {name: list(rows) for name, rows in tables.items()}
+        self.latency = latency
+        self.round_trips = 0
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+def wire_app(setattr, web, client, encode, store_dir):
+    """Point the app module `web` at `client` and `encode`, with a fresh store, index and caches
+
+    `setattr` is the builtin or a pytest monkeypatch's, so tests can undo it.
+    The catalog is loaded and encoded before returning, as in a warm worker.
+    """
+    from ann_index import make_index
+    from catalog import ScholarshipCatalog
+    from data_access import DataAccess
+    from embeddings import ScholarshipEmbeddingStore, UserEmbeddingCache
+    from feedback import FeedbackRanker
+    from lexical_index import BM25Index
+    from match_cache import MatchResultCache
+
+    setattr(web, 'encode', encode)
+    setattr(web, 'db', DataAccess(client))
+    setattr(web, 'embedding_store', ScholarshipEmbeddingStore(store_dir, encode=encode))
+    setattr(web, 'scholarship_index', make_index('exact'))
+    if web.lexical_index is not None:
+        setattr(web, 'lexical_index', BM25Index())
+    setattr(web, 'user_embedding_cache', UserEmbeddingCache())
+    setattr(web, 'match_cache', MatchResultCache())
+    setattr(web, 'feedback_ranker', FeedbackRanker())
+    setattr(web, 'scholarship_catalog', ScholarshipCatalog(client, ttl=3600, on_load=web.load_scholarship_vectors))
+    web.scholarship_catalog.snapshot()
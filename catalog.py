@@ -0,0 +1,255 @@
+"""
+In-process scholarship catalog cache for Scholarship Matchmaker
+Each worker keeps the active, unexpired scholarships in memory and only
+reloads them when the catalog version (row count + latest updated_at)
+changes; scholarships whose deadline has passed are dropped at each day
+boundary without a reload. Rows are kept as compact records without their
+long description and requirements text, which is read for the scholarships
+actually shown.
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+
+from eligibility import EligibilityIndex
+
+# Columns the matching pipeline and the match/apply responses actually use
+MATCH_COLUMNS = (
+    'id, name, description, amount, deadline, requirements, application_url, '
+    'field_of_study, country, education_level, min_gpa, min_age, max_age, updated_at'
+)
+
+# PostgREST caps responses at 1000 rows by default, so large catalogs are paged
+PAGE_SIZE = 1000
+
+# Sorts after every real deadline, so rows without one never expire
+NO_DEADLINE = '9999-12-31'
+
+# Display text left out of the in-memory records
+TEXT_COLUMNS = ('description', 'requirements')
+
+# Fields a record keeps, and the categorical ones shared across rows
+RECORD_FIELDS = (
+    'id', 'name', 'amount', 'deadline', 'application_url', 'field_of_study',
+    'country', 'education_level', 'min_gpa', 'min_age', 'max_age'
+)
+INTERNED_FIELDS = frozenset({'deadline', 'field_of_study', 'country', 'education_level'})
+
+
+def _deadline(scholarship):
+    return sys.intern(str(scholarship.get('deadline') or NO_DEADLINE)[:10])
+
+
+class ScholarshipRecord:
+    """One catalog row without its display text, read like the row dict
+
+    record['name'] and record.get('min_gpa') work as on the dict; fields
+    outside RECORD_FIELDS (description, requirements, ...) read as missing.
+    Categorical strings are interned, so each distinct value is stored once.
+    """
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, row):
+        for field in RECORD_FIELDS:
+            value = row.get(field)
+            if field in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"ScholarshipRecord(id={self.id!r}, name={self.name!r})"
+
+
+class CatalogSnapshot:
+    """Scholarships open on `today` at one catalog version, with derived lookups
+
+    Rows are kept in deadline order, so the ones that expire at a day
+    boundary are a prefix and expire() cuts them off with a binary search.
+    `version` is the catalog version plus the day, so rankings cached
+    against yesterday's snapshot are recomputed.
+
+    `scholarships` are row dicts or ScholarshipRecords. Row dicts are kept as
+    `rows` (open ones only) until release_rows(), for whatever needs their
+    full text at load time; `load_text` reads display text afterwards.
+    """
+
+    def __init__(self, scholarships, version, today=None, load_text=None):
+        self.day = (today or date.today()).isoformat()
+        scholarships = sorted(scholarships, key=_deadline)
+        self.deadlines = [_deadline(s) for s in scholarships]
+        start = bisect_left(self.deadlines, self.day)
+        scholarships = scholarships[start:]
+        self.deadlines = self.deadlines[start:]
+        self.rows = None if scholarships and isinstance(scholarships[0], ScholarshipRecord) else scholarships
+        self.scholarships = [s if isinstance(s, ScholarshipRecord) else ScholarshipRecord(s) for s in scholarships]
+        self.source_version = version
+        self.version = (version, self.day)
+        self.by_id = {str(s['id']): s for s in self.scholarships}
+        self.eligibility = EligibilityIndex(self.scholarships)
+        self._load_text = load_text
+
+    def __len__(self):
+        return len(self.scholarships)
+
+    def expire(self, today):
+        """Snapshot of the same catalog version without the scholarships closed before `today`"""
+        return CatalogSnapshot(self.scholarships, self.source_version, today, self._load_text)
+
+    def get(self, scholarship_id):
+        """Scholarship record by id, or None if it is not in the active catalog"""
+        return self.by_id.get(str(scholarship_id))
+
+    def release_rows(self):
+        """Drop the full row dicts once they have been indexed"""
+        self.rows = None
+
+    def texts(self, scholarship_ids):
+        """{id: {'description': ..., 'requirements': ...}} for scholarships about to be shown"""
+        if self.rows is not None:
+            wanted = {str(i) for i in scholarship_ids}
+            return {
+                str(row['id']): {column: row.get(column) for column in TEXT_COLUMNS}
+                for row in self.rows if str(row['id']) in wanted
+            }
+        if self._load_text is not None:
+            return self._load_text(scholarship_ids)
+        return {}
+
+
+class ScholarshipCatalog:
+    """TTL- and version-checked cache of the active scholarships table
+
+    After `ttl` seconds the next caller polls the catalog version with one
+    small query; the full table is only re-read when that version changed.
+    `on_load` is called with every new snapshot before it is published,
+    including the trimmed one made when the day changes; snapshot.rows holds
+    the full rows while it runs, and is None for a trimmed snapshot. Display
+    text for up to `text_cache_size` scholarships is cached.
+    """
+
+    def __init__(self, client, ttl=60, on_load=None, columns=MATCH_COLUMNS, today=date.today, text_cache_size=5000):
+        self.client = client
+        self.ttl = ttl
+        self.columns = columns
+        self.text_cache_size = text_cache_size
+        self._today = today
+        self._on_load = on_load
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = float('-inf')
+        self._text_lock = threading.Lock()
+        self._texts = OrderedDict()
+
+    def _active(self, *columns, **kwargs):
+        return self.client.table('scholarships').select(*columns, **kwargs).eq('is_active', True)
+
+    def fetch_version(self):
+        """(active row count, latest updated_at) — changes on insert, update or delete
+
+        Expired rows are counted too, so the version does not move at midnight.
+        """
+        response = self._active('updated_at', count='exact').order('updated_at', desc=True).limit(1).execute()
+        latest = response.data[0]['updated_at'] if response.data else None
+        return (response.count, latest)
+
+    def fetch_scholarships(self, today):
+        """Read every active scholarship still open on `today`, one page at a time"""
+        scholarships = []
+        while True:
+            start = len(scholarships)
+            response = (
+                self._active(self.columns).gte('deadline', today.isoformat())
+                .order('id').range(start, start + PAGE_SIZE - 1).execute()
+            )
+            scholarships.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                return scholarships
+
+    def _current(self, today):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.day == today.isoformat() and time.monotonic() - self._checked_at < self.ttl:
+            return snapshot
+        return None
+
+    def _publish(self, snapshot):
+        if self._on_load:
+            self._on_load(snapshot)
+        snapshot.release_rows()
+        if self._snapshot is not None and self._snapshot.source_version != snapshot.source_version:
+            with self._text_lock:
+                self._texts.clear()
+        self._snapshot = snapshot
+
+    def snapshot(self):
+        """Current catalog snapshot, refreshed if the TTL expired and the version moved
+
+        On a new day the scholarships that closed are dropped from the
+        existing snapshot; no rows are re-read for that.
+        """
+        today = self._today()
+        snapshot = self._current(today)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            snapshot = self._current(today)
+            if snapshot is not None:
+                return snapshot
+
+            if time.monotonic() - self._checked_at >= self.ttl:
+                version = self.fetch_version()
+                if self._snapshot is None or version != self._snapshot.source_version:
+                    self._publish(CatalogSnapshot(self.fetch_scholarships(today), version, today, self.texts))
+                self._checked_at = time.monotonic()
+            if self._snapshot.day != today.isoformat():
+                self._publish(self._snapshot.expire(today))
+            return self._snapshot
+
+    def get(self, scholarship_id):
+        """O(1) lookup of an active scholarship by id"""
+        return self.snapshot().get(scholarship_id)
+
+    def texts(self, scholarship_ids):
+        """Display text by id; scholarships not cached yet are read in one query
+
+        The cache is emptied whenever a new catalog version is loaded.
+        """
+        scholarship_ids = list(dict.fromkeys(str(i) for i in scholarship_ids))
+        with self._text_lock:
+            found = {}
+            for scholarship_id in scholarship_ids:
+                text = self._texts.get(scholarship_id)
+                if text is not None:
+                    self._texts.move_to_end(scholarship_id)
+                    found[scholarship_id] = text
+        missing = [i for i in scholarship_ids if i not in found]
+        if not missing:
+            return found
+
+        response = self.client.table('scholarships').select('id, ' + ', '.join(TEXT_COLUMNS)).in_('id', missing).execute()
+        with self._text_lock:
+            for row in response.data:
+                text = {column: row.get(column) for column in TEXT_COLUMNS}
+                found[str(row['id'])] = self._texts[str(row['id'])] = text
+            while len(self._texts) > self.text_cache_size:
+                self._texts.popitem(last=False)
+        return found
+
+    def invalidate(self):
+        """Force a version check on the next access"""
+        self._checked_at = float('-inf')
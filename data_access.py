@@ -0,0 +1,158 @@
+"""
+Data access layer for Scholarship Matchmaker
+Wraps the Supabase client so each handler reads only the columns it needs and
+dependent lookups are folded into as few round trips as possible
+"""
+
+import httpx
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+# Columns each handler needs from the users table
+USER_LOGIN_COLUMNS = 'id, password_hash'
+USER_MATCH_COLUMNS = 'id, age, country, education_level, gpa, field_of_study, financial_need, feedback_version'
+
+# Postgres unique_violation, and PostgREST's "function not found"
+UNIQUE_VIOLATION = '23505'
+FUNCTION_NOT_FOUND = 'PGRST202'
+UNDEFINED_COLUMN = '42703'
+
+
+def make_client(url, key, on_request=None, max_connections=20, keepalive_expiry=60, timeout=30):
+    """Supabase client on one keep-alive connection pool
+
+    `on_request` is called before every HTTP request the client sends, which
+    is how the app counts database round trips per request.
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=timeout
+    )
+    try:
+        from supabase import ClientOptions
+
+        client = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+    except (ImportError, TypeError):  # older supabase builds its own pool
+        http_client.close()
+        client = create_client(url, key)
+
+    if on_request is not None:
+        session = client.postgrest.session
+        hooks = session.event_hooks
+        hooks['request'].append(lambda request: on_request())
+        session.event_hooks = hooks
+    return client
+
+
+class DataAccess:
+    """Queries used by the web handlers, one method per handler need"""
+
+    def __init__(self, client):
+        self.client = client
+        self._match_columns = USER_MATCH_COLUMNS
+
+    def _users(self, columns):
+        return self.client.table('users').select(columns)
+
+    def get_login_user(self, email):
+        """id and password hash for an email, or None"""
+        response = self._users(USER_LOGIN_COLUMNS).eq('email', email).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def get_match_profile(self, user_id):
+        """The profile fields matching needs, or None
+
+        Includes feedback_version, which database_setup.sql bumps on every
+        change to the user's feedback; databases without the column are read
+        without it from then on.
+        """
+        try:
+            response = self._users(self._match_columns).eq('id', user_id).limit(1).execute()
+        except APIError as e:
+            if e.code != UNDEFINED_COLUMN or self._match_columns != USER_MATCH_COLUMNS:
+                raise
+            self._match_columns = USER_MATCH_COLUMNS.replace(', feedback_version', '')
+            return self.get_match_profile(user_id)
+        return response.data[0] if response.data else None
+
+    def create_user(self, email, password_hash, name, created_at):
+        """Insert a user; returns the new row, or None if the email is taken
+
+        The unique constraint on email does the existence check, so signup is
+        one round trip instead of a select followed by an insert.
+        """
+        try:
+            response = self.client.table('users').insert({
+                'email': email,
+                'password_hash': password_hash,
+                'name': name,
+                'created_at': created_at
+            }).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                return None
+            raise
+        return response.data[0]
+
+    def update_password_hash(self, user_id, password_hash):
+        self.client.table('users').update({'password_hash': password_hash}).eq('id', user_id).execute()
+
+    def update_profile(self, user_id, fields):
+        """Update a user's profile; returns the updated row, or None"""
+        response = self.client.table('users').update(fields).eq('id', user_id).execute()
+        return response.data[0] if response.data else None
+
+    def get_feedback(self, user_id):
+        """A user's like/dislike rows"""
+        response = self.client.table('user_feedback').select('scholarship_id, feedback_type').eq('user_id', user_id).execute()
+        return response.data
+
+    def upsert_rows(self, table, rows, on_conflict='user_id,scholarship_id', ignore_duplicates=False):
+        """Write many rows in one round trip
+
+        Rows colliding with `on_conflict` update the stored row, or are skipped
+        when `ignore_duplicates` is set.
+        """
+        self.client.table(table).upsert(rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates).execute()
+
+    def apply(self, user_id, scholarship_id, applied_at, lookup_scholarship=None):
+        """Record an application; returns {'user_name', 'user_phone', 'scholarship_name'}, or None if already applied
+
+        Uses the apply_for_scholarship function from database_setup.sql (one
+        round trip). Databases without it fall back to separate queries, with
+        `lookup_scholarship` (e.g. the catalog cache) tried before the table.
+        """
+        try:
+            response = self.client.rpc('apply_for_scholarship', {
+                'p_user_id': user_id,
+                'p_scholarship_id': scholarship_id
+            }).execute()
+            return response.data[0] if response.data else None
+        except APIError as e:
+            # Databases with the older function still raise on a repeat application
+            if e.code == UNIQUE_VIOLATION:
+                return None
+            if e.code != FUNCTION_NOT_FOUND:
+                raise
+
+        try:
+            self.client.table('applications').insert({
+                'user_id': user_id,
+                'scholarship_id': scholarship_id,
+                'status': 'applied',
+                'applied_at': applied_at
+            }).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                return None
+            raise
+        user = self._users('name, phone_number').eq('id', user_id).execute().data[0]
+        scholarship = lookup_scholarship(scholarship_id) if lookup_scholarship else None
+        if scholarship is None:
+            scholarship = self.client.table('scholarships').select('name').eq('id', scholarship_id).execute().data[0]
+        scholarship_name = scholarship['name']
+        return {'user_name': user['name'], 'user_phone': user['phone_number'], 'scholarship_name': scholarship_name}
@@ -52,6 +52,49 @@ CREATE TABLE IF NOT EXISTS user_feedback (
     UNIQUE(user_id, scholarship_id)
 );
 
+-- Bumped on every change to a user's feedback; web workers read it with the
+-- profile and reload the user's feedback (and ranking) when it moves
+ALTER TABLE users ADD COLUMN IF NOT EXISTS feedback_version INTEGER NOT NULL DEFAULT 0;
+
+-- Statement-level, so a batched upsert of many votes bumps each user once
+-- rather than once per row (an upsert that both inserts and updates a
+-- user's rows fires the INSERT and the UPDATE trigger, bumping twice)
+CREATE OR REPLACE FUNCTION bump_feedback_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET feedback_version = feedback_version + 1
+        WHERE id IN (SELECT user_id FROM new_feedback);
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE users SET feedback_version = feedback_version + 1
+        WHERE id IN (SELECT user_id FROM new_feedback UNION SELECT user_id FROM old_feedback);
+    ELSE
+        UPDATE users SET feedback_version = feedback_version + 1
+        WHERE id IN (SELECT user_id FROM old_feedback);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Transition tables need one trigger per event
+DROP TRIGGER IF EXISTS user_feedback_version ON user_feedback;
+DROP TRIGGER IF EXISTS user_feedback_version_insert ON user_feedback;
+DROP TRIGGER IF EXISTS user_feedback_version_update ON user_feedback;
+DROP TRIGGER IF EXISTS user_feedback_version_delete ON user_feedback;
+CREATE TRIGGER user_feedback_version_insert
+    AFTER INSERT ON user_feedback
+    REFERENCING NEW TABLE AS new_feedback
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_feedback_version();
+CREATE TRIGGER user_feedback_version_update
+    AFTER UPDATE ON user_feedback
+    REFERENCING OLD TABLE AS old_feedback NEW TABLE AS new_feedback
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_feedback_version();
+CREATE TRIGGER user_feedback_version_delete
+    AFTER DELETE ON user_feedback
+    REFERENCING OLD TABLE AS old_feedback
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_feedback_version();
+
 -- Applications table
 CREATE TABLE IF NOT EXISTS applications (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -99,6 +142,27 @@ CREATE POLICY "Users can create their own applications" ON applications
 CREATE POLICY "Users can update their own applications" ON applications
     FOR UPDATE USING (auth.uid()::text = user_id::text);
 
+-- Apply for a scholarship in one round trip: records the application and
+-- returns what the confirmation SMS needs, or no row if the user had
+-- already applied
+CREATE OR REPLACE FUNCTION apply_for_scholarship(p_user_id UUID, p_scholarship_id UUID)
+RETURNS TABLE (user_name VARCHAR, user_phone VARCHAR, scholarship_name VARCHAR)
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO applications (user_id, scholarship_id, status, applied_at)
+    VALUES (p_user_id, p_scholarship_id, 'applied', NOW())
+    ON CONFLICT (user_id, scholarship_id) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT u.name, u.phone_number, s.name
+    FROM users u, scholarships s
+    WHERE u.id = p_user_id AND s.id = p_scholarship_id;
+END;
+$$;
+
 -- Sample data for scholarships
 INSERT INTO scholarships (name, description, amount, currency, deadline, requirements, field_of_study, country, education_level, min_gpa, min_age, max_age, application_url) VALUES
 (
@@ -272,8 +336,11 @@ END;
 $$ language 'plpgsql';
 
 -- Create triggers for updated_at
+-- A feedback_version bump is not a profile edit, so it leaves updated_at alone
+DROP TRIGGER IF EXISTS update_users_updated_at ON users;
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    FOR EACH ROW WHEN (OLD.feedback_version IS NOT DISTINCT FROM NEW.feedback_version)
+    EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_scholarships_updated_at BEFORE UPDATE ON scholarships
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,172 @@
+"""
+Rule-based eligibility filtering for Scholarship Matchmaker
+filter_eligible_scholarships is the reference implementation; EligibilityIndex
+compiles the same rules into columns so a profile is filtered with a few masks
+"""
+
+import numpy as np
+
+
+def filter_eligible_scholarships(user_profile, scholarships):
+    """Apply rule-based filtering"""
+    eligible = []
+
+    for scholarship in scholarships:
+        # Basic eligibility checks with proper null handling
+        if scholarship.get('min_gpa') is not None and user_profile.get('gpa') is not None:
+            if user_profile['gpa'] < scholarship['min_gpa']:
+                continue
+
+        if scholarship.get('min_age') is not None and user_profile.get('age') is not None:
+            if user_profile['age'] < scholarship['min_age']:
+                continue
+
+        if scholarship.get('max_age') is not None and user_profile.get('age') is not None:
+            if user_profile['age'] > scholarship['max_age']:
+                continue
+
+        # Country matching (if scholarship is country-specific)
+        if scholarship.get('country') and scholarship['country'] != 'International':
+            if user_profile.get('country') != scholarship['country']:
+                continue
+
+        # Education level matching
+        if scholarship.get('education_level') and user_profile.get('education_level'):
+            if scholarship['education_level'] != user_profile['education_level']:
+                continue
+
+        # Field of study matching (partial match)
+        if scholarship.get('field_of_study') and user_profile.get('field_of_study'):
+            user_field = user_profile['field_of_study'].lower()
+            scholarship_field = scholarship['field_of_study'].lower()
+            if not any(field in user_field for field in scholarship_field.split()) and not any(field in scholarship_field for field in user_field.split()):
+                continue
+
+        eligible.append(scholarship)
+
+    return eligible
+
+
+def _numeric_column(scholarships, key):
+    """Float column with NaN where the scholarship has no limit"""
+    return np.array(
+        [np.nan if s.get(key) is None else float(s[key]) for s in scholarships],
+        dtype=np.float64
+    )
+
+
+def _inverted_list(values):
+    """Map each distinct value to the array of rows holding it"""
+    rows = {}
+    for row, value in enumerate(values):
+        rows.setdefault(value, []).append(row)
+    return {value: np.array(r, dtype=np.intp) for value, r in rows.items()}
+
+
+class EligibilityIndex:
+    """Eligibility rules compiled once over a list of scholarships
+
+    Numeric limits live in NumPy columns, and country, education level and
+    field-of-study tokens in inverted lists, so filter() gives exactly the
+    result of filter_eligible_scholarships without a per-row Python loop.
+    """
+
+    def __init__(self, scholarships):
+        self.scholarships = list(scholarships)
+        n = len(self.scholarships)
+
+        self.min_gpa = _numeric_column(self.scholarships, 'min_gpa')
+        self.min_age = _numeric_column(self.scholarships, 'min_age')
+        self.max_age = _numeric_column(self.scholarships, 'max_age')
+
+        # Rows restricted to a single country; 'International' and blank are open
+        countries = [s.get('country') for s in self.scholarships]
+        self.country_restricted = np.array(
+            [bool(c) and c != 'International' for c in countries], dtype=bool
+        )
+        self.country_rows = _inverted_list(
+            c if restricted else None for c, restricted in zip(countries, self.country_restricted)
+        )
+        self.country_rows.pop(None, None)
+
+        levels = [s.get('education_level') or None for s in self.scholarships]
+        self.education_restricted = np.array([level is not None for level in levels], dtype=bool)
+        self.education_rows = _inverted_list(levels)
+        self.education_rows.pop(None, None)
+
+        # Field of study: distinct lowercased strings and their whitespace tokens
+        fields = [s['field_of_study'].lower() if s.get('field_of_study') else None
+                  for s in self.scholarships]
+        self.field_restricted = np.array([field is not None for field in fields], dtype=bool)
+        self.field_rows = _inverted_list(fields)
+        self.field_rows.pop(None, None)
+        token_rows = {}
+        for field, rows in self.field_rows.items():
+            for token in set(field.split()):
+                token_rows.setdefault(token, []).append(rows)
+        self.token_rows = {token: np.concatenate(r) for token, r in token_rows.items()}
+
+        self._all = np.ones(n, dtype=bool)
+
+    def __len__(self):
+        return len(self.scholarships)
+
+    def _rows_mask(self, row_arrays):
+        mask = np.zeros(len(self.scholarships), dtype=bool)
+        for rows in row_arrays:
+            mask[rows] = True
+        return mask
+
+    def mask(self, user_profile):
+        """Boolean mask of scholarships the profile is eligible for"""
+        mask = self._all.copy()
+
+        gpa = user_profile.get('gpa')
+        if gpa is not None:
+            # NaN limits compare False, matching "no limit"
+            mask &= ~(gpa < self.min_gpa)
+
+        age = user_profile.get('age')
+        if age is not None:
+            mask &= ~(age < self.min_age)
+            mask &= ~(age > self.max_age)
+
+        country_ok = ~self.country_restricted
+        rows = self.country_rows.get(user_profile.get('country'))
+        if rows is not None:
+            country_ok[rows] = True
+        mask &= country_ok
+
+        level = user_profile.get('education_level')
+        if level:
+            education_ok = ~self.education_restricted
+            rows = self.education_rows.get(level)
+            if rows is not None:
+                education_ok[rows] = True
+            mask &= education_ok
+
+        user_field = user_profile.get('field_of_study')
+        if user_field:
+            user_field = user_field.lower()
+            user_tokens = user_field.split()
+            # A scholarship token appearing in the user's field, or a user
+            # token appearing in the scholarship's field, is a partial match
+            field_ok = ~self.field_restricted
+            field_ok |= self._rows_mask(
+                rows for token, rows in self.token_rows.items() if token in user_field
+            )
+            field_ok |= self._rows_mask(
+                rows for field, rows in self.field_rows.items()
+                if any(token in field for token in user_tokens)
+            )
+            mask &= field_ok
+
+        return mask
+
+    def rows(self, user_profile):
+        """Row numbers of eligible scholarships, in catalog order"""
+        return np.flatnonzero(self.mask(user_profile))
+
+    def filter(self, user_profile):
+        """Eligible scholarship dicts, in catalog order"""
+        return [self.scholarships[row] for row in self.rows(user_profile)]
@@ -0,0 +1,129 @@
+"""
+Inference backends for the embedding model
+Every backend exposes encode(texts, batch_size) with the SentenceTransformer
+contract: a string gives a 1-D vector, a list of strings a 2-D float32 array.
+
+    torch       sentence-transformers on PyTorch, float32 (default)
+    torch-int8  the same model with Linear layers dynamically quantized to int8
+    onnx        the transformer exported to ONNX and run with ONNX Runtime
+"""
+
+import os
+
+import numpy as np
+
+# all-MiniLM-L6-v2 truncates inputs to 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class TorchBackend:
+    """Plain sentence-transformers model"""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size=32):
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """sentence-transformers model with int8 dynamically quantized Linear layers"""
+
+    def __init__(self, model_name):
+        import torch
+
+        super().__init__(model_name)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model_name, path):
+    """Export the model's transformer to ONNX with dynamic batch and sequence axes"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    inputs = tokenizer(['export'], return_tensors='pt')
+    names = ['input_ids', 'attention_mask', 'token_type_ids']
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(inputs[name] for name in names),
+            path,
+            input_names=names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+
+class OnnxBackend:
+    """Transformer run by ONNX Runtime, followed by the model's mean pooling and L2 norm"""
+
+    def __init__(self, model_name, onnx_path=None):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        onnx_path = onnx_path or os.getenv('ONNX_MODEL_PATH') or os.path.join('models', model_name.replace('/', '__') + '.onnx')
+        if not os.path.exists(onnx_path):
+            export_onnx(model_name, onnx_path)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors='np'
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        hidden = self.session.run(None, feeds)[0]
+
+        mask = tokens['attention_mask'][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts, batch_size=32):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Sorting by length keeps padding per batch small
+        order = np.argsort([len(text) for text in texts])
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self._encode_batch([texts[i] for i in batch]).astype(np.float32)
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            vectors[batch] = encoded
+        return vectors[0] if single else vectors
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'torch-int8': QuantizedTorchBackend,
+    'onnx': OnnxBackend
+}
+
+
+def make_backend(name, model_name):
+    """Create an inference backend by name"""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend: {name} (choose from {', '.join(BACKENDS)})")
+    return backend(model_name)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Scholarship Matchmaker - Embedding Service
+Runs the embedding model in one process and serves encode requests over HTTP.
+Concurrent requests are coalesced into micro-batches so the model sees a few
+large matrix multiplications instead of many single-sentence ones.
+
+    python embedding_service.py --port 8765
+
+Point the web app at it with EMBEDDING_SERVICE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class MicroBatcher:
+    """Collects encode requests and runs them through `encode_batch` together
+
+    A batch is dispatched as soon as it holds `max_batch_size` texts or the
+    oldest request has waited `max_wait_ms`, whichever comes first.
+    """
+
+    def __init__(self, encode_batch, max_batch_size=64, max_wait_ms=5):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """Queue texts for encoding; the Future resolves to a (len(texts), dim) array"""
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts, timeout=None):
+        return self.submit(texts).result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        texts = [text for item_texts, _ in batch for text in item_texts]
+        try:
+            vectors = np.asarray(self.encode_batch(texts), dtype=np.float32)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(texts)
+        start = 0
+        for item_texts, future in batch:
+            future.set_result(vectors[start:start + len(item_texts)])
+            start += len(item_texts)
+
+
+def make_handler(batcher):
+    """HTTP handler bound to a batcher
+
+    POST /encode takes {"texts": [...]} and answers with raw float32 bytes;
+    the X-Shape header carries the matrix shape.
+    """
+
+    class EmbeddingHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path != '/health':
+                self.send_error(404)
+                return
+            body = json.dumps({'status': 'ok', 'batches': batcher.batches, 'texts': batcher.texts}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != '/encode':
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                texts = json.loads(self.rfile.read(length))['texts']
+                vectors = batcher.encode(texts)
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+
+            body = np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('X-Shape', f"{vectors.shape[0]},{vectors.shape[1]}")
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return EmbeddingHandler
+
+
+class EmbeddingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many web workers connect at once; the socketserver default backlog is 5
+    request_queue_size = 128
+
+
+def make_server(host, port, batcher):
+    return EmbeddingServer((host, port), make_handler(batcher))
+
+
+class EmbeddingServiceClient:
+    """Client for the embedding service with a keep-alive connection pool"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def encode(self, texts, batch_size=None):
+        """Same contract as model.encode: a string gives a vector, a list a matrix"""
+        single = isinstance(texts, str)
+        response = self._session.post(
+            f"{self.url}/encode",
+            json={'texts': [texts] if single else list(texts)},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        shape = tuple(int(n) for n in response.headers['X-Shape'].split(','))
+        vectors = np.frombuffer(response.content, dtype=np.float32).reshape(shape)
+        return vectors[0] if single else vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve batched sentence embeddings over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=64, help='Largest micro-batch in texts')
+    parser.add_argument('--max-wait-ms', type=float, default=5, help='Longest a request waits for a batch to fill')
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from embeddings import get_model
+
+    load_dotenv()
+    print("📥 Loading embedding model...")
+    model = get_model()
+    batcher = MicroBatcher(
+        lambda texts: model.encode(texts, batch_size=args.max_batch),
+        max_batch_size=args.max_batch,
+        max_wait_ms=args.max_wait_ms
+    )
+    server = make_server(args.host, args.port, batcher)
+    print(f"🚀 Embedding service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping embedding service")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""
+Embedding helpers for Scholarship Matchmaker
+Builds the text fed to the model and keeps scholarship vectors on disk
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is skipped
+    fcntl = None
+
+import numpy as np
+
+from metrics import encode_calls, encode_seconds, encoded_texts
+from scoring import normalize
+
+# Sentence-transformers model used unless MODEL_NAME is set
+DEFAULT_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Bump when the on-disk layout or vector format changes
+STORE_VERSION = 4
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Load the embedding model on first use
+
+    EMBEDDING_BACKEND picks the inference backend (see embedding_backends.py).
+    torch and transformers are only imported here, so requests that never
+    embed anything (login, signup, profile pages) never pay for them.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from embedding_backends import make_backend
+
+                _model = make_backend(
+                    os.getenv('EMBEDDING_BACKEND', 'torch'),
+                    os.getenv('MODEL_NAME', DEFAULT_MODEL_NAME)
+                )
+    return _model
+
+
+def model_loaded():
+    """Whether get_model() has already loaded the model in this process"""
+    return _model is not None
+
+
+_service_client = None
+
+
+def encode(texts, batch_size=32):
+    """Encode a string or a list of strings
+
+    With EMBEDDING_SERVICE_URL set, texts are sent to the embedding service
+    (see embedding_service.py) instead of running the model in this process.
+    """
+    global _service_client
+    service_url = os.getenv('EMBEDDING_SERVICE_URL')
+    backend = 'service' if service_url else os.getenv('EMBEDDING_BACKEND', 'torch')
+    encode_calls.inc(backend=backend)
+    encoded_texts.inc(1 if isinstance(texts, str) else len(texts), backend=backend)
+    with encode_seconds.time(backend=backend):
+        if service_url:
+            if _service_client is None:
+                from embedding_service import EmbeddingServiceClient
+
+                _service_client = EmbeddingServiceClient(service_url)
+            return _service_client.encode(texts, batch_size=batch_size)
+        return get_model().encode(texts, batch_size=batch_size)
+
+
+def scholarship_text(scholarship):
+    """Build the text used to embed a scholarship"""
+    return f"Name: {scholarship['name']}, Description: {scholarship['description']}, Requirements: {scholarship['requirements']}, Field: {scholarship['field_of_study']}, Country: {scholarship['country']}"
+
+
+# Profile fields profile_text() uses; all must be filled in before matching
+MATCH_PROFILE_FIELDS = ['age', 'country', 'education_level', 'gpa', 'field_of_study', 'financial_need']
+
+
+def missing_profile_fields(profile):
+    """Required profile fields that are None or blank; 0 and False are valid values"""
+    return [
+        field for field in MATCH_PROFILE_FIELDS
+        if profile.get(field) is None or (isinstance(profile.get(field), str) and profile.get(field).strip() == '')
+    ]
+
+
+def profile_text(profile):
+    """Build the text used to embed a user profile"""
+    return f"Age: {profile['age']}, Country: {profile['country']}, Education: {profile['education_level']}, GPA: {profile['gpa']}, Field: {profile['field_of_study']}, Financial Need: {profile['financial_need']}"
+
+
+def model_id():
+    """Backend and model the vectors of this process come from, e.g. 'torch:sentence-transformers/all-MiniLM-L6-v2'
+
+    With EMBEDDING_SERVICE_URL set, the service is expected to run with the
+    same EMBEDDING_BACKEND and MODEL_NAME.
+    """
+    return f"{os.getenv('EMBEDDING_BACKEND', 'torch')}:{os.getenv('MODEL_NAME', DEFAULT_MODEL_NAME)}"
+
+
+def content_hash(text):
+    """Stable hash of the text an embedding was built from"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class ScholarshipEmbeddingStore:
+    """Scholarship vectors kept as a memory-mapped .npy matrix plus an id index
+
+    Each row is keyed by scholarship id and the content hash of its embedding
+    text, so a scholarship is only re-encoded when the fields that feed the
+    embedding change. Rows are stored L2-normalized so cosine similarity is a
+    plain dot product.
+
+    The index is an append-only log of ``id<TAB>hash<TAB>row`` lines (the last
+    line for an id wins), and new vectors are appended to the matrix in place,
+    so writing a chunk costs the size of the chunk rather than of the store.
+    Its header names the model the vectors came from (`model`, default
+    model_id()); a store written by another model or backend is ignored and
+    rebuilt on the next sync.
+    """
+
+    def __init__(self, directory, encode=None, batch_size=64, model=None):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.model = model or model_id()
+        self._encode = encode
+        self._vectors_path = os.path.join(directory, 'vectors.npy')
+        self._index_path = os.path.join(directory, 'index.tsv')
+        self._lock_path = os.path.join(directory, '.lock')
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._hashes = {}
+        self._vectors = None
+        self._index_stamp_seen = None
+        self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, scholarship_id):
+        return str(scholarship_id) in self._rows
+
+    def ids(self):
+        """All stored scholarship ids, in row order"""
+        return sorted(self._rows, key=self._rows.get)
+
+    def _index_stamp(self):
+        """Changes whenever the index file is appended to or replaced"""
+        try:
+            stat = os.stat(self._index_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self):
+        """Replay the id index and map the vector matrix from disk"""
+        self._index_stamp_seen = self._index_stamp()
+        if self._index_stamp_seen is None or not os.path.exists(self._vectors_path):
+            self._rows, self._hashes, self._vectors = {}, {}, None
+            return
+
+        rows, hashes = {}, {}
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            if f.readline().rstrip('\n') != self._header():
+                # Written by an older layout or another model; everything is re-encoded on next sync
+                self._rows, self._hashes, self._vectors = {}, {}, None
+                return
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 3:
+                    # Torn final line from an interrupted write
+                    continue
+                scholarship_id, digest, row = parts
+                rows[scholarship_id] = int(row)
+                hashes[scholarship_id] = digest
+
+        vectors = np.load(self._vectors_path, mmap_mode='r')
+        rows = {i: row for i, row in rows.items() if row < len(vectors)}
+        # Vectors first: concurrent lookups may pair old ids with the new matrix, never the reverse
+        self._vectors = vectors
+        self._hashes = {i: hashes[i] for i in rows}
+        self._rows = rows
+
+    def _header(self):
+        return f"version\t{STORE_VERSION}\tmodel\t{self.model}"
+
+    def _reload_if_changed(self):
+        """Pick up rows written by another worker sharing the same directory"""
+        if self._index_stamp() != self._index_stamp_seen:
+            self._load()
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize writers across threads and, where supported, processes"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._reload_if_changed()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stale(self, scholarships):
+        """Return (id, hash, text) for scholarships missing or outdated in the store"""
+        stale = []
+        for scholarship in scholarships:
+            text = scholarship_text(scholarship)
+            digest = content_hash(text)
+            scholarship_id = str(scholarship['id'])
+            if self._hashes.get(scholarship_id) != digest:
+                stale.append((scholarship_id, digest, text))
+        return stale
+
+    def sync(self, scholarships):
+        """Encode new or changed scholarships, persist them and return their ids"""
+        with self._exclusive():
+            stale = self.stale(scholarships)
+            if not stale:
+                return []
+
+            texts = [text for _, _, text in stale]
+            vectors = self._encode(texts, batch_size=self.batch_size)
+            self._put(
+                [scholarship_id for scholarship_id, _, _ in stale],
+                [digest for _, digest, _ in stale],
+                vectors
+            )
+            return [scholarship_id for scholarship_id, _, _ in stale]
+
+    def put(self, scholarship_ids, hashes, vectors):
+        """Store precomputed vectors, overwriting rows that already exist"""
+        with self._exclusive():
+            self._put([str(i) for i in scholarship_ids], list(hashes), vectors)
+
+    def _put(self, scholarship_ids, hashes, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        vectors = normalize(vectors)
+
+        if self._vectors is None or self._vectors.shape[1] != vectors.shape[1]:
+            self._rewrite(scholarship_ids, hashes, vectors)
+            self._load()
+            return
+
+        next_row = len(self._vectors)
+        entries = []
+        updated_rows, updated = [], []
+        appended = []
+        for scholarship_id, digest, vector in zip(scholarship_ids, hashes, vectors):
+            row = self._rows.get(scholarship_id)
+            if row is None:
+                row = next_row + len(appended)
+                appended.append(vector)
+            else:
+                updated_rows.append(row)
+                updated.append(vector)
+            entries.append((scholarship_id, digest, row))
+
+        if updated:
+            matrix = np.load(self._vectors_path, mmap_mode='r+')
+            matrix[updated_rows] = updated
+            matrix.flush()
+            del matrix
+
+        if appended and not self._append_rows(np.asarray(appended, dtype=np.float32)):
+            # The .npy header has no room for the new shape; rewrite everything.
+            # Updated rows were already written through to the mapped file.
+            ids = self.ids()
+            new_entries = [(i, d) for i, d, row in entries if row >= next_row]
+            matrix = np.vstack([self._vectors[[self._rows[i] for i in ids]], appended])
+            self._rewrite(
+                ids + [i for i, _ in new_entries],
+                [self._hashes[i] for i in ids] + [d for _, d in new_entries],
+                matrix,
+                normalized=True
+            )
+            self._load()
+            return
+
+        with open(self._index_path, 'a', encoding='utf-8') as f:
+            f.writelines(f"{i}\t{d}\t{row}\n" for i, d, row in entries)
+            f.flush()
+            os.fsync(f.fileno())
+        self._load()
+
+    def _append_rows(self, rows):
+        """Append rows to vectors.npy in place; False if the header cannot grow"""
+        with open(self._vectors_path, 'r+b') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            data_offset = f.tell()
+
+            header = io.BytesIO()
+            header_data = {
+                'descr': np.lib.format.dtype_to_descr(dtype),
+                'fortran_order': fortran_order,
+                'shape': (shape[0] + len(rows), shape[1])
+            }
+            if version == (1, 0):
+                np.lib.format.write_array_header_1_0(header, header_data)
+            else:
+                np.lib.format.write_array_header_2_0(header, header_data)
+            if len(header.getvalue()) != data_offset or fortran_order:
+                return False
+
+            # Data first, then the header: a crash leaves unused bytes, not a short matrix
+            f.seek(data_offset + shape[0] * shape[1] * dtype.itemsize)
+            f.write(np.ascontiguousarray(rows, dtype=dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(header.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _rewrite(self, scholarship_ids, hashes, matrix, normalized=False):
+        """Atomically replace the matrix and index with exactly these rows"""
+        if not normalized:
+            matrix = normalize(matrix)
+
+        tmp_vectors = self._vectors_path + '.tmp'
+        with open(tmp_vectors, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_vectors, self._vectors_path)
+
+        tmp_index = self._index_path + '.tmp'
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            f.write(self._header() + '\n')
+            f.writelines(f"{i}\t{d}\t{row}\n" for row, (i, d) in enumerate(zip(scholarship_ids, hashes)))
+        os.replace(tmp_index, self._index_path)
+
+    def lookup(self, scholarship_ids):
+        """Return a float32 matrix with one row per scholarship id"""
+        rows = [self._rows[str(scholarship_id)] for scholarship_id in scholarship_ids]
+        if self._vectors is None or not rows:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(self._vectors[rows], dtype=np.float32)
+
+
+class UserEmbeddingCache:
+    """LRU cache of profile embeddings keyed by user id and profile-text hash
+
+    Memory is bounded by `max_entries` float32 vectors. A hit requires the
+    hash of the current profile text to match, so an edited profile is never
+    served a stale vector even if invalidate() was missed.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """Bytes held by cached vectors"""
+        with self._lock:
+            return sum(vector.nbytes for _, vector in self._entries.values())
+
+    def get_or_encode(self, user_id, profile, encode):
+        """Return the cached vector for this profile, encoding it on a miss"""
+        text = profile_text(profile)
+        digest = content_hash(text)
+        user_id = str(user_id)
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        vector = np.asarray(encode(text), dtype=np.float32)
+        with self._lock:
+            self._entries[user_id] = (digest, vector)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+    def invalidate(self, user_id):
+        """Drop the cached vector for a user whose profile changed"""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
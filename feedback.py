@@ -0,0 +1,202 @@
+"""
+Feedback-driven re-ranking for Scholarship Matchmaker
+Like/dislike rows from user_feedback are folded into compact preference
+vectors as they arrive, never by re-reading the table: each user keeps the sum
+of the scholarships they liked minus those they disliked, and each scholarship
+the sum of the profiles that liked it minus those that disliked it. Re-ranking
+adds a small vectorized bonus from both to the cosine scores, and disliked
+scholarships are dropped through a per-user set.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+FEEDBACK_SIGN = {'like': 1.0, 'dislike': -1.0}
+
+
+def _unit(vectors):
+    """Rows scaled to unit length; all-zero rows stay zero"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class UserPreferences:
+    """One user's feedback and the preference vector built from it"""
+
+    __slots__ = ('vector', 'feedback', 'disliked', 'profile_vector', 'version')
+
+    def __init__(self, dim):
+        self.vector = np.zeros(dim, dtype=np.float32)
+        self.feedback = {}
+        self.disliked = set()
+        # Profile vector this user's feedback was added to scholarship vectors with
+        self.profile_vector = None
+        # Version of the stored feedback this was loaded from
+        self.version = None
+
+
+class FeedbackRanker:
+    """Per-user and per-scholarship preference vectors, updated one feedback row at a time
+
+    A user's existing feedback is loaded once per worker with load_user();
+    after that record() applies each new row in O(dim). Up to `max_users`
+    users are kept, least recently used first out. `dim` defaults to the
+    length of the first vector loaded.
+    """
+
+    def __init__(self, dim=None, user_weight=0.1, scholarship_weight=0.05, max_users=10000):
+        self.dim = dim
+        self.user_weight = user_weight
+        self.scholarship_weight = scholarship_weight
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        # Users whose feedback is already counted in the scholarship vectors,
+        # so reloading them after eviction does not count it twice
+        self._counted = set()
+        self._scholarship_rows = {}
+        self._scholarship_vectors = None
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._users
+
+    def _scholarship_row(self, scholarship_id):
+        row = self._scholarship_rows.get(scholarship_id)
+        if row is None:
+            row = len(self._scholarship_rows)
+            if self._scholarship_vectors is None or row == len(self._scholarship_vectors):
+                grown = np.zeros((max(64, 2 * row), self.dim), dtype=np.float32)
+                if self._scholarship_vectors is not None:
+                    grown[:row] = self._scholarship_vectors
+                self._scholarship_vectors = grown
+            self._scholarship_rows[scholarship_id] = row
+        return row
+
+    def _apply(self, prefs, scholarship_id, feedback_type, scholarship_vector, sign, count_scholarship):
+        weight = sign * FEEDBACK_SIGN[feedback_type]
+        prefs.vector += weight * scholarship_vector
+        if count_scholarship and prefs.profile_vector is not None:
+            row = self._scholarship_row(scholarship_id)
+            self._scholarship_vectors[row] += weight * prefs.profile_vector
+        if sign > 0:
+            prefs.feedback[scholarship_id] = feedback_type
+            if feedback_type == 'dislike':
+                prefs.disliked.add(scholarship_id)
+        else:
+            prefs.feedback.pop(scholarship_id, None)
+            prefs.disliked.discard(scholarship_id)
+
+    def load_user(self, user_id, rows, vectors, user_vector=None, version=None):
+        """Fold in a user's stored feedback, the first time this worker ranks for them or after it changed
+
+        `rows` are user_feedback rows and `vectors` the matching scholarship
+        vectors, row for row; `version` is the version of the stored feedback
+        they were read at. Reloading a user still held here moves only the
+        changed votes in the scholarship vectors.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(user_vector) if user_vector is not None else np.shape(vectors)[1]
+            prefs = UserPreferences(self.dim)
+            prefs.version = version
+            previous = self._users.get(user_id)
+            count_scholarships = user_id not in self._counted
+            if user_vector is not None:
+                prefs.profile_vector = np.asarray(user_vector, dtype=np.float32)
+            elif previous is not None:
+                prefs.profile_vector = previous.profile_vector
+            for row, vector in zip(rows, vectors):
+                if row['feedback_type'] in FEEDBACK_SIGN:
+                    self._apply(prefs, str(row['scholarship_id']), row['feedback_type'], vector, 1, count_scholarships)
+            if not count_scholarships and previous is not None and previous.profile_vector is not None:
+                # Votes cast through other workers since the last load
+                for scholarship_id in set(previous.feedback) | set(prefs.feedback):
+                    before, after = previous.feedback.get(scholarship_id), prefs.feedback.get(scholarship_id)
+                    if before == after:
+                        continue
+                    row = self._scholarship_row(scholarship_id)
+                    if before is not None:
+                        self._scholarship_vectors[row] -= FEEDBACK_SIGN[before] * previous.profile_vector
+                    if after is not None and prefs.profile_vector is not None:
+                        self._scholarship_vectors[row] += FEEDBACK_SIGN[after] * prefs.profile_vector
+            if prefs.profile_vector is not None:
+                self._counted.add(user_id)
+            self._users[user_id] = prefs
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def record(self, user_id, scholarship_id, feedback_type, scholarship_vector):
+        """Apply one new feedback row; a changed vote replaces the previous one
+
+        Users not loaded yet are skipped: load_user() will read the row from
+        the table.
+        """
+        user_id, scholarship_id = str(user_id), str(scholarship_id)
+        if feedback_type not in FEEDBACK_SIGN:
+            return
+        with self._lock:
+            prefs = self._users.get(user_id)
+            if prefs is None:
+                return
+            previous = prefs.feedback.get(scholarship_id)
+            if previous == feedback_type:
+                return
+            if previous is not None:
+                self._apply(prefs, scholarship_id, previous, scholarship_vector, -1, True)
+            self._apply(prefs, scholarship_id, feedback_type, scholarship_vector, 1, True)
+
+    def _get(self, user_id):
+        with self._lock:
+            prefs = self._users.get(str(user_id))
+            if prefs is not None:
+                self._users.move_to_end(str(user_id))
+            return prefs
+
+    def is_current(self, user_id, version):
+        """Whether the user's feedback is loaded at `version` of the stored feedback"""
+        with self._lock:
+            prefs = self._users.get(str(user_id))
+            return prefs is not None and prefs.version == version
+
+    def disliked(self, user_id):
+        """Scholarship ids the user disliked"""
+        prefs = self._get(user_id)
+        return prefs.disliked if prefs is not None else set()
+
+    def rerank(self, user_id, user_vector, ids, scores, vectors, rank_by=None):
+        """(ids, scores) best first after the preference bonus, without disliked scholarships
+
+        `vectors` are the normalized vectors of `ids`, row for row. `rank_by`
+        orders the results in place of `scores` (e.g. hybrid fused scores)
+        while the returned scores stay `scores` plus the bonus.
+        """
+        prefs = self._get(user_id)
+        disliked = prefs.disliked if prefs is not None else ()
+        keep = [i for i, scholarship_id in enumerate(ids) if scholarship_id not in disliked]
+        if not keep:
+            return [], np.empty(0, dtype=np.float32)
+        ids = [ids[i] for i in keep]
+        scores = np.asarray(scores, dtype=np.float32)[keep]
+        vectors = np.asarray(vectors, dtype=np.float32)[keep]
+
+        bonus = np.zeros(len(ids), dtype=np.float32)
+        if prefs is not None and prefs.feedback:
+            bonus += self.user_weight * (vectors @ _unit(prefs.vector))
+        rows = np.array([self._scholarship_rows.get(i, -1) for i in ids])
+        if (rows >= 0).any():
+            popular = np.zeros((len(ids), self.dim), dtype=np.float32)
+            popular[rows >= 0] = self._scholarship_vectors[rows[rows >= 0]]
+            bonus += self.scholarship_weight * (_unit(popular) @ _unit(np.asarray(user_vector, dtype=np.float32)))
+
+        adjusted = scores + bonus
+        ranking = adjusted if rank_by is None else np.asarray(rank_by, dtype=np.float32)[keep] + bonus
+        order = np.argsort(-ranking, kind='stable')
+        # Reported scores stay in cosine range so confidences never pass 100%
+        return [ids[i] for i in order], np.clip(adjusted[order], -1.0, 1.0)
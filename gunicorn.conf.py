@@ -0,0 +1,16 @@
+"""
+Gunicorn settings for Scholarship Matchmaker
+Run with: gunicorn app:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = 120
+
+# With PRELOAD_MODEL=1 the app (and the embedding model) is imported once in
+# the master; forked workers then share the model weights copy-on-write
+# instead of each loading their own copy.
+preload_app = os.getenv('PRELOAD_MODEL', '').lower() in ('1', 'true', 'yes')
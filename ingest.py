@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Scholarship Matchmaker - Bulk Ingestion
+Streams scholarships from a CSV or JSONL file, encodes them in large batches
+across a process pool, and upserts rows and vectors chunk by chunk.
+
+    python ingest.py scholarships.jsonl --workers 4 --chunk-size 2000
+
+Progress is checkpointed after every chunk, so an interrupted run picks up
+where it stopped when started again with the same file.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+from embeddings import DEFAULT_MODEL_NAME, ScholarshipEmbeddingStore, content_hash, scholarship_text
+
+# Columns of the scholarships table that ingestion may write
+SCHOLARSHIP_COLUMNS = [
+    'id', 'name', 'description', 'amount', 'currency', 'deadline', 'requirements',
+    'field_of_study', 'country', 'education_level', 'min_gpa', 'min_age', 'max_age',
+    'application_url', 'is_active'
+]
+REQUIRED_COLUMNS = ['name', 'description', 'amount', 'deadline']
+FLOAT_COLUMNS = {'amount', 'min_gpa'}
+INT_COLUMNS = {'min_age', 'max_age'}
+TEXT_COLUMNS = ['name', 'description', 'requirements', 'field_of_study', 'country']
+
+# Namespace for ids derived from rows that do not carry one, so re-runs upsert
+INGEST_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'scholarship-matchmaker/ingest')
+
+_worker_model = None
+
+
+def read_rows(path):
+    """Yield raw scholarship dicts from a .csv or .jsonl file"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def clean_row(raw):
+    """Coerce a raw row to table types; returns None if a required field is missing or a number does not parse"""
+    row = {}
+    for column in SCHOLARSHIP_COLUMNS:
+        if column not in raw:
+            continue
+        value = raw[column]
+        if isinstance(value, str):
+            value = value.strip()
+            if value == '':
+                value = None
+        if value is not None:
+            if column in FLOAT_COLUMNS or column in INT_COLUMNS:
+                # One bad cell skips its row rather than aborting the run
+                try:
+                    value = float(value) if column in FLOAT_COLUMNS else int(float(value))
+                except (TypeError, ValueError, OverflowError):
+                    return None
+            elif column == 'is_active' and isinstance(value, str):
+                value = value.lower() in ('1', 'true', 't', 'yes')
+        row[column] = value
+
+    if any(row.get(column) is None for column in REQUIRED_COLUMNS):
+        return None
+
+    if not row.get('id'):
+        key = row.get('application_url') or f"{row['name']}|{row['deadline']}"
+        row['id'] = str(uuid.uuid5(INGEST_NAMESPACE, key))
+    return row
+
+
+def uniform_rows(rows):
+    """PostgREST bulk upserts need every row to carry the same keys"""
+    columns = set()
+    for row in rows:
+        columns.update(row)
+    defaults = {'currency': 'USD', 'is_active': True}
+    return [{column: row.get(column, defaults.get(column)) for column in columns} for row in rows]
+
+
+def _init_worker(backend, model_name, threads):
+    """Load the model once per worker process"""
+    global _worker_model
+    from embedding_backends import make_backend
+
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:  # the onnx backend runs without torch
+        pass
+    _worker_model = make_backend(backend, model_name)
+
+
+def _encode(texts, batch_size):
+    return _worker_model.encode(texts, batch_size=batch_size)
+
+
+def encode_chunk(pool, workers, texts, batch_size):
+    """Split a chunk's texts across the pool and return their vectors in order"""
+    size = -(-len(texts) // workers)
+    parts = [texts[i:i + size] for i in range(0, len(texts), size)]
+    return np.vstack(list(pool.map(_encode, parts, [batch_size] * len(parts))))
+
+
+def load_checkpoint(path, source):
+    """Rows already ingested from `source`, or 0 when starting fresh"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('source') != os.path.abspath(source):
+        return 0
+    return checkpoint['rows_done']
+
+
+def save_checkpoint(path, source, rows_done):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'source': os.path.abspath(source), 'rows_done': rows_done}, f)
+    os.replace(tmp, path)
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ingest(args):
+    """Run the ingestion pipeline"""
+    load_dotenv()
+
+    supabase = None
+    if not args.skip_upsert:
+        from supabase import create_client
+
+        supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+    store = ScholarshipEmbeddingStore(args.store_dir or os.getenv('EMBEDDING_STORE_DIR', 'embedding_store'))
+    checkpoint = args.checkpoint or args.source + '.checkpoint.json'
+    rows_done = 0 if args.restart else load_checkpoint(checkpoint, args.source)
+    if rows_done:
+        print(f"⏩ Resuming after {rows_done:,} rows")
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    model_name = os.getenv('MODEL_NAME', DEFAULT_MODEL_NAME)
+    backend = os.getenv('EMBEDDING_BACKEND', 'torch')
+    print(f"📥 Loading {model_name} ({backend}) in {args.workers} worker(s)...")
+
+    started = time.perf_counter()
+    ingested = skipped = 0
+    raw_rows = read_rows(args.source)
+    for _ in range(rows_done):
+        next(raw_rows, None)
+
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(backend, model_name, threads)) as pool:
+        for raw_chunk in chunks(raw_rows, args.chunk_size):
+            chunk_started = time.perf_counter()
+            rows = [row for row in map(clean_row, raw_chunk) if row is not None]
+            skipped += len(raw_chunk) - len(rows)
+
+            if rows:
+                texts = [scholarship_text({c: row.get(c) for c in TEXT_COLUMNS}) for row in rows]
+                vectors = encode_chunk(pool, args.workers, texts, args.batch_size)
+                if supabase is not None:
+                    supabase.table('scholarships').upsert(uniform_rows(rows)).execute()
+                store.put([row['id'] for row in rows], [content_hash(text) for text in texts], vectors)
+
+            rows_done += len(raw_chunk)
+            ingested += len(rows)
+            save_checkpoint(checkpoint, args.source, rows_done)
+
+            elapsed = time.perf_counter() - started
+            print(f"✅ {rows_done:,} rows | chunk {len(raw_chunk) / (time.perf_counter() - chunk_started):,.0f} rows/s"
+                  f" | overall {ingested / elapsed:,.0f} rows/s | {skipped:,} skipped")
+
+    print(f"🎉 Ingested {ingested:,} scholarships in {time.perf_counter() - started:.1f}s ({skipped:,} skipped)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-ingest scholarships from CSV or JSONL')
+    parser.add_argument('source', help='Path to a .csv or .jsonl file')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per upsert and checkpoint')
+    parser.add_argument('--batch-size', type=int, default=128, help='model.encode batch size')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help='Encoding processes')
+    parser.add_argument('--store-dir', help='Embedding store directory (default: EMBEDDING_STORE_DIR)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <source>.checkpoint.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore any checkpoint and start over')
+    parser.add_argument('--skip-upsert', action='store_true', help='Only compute embeddings')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ File not found: {args.source}")
+        sys.exit(1)
+
+    try:
+        ingest(args)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; run the same command again to resume")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
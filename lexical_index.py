@@ -0,0 +1,232 @@
+"""
+Lexical candidate generation for Scholarship Matchmaker
+BM25Index is an inverted index over the name, description, requirements and
+field of study of each scholarship, updated one scholarship at a time. It
+supplies a few hundred candidates per profile cheaply; embedding similarity
+then re-ranks only those, and the two scores are combined by a fusion
+strategy ('weighted' or 'rrf').
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from scoring import top_k
+
+LEXICAL_FIELDS = ('name', 'description', 'requirements', 'field_of_study')
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in is it of on or that the this to with'.split()
+)
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercased alphanumeric tokens without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def scholarship_terms(scholarship):
+    """Tokens of the lexically indexed fields"""
+    return tokenize(' '.join(str(scholarship.get(field) or '') for field in LEXICAL_FIELDS))
+
+
+def profile_query(profile):
+    """Query text for a profile: field of study and education level, plus financial need when it is high"""
+    parts = [profile.get('field_of_study') or '', profile.get('education_level') or '']
+    if profile.get('financial_need') == 'High':
+        parts.append('financial need')
+    return ' '.join(parts)
+
+
+class BM25Index:
+    """Incremental BM25 inverted index over scholarships
+
+    Postings are appended as scholarships are added; replaced and removed
+    scholarships are masked out, and once they make up half of the rows they
+    are dropped from the postings and the live rows renumbered. Document frequencies and the average length always
+    reflect the live scholarships only.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._ids = []
+        self._rows = {}
+        self._terms = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._total_length = 0
+        self._dead = 0
+        self._postings = {}
+        self._arrays = {}
+        self._df = Counter()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, scholarship_id):
+        return str(scholarship_id) in self._rows
+
+    def ids(self):
+        """Ids currently in the index"""
+        return list(self._rows)
+
+    def _reserve(self, count):
+        needed = self._size + count
+        if needed > len(self._alive):
+            capacity = max(needed, 2 * len(self._alive), 1024)
+            lengths = np.zeros(capacity, dtype=np.float32)
+            lengths[:self._size] = self._lengths[:self._size]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._lengths, self._alive = lengths, alive
+
+    def add(self, scholarships):
+        """Index scholarships, replacing any existing entry with the same id"""
+        scholarships = list(scholarships)
+        with self._lock:
+            self._remove([str(s['id']) for s in scholarships])
+            self._reserve(len(scholarships))
+            for scholarship in scholarships:
+                row = self._size
+                terms = Counter(scholarship_terms(scholarship))
+                for term, tf in terms.items():
+                    rows, tfs = self._postings.setdefault(term, ([], []))
+                    rows.append(row)
+                    tfs.append(tf)
+                    self._arrays.pop(term, None)
+                self._df.update(terms.keys())
+                length = sum(terms.values())
+                self._lengths[row] = length
+                self._alive[row] = True
+                self._total_length += length
+                self._terms[row] = tuple(terms)
+                self._rows[str(scholarship['id'])] = row
+                self._ids.append(str(scholarship['id']))
+                self._size += 1
+
+    def remove(self, scholarship_ids):
+        """Drop scholarships; unknown ids are ignored"""
+        with self._lock:
+            self._remove([str(i) for i in scholarship_ids])
+
+    def _remove(self, scholarship_ids):
+        for scholarship_id in scholarship_ids:
+            row = self._rows.pop(scholarship_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._total_length -= int(self._lengths[row])
+            self._df.subtract(self._terms.pop(row))
+            self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._rows):
+            self._compact()
+
+    def _compact(self):
+        """Drop removed rows from every posting list and renumber the live ones"""
+        kept = np.flatnonzero(self._alive[:self._size])
+        renumber = np.full(self._size, -1, dtype=np.intp)
+        renumber[kept] = np.arange(len(kept))
+        for term in list(self._postings):
+            rows, tfs = self._postings[term]
+            live = [(int(renumber[row]), tf) for row, tf in zip(rows, tfs) if self._alive[row]]
+            if live:
+                self._postings[term] = ([row for row, _ in live], [tf for _, tf in live])
+            else:
+                del self._postings[term]
+                del self._df[term]
+
+        capacity = max(len(kept), 1024)
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[:len(kept)] = self._lengths[kept]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(kept)] = True
+        self._lengths, self._alive, self._size = lengths, alive, len(kept)
+        self._terms = {int(renumber[row]): terms for row, terms in self._terms.items()}
+        self._ids = [self._ids[row] for row in kept]
+        self._rows = {scholarship_id: row for row, scholarship_id in enumerate(self._ids)}
+        self._arrays = {}
+        self._dead = 0
+
+    def _posting_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = (np.asarray(rows, dtype=np.intp), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query, k, allowed=None):
+        """Return (ids, scores) of up to k scholarships matching `query`, best first
+
+        Only scholarships sharing at least one term with the query are
+        returned. `allowed` restricts results to an iterable of scholarship ids.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._rows)
+            if n == 0 or not terms:
+                return [], np.empty(0, dtype=np.float32)
+
+            average_length = self._total_length / n
+            scores = np.zeros(self._size, dtype=np.float32)
+            for term in terms:
+                df = self._df.get(term, 0)
+                if df <= 0:
+                    continue
+                rows, tfs = self._posting_arrays(term)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                norm = tfs + self.k1 * (1 - self.b + self.b * self._lengths[rows] / average_length)
+                scores[rows] += idf * tfs * (self.k1 + 1) / norm
+
+            scores[~self._alive[:self._size]] = 0
+            if allowed is not None:
+                mask = np.zeros(self._size, dtype=bool)
+                mask[[self._rows[i] for i in map(str, allowed) if i in self._rows]] = True
+                scores[~mask] = 0
+            hits = np.flatnonzero(scores > 0)
+            best = hits[top_k(scores[hits], k)]
+            return [self._ids[row] for row in best], scores[best]
+
+
+def weighted_fusion(semantic, lexical, alpha=0.7):
+    """alpha * cosine + (1 - alpha) * BM25 scaled to [0, 1] by the best lexical score"""
+    lexical_max = lexical.max() if len(lexical) else 0
+    scaled = lexical / lexical_max if lexical_max > 0 else lexical
+    return alpha * semantic + (1 - alpha) * scaled
+
+
+def _ranks(scores):
+    ranks = np.empty(len(scores), dtype=np.float32)
+    ranks[np.argsort(-scores, kind='stable')] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def rrf_fusion(semantic, lexical, alpha=0.5, k=60):
+    """Reciprocal rank fusion, weighted by alpha and scaled so rank one in both lists scores 1
+
+    Candidates without lexical hits take no lexical share.
+    """
+    fused = alpha / (k + _ranks(semantic)) + (1 - alpha) * (lexical > 0) / (k + _ranks(lexical))
+    return fused * (k + 1)
+
+
+FUSION_STRATEGIES = {
+    'weighted': weighted_fusion,
+    'rrf': rrf_fusion
+}
+
+
+def get_fusion(name='weighted'):
+    """Fusion function by name ('weighted' or 'rrf')"""
+    try:
+        return FUSION_STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown fusion strategy: {name}")
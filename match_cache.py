@@ -0,0 +1,115 @@
+"""
+Per-user match result cache for Scholarship Matchmaker
+Stores each user's ranked scholarship ids and scores, keyed by profile hash and
+catalog version, and recomputes stale entries on a background thread
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+FRESH = 'fresh'
+STALE = 'stale'
+RECOMPUTED = 'recomputed'
+
+
+class StaleCursor(ValueError):
+    """Raised for a page cursor from a ranking that is no longer cached"""
+
+
+class MatchEntry:
+    """Ranked matches for one user at one profile hash and catalog version"""
+
+    __slots__ = ('profile_hash', 'catalog_version', 'ids', 'scores')
+
+    def __init__(self, profile_hash, catalog_version, ids, scores):
+        self.profile_hash = profile_hash
+        self.catalog_version = catalog_version
+        self.ids = list(ids)
+        self.scores = [float(score) for score in scores]
+
+    @property
+    def key(self):
+        """Short fingerprint of the ranking, used to tie page cursors to it"""
+        return hashlib.sha1(f"{self.profile_hash}|{self.catalog_version}".encode()).hexdigest()[:16]
+
+
+def encode_cursor(entry, offset):
+    """Opaque page cursor: a position in `entry.ids` plus the entry's key"""
+    raw = json.dumps([offset, entry.key]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(offset, entry key) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        offset, key = json.loads(raw)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(offset, int) or offset < 0 or not isinstance(key, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset, key
+
+
+class MatchResultCache:
+    """Bounded LRU of MatchEntry objects with deduplicated background refreshes"""
+
+    def __init__(self, max_entries=10000, workers=1):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='match-refresh')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, user_id, profile_hash, catalog_version):
+        """Return (entry, status): status is FRESH, STALE or None when nothing is cached"""
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(user_id)
+        if entry.profile_hash == profile_hash and entry.catalog_version == catalog_version:
+            return entry, FRESH
+        return entry, STALE
+
+    def store(self, user_id, entry):
+        with self._lock:
+            self._entries[str(user_id)] = entry
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def refresh_async(self, user_id, compute):
+        """Run compute() -> MatchEntry in the background unless a refresh is already queued"""
+        user_id = str(user_id)
+        with self._lock:
+            if user_id in self._pending:
+                return False
+            self._pending.add(user_id)
+
+        def run():
+            try:
+                self.store(user_id, compute())
+            except Exception:
+                logger.exception("Error refreshing matches for user %s", user_id)
+            finally:
+                with self._lock:
+                    self._pending.discard(user_id)
+
+        self._executor.submit(run)
+        return True
@@ -0,0 +1,158 @@
+"""
+Multi-core scoring for large scholarship matrices
+The index's vector buffer lives in a shared memory segment, so worker
+processes read their shard of it in place instead of receiving a pickled copy.
+Each search splits the rows into contiguous shards, scores one in the calling
+thread and the rest in the workers, and merges the partial top-k results.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from scoring import top_k
+
+logger = logging.getLogger(__name__)
+
+# Segments attached in a worker process, by name; a new name means the index
+# grew into a new segment and the old one can be let go
+_attached = {}
+
+
+def _attach(name):
+    segment = _attached.get(name)
+    if segment is None:
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        segment = _attached[name] = SharedMemory(name)
+    return segment
+
+
+def _views(buf, capacity, dim):
+    """(vectors, mask) arrays over a segment: capacity x dim float32 rows, then one mask byte per row"""
+    vectors = np.ndarray((capacity, dim), dtype=np.float32, buffer=buf)
+    mask = np.ndarray(capacity, dtype=bool, buffer=buf, offset=capacity * dim * 4)
+    return vectors, mask
+
+
+def _score_shard(buf, capacity, dim, start, stop, query, k):
+    """(rows, scores) of the best k rows in [start, stop) whose mask byte is set"""
+    vectors, mask = _views(buf, capacity, dim)
+    scores = vectors[start:stop] @ query
+    keep = mask[start:stop]
+    scores[~keep] = -np.inf
+    best = top_k(scores, min(k, int(keep.sum())))
+    return best + start, scores[best]
+
+
+def _score_shared(name, capacity, dim, start, stop, query, k):
+    """_score_shard in a worker process, on the segment attached by name"""
+    return _score_shard(_attach(name).buf, capacity, dim, start, stop, query, k)
+
+
+class ShardedScorer:
+    """Owns one shared vector matrix and scores it across `processes` cores
+
+    ExactIndex allocates its buffer through allocate() and hands searches of
+    at least `min_rows` rows to search(). Worker processes are started on the
+    first such search, in each web worker separately.
+    """
+
+    def __init__(self, processes=None, min_rows=50000):
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.min_rows = min_rows
+        self._lock = threading.Lock()
+        self._segment = None
+        self._shape = (0, 0)
+        # The segment replaced by the last allocate(), still mapped while the
+        # index copies its rows out
+        self._retired = None
+        self._executor = None
+        self._pid = None
+        self._owner = None
+        atexit.register(self.close)
+
+    def allocate(self, capacity, dim):
+        """Zeroed capacity x dim float32 matrix in a new shared segment
+
+        The previous segment is unlinked but stays mapped until the next
+        allocate(), so the caller can copy its rows over first. numpy does not
+        pin the mapping, so arrays over an older segment must not be used
+        after that.
+        """
+        with self._lock:
+            segment = SharedMemory(create=True, size=max(1, capacity * dim * 4 + capacity))
+            if self._retired is not None:
+                self._retired.close()
+            self._retired = None
+            if self._segment is not None and self._owner == os.getpid():
+                self._segment.unlink()
+                self._retired = self._segment
+            self._segment, self._shape, self._owner = segment, (capacity, dim), os.getpid()
+            return _views(segment.buf, capacity, dim)[0]
+
+    def _pool(self):
+        # A pool started before a fork belongs to the parent
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                self.processes - 1, mp_context=multiprocessing.get_context('spawn')
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def search(self, size, query, mask, k):
+        """(rows, scores) of the k best rows among the first `size` where `mask` is set, best first
+
+        `query` must be normalized.
+        """
+        with self._lock:
+            capacity, dim = self._shape
+            buf = self._segment.buf
+            _views(buf, capacity, dim)[1][:size] = mask
+            bounds = np.linspace(0, size, self.processes + 1).astype(int)
+            shards = list(zip(bounds[:-1], bounds[1:]))
+            query = np.ascontiguousarray(query, dtype=np.float32)
+
+            parts = None
+            if self.processes > 1:
+                try:
+                    pool = self._pool()
+                    futures = [
+                        pool.submit(_score_shared, self._segment.name, capacity, dim, start, stop, query, k)
+                        for start, stop in shards[1:]
+                    ]
+                    parts = [_score_shard(buf, capacity, dim, *shards[0], query, k)]
+                    parts.extend(future.result() for future in futures)
+                except BrokenProcessPool:
+                    logger.exception("Scoring pool failed; scoring in process")
+                    self._executor = None
+                    parts = None
+            if parts is None:
+                parts = [_score_shard(buf, capacity, dim, 0, size, query, k)]
+
+        rows = np.concatenate([part[0] for part in parts])
+        scores = np.concatenate([part[1] for part in parts])
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+    def close(self):
+        """Stop the workers and unlink the shared segment
+
+        The segment stays mapped for arrays still using it; it is freed when
+        the process exits.
+        """
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            if self._segment is not None and self._owner == os.getpid():
+                self._segment.unlink()
+                self._owner = None
@@ -0,0 +1,94 @@
+"""
+Bounded bcrypt worker pool for Scholarship Matchmaker
+Password hashing runs on a few dedicated threads (bcrypt releases the GIL), so
+a burst of logins uses at most `workers` cores and cannot starve the match
+endpoint. When every worker is busy and the wait queue is full, new work is
+refused with PoolSaturated instead of piling up.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# bcrypt.gensalt() default
+DEFAULT_ROUNDS = 12
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool and its wait queue are full"""
+
+
+def hash_cost(hashed):
+    """Cost factor stored in a bcrypt hash ($2b$12$... -> 12)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordPool:
+    """Hash and verify passwords on a bounded thread pool
+
+    At most `workers` hashes run at once and `max_queue` more may wait;
+    callers beyond that get PoolSaturated after waiting up to `wait` seconds
+    for a slot.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=2, max_queue=32, wait=0.1):
+        self.rounds = rounds
+        self.workers = workers
+        self.wait = wait
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+
+    def _submit(self, fn, *args, wait=None):
+        if not self._slots.acquire(timeout=self.wait if wait is None else wait):
+            self.rejected += 1
+            raise PoolSaturated()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _verify(password, hashed):
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def hash(self, password):
+        """bcrypt hash at the configured cost"""
+        return self._submit(self._hash, password).result()
+
+    def verify(self, password, hashed):
+        return self._submit(self._verify, password, hashed).result()
+
+    def needs_rehash(self, hashed):
+        """Whether a stored hash was made with a different cost factor"""
+        return hash_cost(hashed) != self.rounds
+
+    def rehash_later(self, password, on_hashed):
+        """Hash at the configured cost in the background and pass the result to `on_hashed`
+
+        Skipped when the pool is busy; the next login will try again.
+        """
+        def rehash():
+            try:
+                on_hashed(self._hash(password))
+            except Exception:
+                logger.exception("Error rehashing password")
+
+        try:
+            self._submit(rehash, wait=0)
+        except PoolSaturated:
+            return False
+        return True
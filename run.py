@@ -31,7 +31,7 @@ try:
     print("=" * 40)
     print("✅ Environment variables loaded")
     print("✅ Database connection configured")
-    print("✅ AI model ready")
+    print("✅ AI model loads on the first match request")
     print("\n🚀 Starting server...")
     print("📱 Open your browser to: http://localhost:5000")
     print("⏹️  Press Ctrl+C to stop the server")
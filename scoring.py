@@ -0,0 +1,80 @@
+"""
+Similarity scoring for Scholarship Matchmaker
+Scores a user against every candidate scholarship with one matrix-vector product,
+or a batch of users with blocked matrix-matrix products
+"""
+
+import numpy as np
+
+
+def normalize(vectors):
+    """Scale vectors (1-D or row-wise 2-D) to unit length as contiguous float32"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def cosine_scores(user_vector, scholarship_matrix):
+    """Cosine similarity of a user vector against pre-normalized scholarship rows"""
+    if len(scholarship_matrix) == 0:
+        return np.empty(0, dtype=np.float32)
+    return scholarship_matrix @ normalize(user_vector)
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first"""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def top_k_rows(scores, k):
+    """Per-row indices of the k highest scores in a 2-D array, best first"""
+    rows, n = scores.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((rows, 0), dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), (rows, n))
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def top_k_batch(user_vectors, scholarship_matrix, k, allowed=None, block_size=16384):
+    """Top-k scholarships for many users with blocked matrix-matrix products
+
+    `scholarship_matrix` rows must be normalized; `allowed` is an optional
+    (users, scholarships) boolean mask. The catalog is scored `block_size`
+    rows at a time and merged into a running top-k, so memory stays at
+    users x block_size scores. Returns (indices, scores) of shape (users, k);
+    users with fewer than k allowed scholarships get index -1 and score -inf.
+    """
+    users = normalize(np.atleast_2d(user_vectors))
+    best_rows = np.full((len(users), k), -1, dtype=np.intp)
+    best_scores = np.full((len(users), k), -np.inf, dtype=np.float32)
+
+    for start in range(0, len(scholarship_matrix), block_size):
+        block = np.asarray(scholarship_matrix[start:start + block_size], dtype=np.float32)
+        scores = users @ block.T
+        if allowed is not None:
+            scores[~allowed[:, start:start + len(block)]] = -np.inf
+
+        # Merge this block's candidates with the best so far
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_rows = np.concatenate(
+            [best_rows, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1
+        )
+        keep = top_k_rows(merged_scores, k)
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+        best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+
+    best_rows[np.isneginf(best_scores)] = -1
+    return best_rows, best_scores
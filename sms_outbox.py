@@ -0,0 +1,223 @@
+"""
+SMS outbox for Scholarship Matchmaker
+Requests enqueue messages and return immediately; a background dispatcher
+delivers them to the SMS provider over a pooled session, with timeouts,
+retries with exponential backoff, a token-bucket rate limit and optional
+batching.
+"""
+
+import heapq
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Failures worth retrying; other 4xx responses mean the message itself is bad
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class SmsMessage:
+    """One queued SMS and its delivery attempts"""
+
+    __slots__ = ('phone_number', 'message', 'attempts', 'not_before')
+
+    def __init__(self, phone_number, message):
+        self.phone_number = phone_number
+        self.message = message
+        self.attempts = 0
+        self.not_before = 0.0
+
+    def __lt__(self, other):
+        return self.not_before < other.not_before
+
+    def payload(self):
+        return {'to': self.phone_number, 'message': self.message}
+
+
+class TokenBucket:
+    """Allows `rate` events per second on average, in bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            time.sleep((tokens - self._tokens) / self.rate)
+
+
+class SmsOutbox:
+    """In-memory SMS queue drained by a daemon dispatcher thread
+
+    With `batch_url` set, up to `batch_size` queued messages are sent in one
+    request as {"messages": [{"to": ..., "message": ...}, ...]}; otherwise
+    each message is posted to `api_url` on its own.
+    """
+
+    def __init__(self, api_url, api_key, batch_url=None, batch_size=50, rate=5, burst=None,
+                 timeout=(3.05, 10), max_attempts=5, backoff=1.0, max_backoff=60, max_queue=10000):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.batch_url = batch_url
+        self.batch_size = batch_size if batch_url else 1
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._rate_limit = TokenBucket(rate, burst)
+        self._queue = queue.Queue(max_queue)
+        self._delayed = []
+        self._unfinished = 0
+        self._idle = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._session = None
+
+    def enqueue(self, phone_number, message):
+        """Queue an SMS; returns False when the outbox is full and the message is dropped"""
+        self._ensure_started()
+        with self._idle:
+            self._unfinished += 1
+        try:
+            self._queue.put_nowait(SmsMessage(phone_number, message))
+        except queue.Full:
+            self._finish(1)
+            self.failed += 1
+            logger.warning("SMS outbox full, dropping message to %s", phone_number)
+            return False
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every queued message is delivered or given up; True if the outbox drained"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._unfinished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _ensure_started(self):
+        # The dispatcher starts on first use, so each gunicorn worker forked from
+        # a preloaded app gets its own thread and connection pool
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2)
+                self._session.mount('http://', adapter)
+                self._session.mount('https://', adapter)
+                self._thread = threading.Thread(target=self._run, name='sms-dispatcher', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _finish(self, count):
+        with self._idle:
+            self._unfinished -= count
+            if not self._unfinished:
+                self._idle.notify_all()
+
+    def _next_batch(self):
+        """Block for the next due message, then take whatever else is ready up to batch_size"""
+        while True:
+            now = time.monotonic()
+            if self._delayed and self._delayed[0].not_before <= now:
+                batch = [heapq.heappop(self._delayed)]
+                break
+            wait = self._delayed[0].not_before - now if self._delayed else None
+            try:
+                batch = [self._queue.get(timeout=wait)]
+                break
+            except queue.Empty:
+                continue
+
+        while len(batch) < self.batch_size:
+            if self._delayed and self._delayed[0].not_before <= time.monotonic():
+                batch.append(heapq.heappop(self._delayed))
+                continue
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self._rate_limit.acquire(len(batch))
+            try:
+                self._deliver(batch)
+            except Exception:
+                logger.exception("Error sending SMS")
+                self._retry_or_drop(batch, None)
+
+    def _deliver(self, batch):
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        try:
+            if self.batch_url:
+                response = self._session.post(
+                    self.batch_url, headers=headers,
+                    json={'messages': [m.payload() for m in batch]}, timeout=self.timeout
+                )
+            else:
+                response = self._session.post(self.api_url, headers=headers, json=batch[0].payload(), timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning("Error sending SMS: %s", e)
+            self._retry_or_drop(batch, None)
+            return
+
+        if 200 <= response.status_code < 300:
+            self.sent += len(batch)
+            self._finish(len(batch))
+        elif response.status_code in RETRY_STATUSES:
+            self._retry_or_drop(batch, response.headers.get('Retry-After'))
+        else:
+            logger.error("SMS provider rejected %d message(s): HTTP %d", len(batch), response.status_code)
+            self.failed += len(batch)
+            self._finish(len(batch))
+
+    def _retry_or_drop(self, batch, retry_after):
+        now = time.monotonic()
+        given_up = 0
+        for message in batch:
+            message.attempts += 1
+            if message.attempts >= self.max_attempts:
+                given_up += 1
+                continue
+            delay = min(self.max_backoff, self.backoff * 2 ** (message.attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            message.not_before = now + delay
+            heapq.heappush(self._delayed, message)
+            self.retried += 1
+        if given_up:
+            logger.error("Giving up on %d SMS message(s) after %d attempts", given_up, self.max_attempts)
+            self.failed += given_up
+            self._finish(given_up)
@@ -120,6 +120,103 @@ function isDeadlineUrgent(dateString) {
     return diffDays <= 7 && diffDays >= 0;
 }
 
+// Streaming utilities
+// Read a newline-delimited JSON response, calling onItem for each object as it arrives
+async function readNdjson(response, onItem) {
+    if (!response.body || !response.body.getReader) {
+        const text = await response.text();
+        text.split('\n').filter(line => line.trim()).forEach(line => onItem(JSON.parse(line)));
+        return;
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) {
+                onItem(JSON.parse(line));
+            }
+        }
+        
+        if (done) {
+            if (buffer.trim()) {
+                onItem(JSON.parse(buffer));
+            }
+            return;
+        }
+    }
+}
+
+// Feedback batching
+// Votes are collected for a moment and sent together to /api/feedback/batch;
+// a later vote on the same scholarship replaces an unsent one
+const FEEDBACK_BATCH_DELAY = 1500;
+const FEEDBACK_BATCH_SIZE = 20;
+const pendingFeedback = new Map();
+let feedbackTimer = null;
+
+function queueFeedback(scholarshipId, feedbackType) {
+    pendingFeedback.delete(scholarshipId);
+    pendingFeedback.set(scholarshipId, feedbackType);
+
+    clearTimeout(feedbackTimer);
+    if (pendingFeedback.size >= FEEDBACK_BATCH_SIZE) {
+        flushFeedback();
+    } else {
+        feedbackTimer = setTimeout(flushFeedback, FEEDBACK_BATCH_DELAY);
+    }
+}
+
+function takeFeedbackBatch() {
+    clearTimeout(feedbackTimer);
+    const events = Array.from(pendingFeedback, ([scholarship_id, feedback_type]) => ({ scholarship_id, feedback_type }));
+    pendingFeedback.clear();
+    return events;
+}
+
+async function flushFeedback() {
+    const events = takeFeedbackBatch();
+    if (!events.length) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/feedback/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ events })
+        });
+
+        const data = await response.json();
+
+        if (!data.success) {
+            showToast(data.message || 'Failed to submit feedback', 'error');
+        } else if (data.rejected.length) {
+            showToast(data.rejected[0].message || 'Some feedback could not be saved', 'error');
+        }
+    } catch (error) {
+        showToast('An error occurred while submitting feedback', 'error');
+    }
+}
+
+// Votes still waiting when the page is hidden or closed go out with sendBeacon
+window.addEventListener('pagehide', () => {
+    const events = takeFeedbackBatch();
+    if (events.length) {
+        navigator.sendBeacon('/api/feedback/batch', new Blob([JSON.stringify({ events })], { type: 'application/json' }));
+    }
+});
+
 // Animation utilities
 function animateOnScroll() {
     const elements = document.querySelectorAll('.feature-card, .step, .stat-card');
@@ -266,5 +363,8 @@ window.ScholarshipMatchmaker = {
     validateGPA,
     validateAge,
     formatDate,
-    isDeadlineUrgent
+    isDeadlineUrgent,
+    readNdjson,
+    queueFeedback,
+    flushFeedback
 };
@@ -0,0 +1,89 @@
+"""
+Tests for the exact and IVF nearest-neighbour indexes
+"""
+
+import numpy as np
+import pytest
+
+from ann_index import ExactIndex, IVFIndex, make_index
+
+
+def clustered_vectors(n, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, n)
+    return (centers[labels] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_exact_index_matches_brute_force():
+    vectors = clustered_vectors(200)
+    ids = [f"s{i}" for i in range(len(vectors))]
+    index = ExactIndex()
+    index.add(ids, vectors)
+
+    query = vectors[7]
+    found, scores = index.search(query, 5)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+    assert found == [ids[i] for i in expected]
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_with_all_lists_probed_is_exact():
+    vectors = clustered_vectors(2000)
+    ids = [str(i) for i in range(len(vectors))]
+    exact = ExactIndex()
+    exact.add(ids, vectors)
+    ivf = IVFIndex(n_lists=16, n_probe=16, min_train_size=500)
+    ivf.add(ids, vectors)
+
+    assert ivf.trained
+    for query in vectors[:20]:
+        assert ivf.search(query, 10)[0] == exact.search(query, 10)[0]
+
+
+def test_ivf_add_remove_and_allowed():
+    vectors = clustered_vectors(1000)
+    ids = [str(i) for i in range(len(vectors))]
+    index = IVFIndex(n_lists=8, n_probe=1, min_train_size=100)
+    index.add(ids, vectors)
+
+    top = index.search(vectors[0], 1)[0]
+    assert top == ['0']
+
+    index.remove(['0'])
+    assert '0' not in index
+    assert '0' not in index.search(vectors[0], 10)[0]
+
+    # Restricting to ids outside the probed bucket widens the probe
+    allowed = ['500', '900']
+    assert sorted(index.search(vectors[0], 5, allowed=allowed)[0]) == allowed
+
+    index.add(['0'], vectors[:1])
+    assert index.search(vectors[0], 1)[0] == ['0']
+
+
+@pytest.mark.parametrize('index', [ExactIndex(), IVFIndex(n_lists=8, n_probe=8, min_train_size=100)])
+def test_removed_rows_are_reclaimed(index):
+    vectors = clustered_vectors(3000)
+    ids = [str(i) for i in range(len(vectors))]
+    index.add(ids, vectors)
+
+    index.remove(ids[:2000])
+    assert index._size == len(index) == 1000
+    assert index.ids() == ids[2000:]
+
+    exact = ExactIndex()
+    exact.add(ids[2000:], vectors[2000:])
+    for query in vectors[:5]:
+        assert index.search(query, 10)[0] == exact.search(query, 10)[0]
+
+    index.add(['0'], vectors[:1])
+    assert index.search(vectors[0], 1)[0] == ['0']
+
+
+def test_make_index_rejects_unknown_type():
+    assert isinstance(make_index('ivf', n_probe=4), IVFIndex)
+    with pytest.raises(ValueError):
+        make_index('hnsw')
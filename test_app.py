@@ -0,0 +1,200 @@
+"""
+Tests for the Flask routes
+"""
+
+import os
+import threading
+
+import bcrypt
+import numpy as np
+import pytest
+from postgrest.exceptions import APIError
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'test')
+
+import app as web
+from catalog import CatalogSnapshot
+from password_pool import PasswordPool, hash_cost
+from write_buffer import WriteBehindBuffer
+
+
+@pytest.fixture
+def client():
+    return web.app.test_client()
+
+
+def logged_in(client, user_id='u1'):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+@pytest.mark.parametrize('limit', [None, [], {}, 'ten'])
+def test_bad_match_limit_is_a_400(client, limit):
+    response = logged_in(client).post('/api/match', json={'limit': limit})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'limit must be an integer'}
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    monkeypatch.setattr(web, 'BATCH_MATCH_API_KEY', 'partner-key')
+    monkeypatch.setattr(web, 'BATCH_MATCH_COUNSELORS', {'counselor'})
+    monkeypatch.setattr(web.scholarship_catalog, 'snapshot', lambda: CatalogSnapshot([], 'v1'))
+    monkeypatch.setattr(web, 'catalog_matrix', lambda snapshot: np.zeros((0, 4), dtype=np.float32))
+
+
+def test_batch_match_needs_credentials(client, batch):
+    assert client.post('/api/match/batch', json={'profiles': [{}]}).status_code == 401
+    assert client.post('/api/match/batch', json={'profiles': [{}]}, headers={'X-API-Key': 'wrong'}).status_code == 401
+
+
+def test_batch_match_is_for_counselors(client, batch):
+    assert logged_in(client, 'student').post('/api/match/batch', json={'profiles': [{}]}).status_code == 403
+    assert logged_in(client, 'counselor').post('/api/match/batch', json={'profiles': [{}]}).status_code == 200
+
+
+def test_batch_match_with_the_api_key_reports_bad_profiles_per_item(client, batch):
+    response = client.post('/api/match/batch', json={'profiles': [{'id': 'a', 'gpa': 'x'}, 'b']},
+                           headers={'X-API-Key': 'partner-key'})
+
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'profile_id': 'a', 'matches': [], 'error': 'gpa must be a number'},
+        {'profile_id': 1, 'matches': [], 'error': 'Profile must be an object'}
+    ]
+
+
+class StubUpserts:
+    """Stands in for DataAccess.upsert_rows; `fail(rows)` returns an error to raise, or None"""
+
+    def __init__(self, fail=lambda rows: None):
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, table, rows):
+        self.calls.append((table, [dict(row) for row in rows]))
+        error = self.fail(rows)
+        if error:
+            raise error
+
+
+@pytest.fixture
+def feedback(monkeypatch, tmp_path):
+    upserts = StubUpserts()
+    buffer = WriteBehindBuffer(str(tmp_path), web.write_buffered_rows, {'user_feedback': ('user_id', 'scholarship_id')},
+                               flush_interval=60)
+    monkeypatch.setattr(web, 'write_buffer', buffer)
+    monkeypatch.setattr(web.db, 'upsert_rows', upserts)
+    monkeypatch.setattr(web, 'embedding_store', set())
+    monkeypatch.setattr(web.scholarship_catalog, 'get', lambda i: {'id': i} if i in ('s1', 's2') else None)
+    yield buffer, upserts
+    # Nothing may be left for the exit-time flush once the stubs are gone
+    upserts.fail = lambda rows: None
+    assert buffer.flush()
+
+
+def test_feedback_batch_buffers_valid_events_and_reports_the_rest(client, feedback):
+    buffer, upserts = feedback
+    events = [
+        {'scholarship_id': 's1', 'feedback_type': 'like'},
+        {'scholarship_id': 's1', 'feedback_type': 'dislike'},
+        {'scholarship_id': 's2', 'feedback_type': 'love'},
+        {'scholarship_id': 'missing', 'feedback_type': 'like'},
+        'like'
+    ]
+    body = logged_in(client).post('/api/feedback/batch', json={'events': events}).get_json()
+
+    assert body['success'] and body['accepted'] == 2
+    assert [r['index'] for r in body['rejected']] == [2, 3, 4]
+    assert upserts.calls == []
+
+    assert buffer.flush()
+    [(table, rows)] = upserts.calls
+    assert table == 'user_feedback'
+    assert [(r['user_id'], r['scholarship_id'], r['feedback_type']) for r in rows] == [('u1', 's1', 'dislike')]
+
+
+def test_feedback_batch_limits(client, feedback, monkeypatch):
+    monkeypatch.setattr(web, 'FEEDBACK_BATCH_MAX_EVENTS', 2)
+    assert client.post('/api/feedback/batch', json={'events': []}).get_json()['message'] == 'Not authenticated'
+    assert logged_in(client).post('/api/feedback/batch', json={'events': []}).status_code == 400
+    events = [{'scholarship_id': 's1', 'feedback_type': 'like'}] * 3
+    assert logged_in(client).post('/api/feedback/batch', json={'events': events}).status_code == 400
+
+
+def test_rows_rejected_by_the_database_are_isolated_and_dropped(feedback):
+    buffer, upserts = feedback
+    upserts.fail = lambda rows: APIError({'code': '23503', 'message': 'fk'}) if any(r['user_id'] == 'gone' for r in rows) else None
+    web.buffer_feedback('u1', 's1', 'like')
+    web.buffer_feedback('gone', 's2', 'like')
+
+    assert buffer.flush()
+    assert buffer.dropped == 1 and buffer.written == 1 and len(buffer) == 0
+    # The batch, then each row alone
+    assert [len(rows) for _, rows in upserts.calls] == [2, 1, 1]
+
+
+def test_other_database_errors_keep_the_rows_for_a_retry(feedback):
+    buffer, upserts = feedback
+    upserts.fail = lambda rows: APIError({'code': 'PGRST000', 'message': 'connection refused'})
+    web.buffer_feedback('u1', 's1', 'like')
+
+    assert not buffer.flush()
+    assert len(buffer) == 1 and buffer.dropped == 0
+
+    upserts.fail = lambda rows: None
+    buffer._retry_at = 0.0
+    assert buffer.flush()
+    assert buffer.written == 1 and len(upserts.calls) == 2
+
+
+@pytest.fixture
+def busy_pool(monkeypatch):
+    """A password pool whose only worker is held and has no queue"""
+    pool = PasswordPool(rounds=4, workers=1, max_queue=0, wait=0.01)
+    release = threading.Event()
+    pool._submit(release.wait)
+    monkeypatch.setattr(web, 'password_pool', pool)
+    yield pool
+    release.set()
+
+
+def test_login_and_signup_answer_503_when_the_password_pool_is_saturated(client, busy_pool, monkeypatch):
+    stored = bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode()
+    monkeypatch.setattr(web.db, 'get_login_user', lambda email: {'id': 'u1', 'password_hash': stored})
+    monkeypatch.setattr(web.db, 'create_user', lambda *args: pytest.fail('created without a hash'))
+
+    for path, body in (('/login', {'email': 'a@b.c', 'password': 'secret'}),
+                       ('/signup', {'email': 'a@b.c', 'password': 'secret', 'name': 'A'})):
+        response = client.post(path, json=body)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert response.get_json()['success'] is False
+    assert busy_pool.rejected == 2
+
+
+def test_login_rehashes_a_password_stored_at_old_rounds(client, monkeypatch):
+    monkeypatch.setattr(web, 'password_pool', PasswordPool(rounds=5, workers=1))
+    stored = bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode()
+    monkeypatch.setattr(web.db, 'get_login_user', lambda email: {'id': 'u1', 'password_hash': stored})
+    updated = {}
+    rehashed = threading.Event()
+
+    def update_password_hash(user_id, new_hash):
+        updated[user_id] = new_hash
+        rehashed.set()
+
+    monkeypatch.setattr(web.db, 'update_password_hash', update_password_hash)
+
+    assert client.post('/login', json={'email': 'a@b.c', 'password': 'secret'}).get_json()['success']
+    assert rehashed.wait(5)
+    assert hash_cost(updated['u1']) == 5 and bcrypt.checkpw(b'secret', updated['u1'].encode())
+
+    # A hash already at the configured cost is left alone
+    rehashed.clear()
+    stored = updated['u1']
+    assert client.post('/login', json={'email': 'a@b.c', 'password': 'secret'}).get_json()['success']
+    assert not rehashed.wait(0.2)
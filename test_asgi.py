@@ -0,0 +1,131 @@
+"""
+Tests for the ASGI match endpoint
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('asgiref')
+httpx = pytest.importorskip('httpx')
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'test')
+
+import app as web
+import asgi
+from catalog import CatalogSnapshot
+from match_cache import MatchEntry, encode_cursor
+
+PROFILE = {
+    'id': 'u1', 'age': 20, 'country': 'Kenya', 'education_level': 'Undergraduate',
+    'gpa': 3.5, 'field_of_study': 'Engineering', 'financial_need': 'High'
+}
+SCHOLARSHIPS = [
+    {
+        'id': f's{i}', 'name': f'Scholarship {i}', 'description': 'd', 'amount': 1000, 'deadline': '2099-01-01',
+        'requirements': 'r', 'application_url': 'u', 'field_of_study': 'Engineering', 'country': 'International',
+        'education_level': 'Undergraduate', 'min_gpa': None, 'min_age': None, 'max_age': None
+    }
+    for i in range(5)
+]
+
+
+def signed_session(user_id):
+    return web.app.session_interface.get_signing_serializer(web.app).dumps({'user_id': user_id})
+
+
+def post(path, session=None, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            if session is not None:
+                client.cookies.set(web.app.config['SESSION_COOKIE_NAME'], session)
+            return await client.request(kwargs.pop('method', 'POST'), path, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def wired(monkeypatch):
+    """Profile and catalog reads that only return once both are running"""
+    both_running = threading.Barrier(2, timeout=2)
+    snapshot = CatalogSnapshot(SCHOLARSHIPS, 'v1')
+
+    def get_match_profile(user_id):
+        both_running.wait()
+        return dict(PROFILE, id=user_id)
+
+    def catalog_snapshot():
+        both_running.wait()
+        return snapshot
+
+    monkeypatch.setattr(web.db, 'get_match_profile', get_match_profile)
+    monkeypatch.setattr(web.scholarship_catalog, 'snapshot', catalog_snapshot)
+    monkeypatch.setattr(web.db, 'get_feedback', lambda user_id: [])
+    monkeypatch.setattr(web, 'match_cache', web.MatchResultCache())
+    monkeypatch.setattr(web, 'rank_scholarships', lambda profile, snapshot, feedback_rows=None: MatchEntry(
+        'h', snapshot.version, ['s3', 's1', 's4', 's0'], [0.9, 0.8, 0.7, 0.6]
+    ))
+
+
+def test_requires_a_signed_session():
+    assert post('/api/match').json() == {'success': False, 'message': 'Not authenticated'}
+    assert post('/api/match', session='forged.cookie').json()['success'] is False
+
+
+def test_match_reads_concurrently_and_pages_like_flask(wired):
+    response = post('/api/match', signed_session('u1'), json={'limit': 2})
+    body = response.json()
+
+    assert body['success'] and body['freshness'] == 'recomputed'
+    assert [m['id'] for m in body['matches']] == ['s3', 's1']
+    assert body['total'] == 4
+    assert response.headers['X-DB-Round-Trips'] == '0'
+
+    follow = post('/api/match', signed_session('u1'), json={'limit': 2, 'cursor': body['next_cursor']}).json()
+    assert [m['id'] for m in follow['matches']] == ['s4', 's0']
+    assert follow['next_cursor'] is None
+
+
+def test_cursor_from_another_ranking_is_rejected(wired):
+    post('/api/match', signed_session('u1'), json={'limit': 2})
+    cursor = encode_cursor(MatchEntry('old profile', 'v0', ['s0'], [1.0]), 2)
+
+    response = post('/api/match', signed_session('u1'), json={'limit': 2, 'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json()['success'] is False
+
+
+def test_bad_limit_is_a_400():
+    response = post('/api/match', signed_session('u1'), json={'limit': None})
+    assert response.status_code == 400
+    assert response.json()['message'] == 'limit must be an integer'
+
+
+def test_stream_and_other_routes(wired):
+    lines = post('/api/match', signed_session('u1'), json={'stream': True, 'limit': 3}).text.splitlines()
+    assert [json.loads(line)['type'] for line in lines] == ['status', 'meta', 'match', 'match', 'match', 'end']
+
+    metrics = post('/metrics', method='GET')
+    assert metrics.status_code == 200
+    assert 'match_stage_seconds' in metrics.text
+
+
+def test_page_text_is_read_off_the_event_loop(wired, monkeypatch):
+    text_threads = []
+
+    def load_text(ids):
+        text_threads.append(threading.current_thread())
+        return {str(i): {'description': f'about {i}', 'requirements': 'r'} for i in ids}
+
+    snapshot = CatalogSnapshot(SCHOLARSHIPS, 'v1', load_text=load_text)
+    snapshot.release_rows()
+    monkeypatch.setattr(web.scholarship_catalog, 'snapshot', lambda: snapshot)
+    monkeypatch.setattr(web.db, 'get_match_profile', lambda user_id: dict(PROFILE, id=user_id))
+
+    body = post('/api/match', signed_session('u1'), json={'limit': 2}).json()
+    assert [m['description'] for m in body['matches']] == ['about s3', 'about s1']
+    assert text_threads and threading.main_thread() not in text_threads
@@ -0,0 +1,82 @@
+"""
+Tests for cohort batch matching
+"""
+
+import numpy as np
+import pytest
+
+from batch_matching import coerce_profile, match_cohort
+from catalog import CatalogSnapshot
+from embeddings import profile_text
+from scoring import normalize
+
+
+def make_scholarship(i, field):
+    return {
+        'id': f"s{i}", 'name': f"Scholarship {i}", 'description': 'd', 'amount': 1000, 'deadline': '2030-01-01',
+        'requirements': 'r', 'application_url': 'u', 'field_of_study': field, 'country': 'International',
+        'education_level': 'Undergraduate', 'min_gpa': None, 'min_age': None, 'max_age': None
+    }
+
+
+def make_profile(i, field):
+    return {
+        'id': f"u{i}", 'age': 20, 'country': 'Kenya', 'education_level': 'Undergraduate',
+        'gpa': 3.5, 'field_of_study': field, 'financial_need': 'High'
+    }
+
+
+class BatchEncoder:
+    """Deterministic vectors per text; records the size of every encode call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=32):
+        self.calls.append(len(texts))
+        return np.array([np.random.default_rng(abs(hash(t)) % 2 ** 32).standard_normal(8) for t in texts])
+
+
+def test_cohort_matches_equal_single_profile_ranking_and_respect_eligibility():
+    scholarships = [make_scholarship(i, 'Engineering' if i % 2 else 'Medicine') for i in range(20)]
+    snapshot = CatalogSnapshot(scholarships, 'v1')
+    matrix = normalize(np.random.default_rng(0).standard_normal((20, 8)))
+    profiles = [make_profile(i, 'Engineering' if i % 3 else 'Medicine') for i in range(10)]
+    encoder = BatchEncoder()
+
+    results = list(match_cohort(profiles, snapshot, matrix, encoder, k=3, chunk_size=4))
+
+    assert encoder.calls == [4, 4, 2]
+    assert [profile['id'] for profile, _, _ in results] == [p['id'] for p in profiles]
+    for profile, matches, error in results:
+        assert error is None
+        assert all(s['field_of_study'] == profile['field_of_study'] for s, _ in matches)
+        eligible = [i for i, s in enumerate(scholarships) if s['field_of_study'] == profile['field_of_study']]
+        user = normalize(encoder([profile_text(profile)])[0])
+        expected = sorted(eligible, key=lambda i: -float(matrix[i] @ user))[:3]
+        assert [s['id'] for s, _ in matches] == [scholarships[i]['id'] for i in expected]
+
+
+def test_incomplete_profiles_get_an_error():
+    snapshot = CatalogSnapshot([make_scholarship(0, 'Any')], 'v1')
+    profile = make_profile(0, 'Any')
+    profile['gpa'] = None
+
+    [(_, matches, error)] = match_cohort([profile], snapshot, normalize(np.ones((1, 8))), BatchEncoder())
+
+    assert matches == []
+    assert error == 'Missing: gpa'
+
+
+def test_coerce_profile_parses_numbers_and_rejects_malformed_profiles():
+    profile = coerce_profile({'id': 'p1', 'age': '19.0', 'gpa': ' 3.5 ', 'country': ' ', 'field_of_study': 'Law'})
+    assert profile == {'id': 'p1', 'age': 19, 'gpa': 3.5, 'country': None, 'field_of_study': 'Law'}
+
+    for raw, message in (
+        ('not a profile', 'Profile must be an object'),
+        ({'gpa': 'high'}, 'gpa must be a number'),
+        ({'age': [19]}, 'age must be a number'),
+        ({'country': {'name': 'Kenya'}}, 'country must be text'),
+    ):
+        with pytest.raises(ValueError, match=message):
+            coerce_profile(raw)
@@ -0,0 +1,163 @@
+"""
+Tests for the in-process scholarship catalog cache
+"""
+
+from datetime import date
+
+from catalog import PAGE_SIZE, ScholarshipCatalog, ScholarshipRecord
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for ScholarshipCatalog"""
+
+    def __init__(self, client, columns, count):
+        self.client = client
+        self.columns = columns
+        self.count = count
+        self.rows = list(client.rows)
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r.get(column) == value]
+        self.matched = len(self.rows)
+        return self
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r.get(column) in values]
+        return self
+
+    def gte(self, column, value):
+        self.rows = [r for r in self.rows if r.get(column) is not None and r[column] >= value]
+        return self
+
+    def order(self, column, desc=False):
+        self.rows.sort(key=lambda r: r[column], reverse=desc)
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def range(self, start, end):
+        self.rows = self.rows[start:end + 1]
+        return self
+
+    def execute(self):
+        self.client.queries.append(self.columns)
+        return FakeResponse([dict(r) for r in self.rows], self.matched if self.count else None)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def table(self, name):
+        assert name == 'scholarships'
+        return self
+
+    def select(self, *columns, count=None):
+        return FakeQuery(self, ', '.join(columns), count)
+
+
+def scholarship(i, updated_at='2024-01-01', is_active=True, deadline='2099-12-31'):
+    return {
+        'id': f"{i:05d}", 'name': f"Scholarship {i}", 'updated_at': updated_at,
+        'is_active': is_active, 'deadline': deadline, 'description': f"About scholarship {i}",
+        'requirements': 'Transcript', 'country': 'Kenya'
+    }
+
+
+def test_snapshot_is_cached_until_version_changes():
+    client = FakeClient([scholarship(1), scholarship(2), scholarship(3, is_active=False)])
+    loads = []
+    catalog = ScholarshipCatalog(client, ttl=0, on_load=loads.append)
+
+    first = catalog.snapshot()
+    assert sorted(first.by_id) == ['00001', '00002']
+    assert catalog.get('00002')['name'] == 'Scholarship 2'
+    assert catalog.get('00003') is None
+
+    # Same version: only the cheap version query runs
+    queries = len(client.queries)
+    assert catalog.snapshot() is first
+    assert len(client.queries) == queries + 1
+
+    client.rows[0]['updated_at'] = '2024-02-01'
+    assert catalog.snapshot() is not first
+    assert len(loads) == 2
+
+
+def test_ttl_skips_version_polling():
+    client = FakeClient([scholarship(1)])
+    catalog = ScholarshipCatalog(client, ttl=3600)
+    catalog.snapshot()
+    queries = len(client.queries)
+
+    catalog.snapshot()
+    assert len(client.queries) == queries
+
+    catalog.invalidate()
+    catalog.snapshot()
+    assert len(client.queries) == queries + 1
+
+
+def test_large_catalog_is_paged():
+    client = FakeClient([scholarship(i) for i in range(PAGE_SIZE * 2 + 5)])
+    snapshot = ScholarshipCatalog(client).snapshot()
+    assert len(snapshot) == PAGE_SIZE * 2 + 5
+    assert len(snapshot.eligibility) == len(snapshot)
+
+
+def test_expired_scholarships_are_dropped_at_the_day_boundary():
+    client = FakeClient([
+        scholarship(1, deadline='2024-03-01'),
+        scholarship(2, deadline='2024-03-02'),
+        scholarship(3, deadline='2024-02-28'),
+        scholarship(4, deadline='2024-06-30'),
+    ])
+    today = [date(2024, 3, 1)]
+    loads = []
+    catalog = ScholarshipCatalog(client, ttl=3600, on_load=loads.append, today=lambda: today[0])
+
+    first = catalog.snapshot()
+    assert [s['id'] for s in first.scholarships] == ['00001', '00002', '00004']
+    queries = len(client.queries)
+
+    today[0] = date(2024, 3, 2)
+    second = catalog.snapshot()
+    assert [s['id'] for s in second.scholarships] == ['00002', '00004']
+    assert second.get('00001') is None
+    assert second.version != first.version
+    assert len(second.eligibility) == 2
+    assert len(client.queries) == queries
+    assert loads == [first, second]
+
+
+def test_records_leave_out_display_text_until_it_is_shown():
+    client = FakeClient([scholarship(1), scholarship(2), scholarship(3)])
+    loaded_rows = []
+    catalog = ScholarshipCatalog(client, ttl=0, on_load=lambda s: loaded_rows.append(len(s.rows)))
+
+    snapshot = catalog.snapshot()
+    assert loaded_rows == [3] and snapshot.rows is None
+    record = snapshot.get('00001')
+    assert isinstance(record, ScholarshipRecord)
+    assert record['name'] == 'Scholarship 1' and record.get('description') is None
+    assert record['country'] is snapshot.get('00002')['country']
+
+    queries = len(client.queries)
+    texts = snapshot.texts(['00001', '00003'])
+    assert texts['00003'] == {'description': 'About scholarship 3', 'requirements': 'Transcript'}
+    assert snapshot.texts(['00003', '00001']) == texts
+    assert len(client.queries) == queries + 1
+
+    # A new catalog version empties the text cache
+    client.rows[0]['description'] = 'Updated'
+    client.rows[0]['updated_at'] = '2024-02-01'
+    assert catalog.snapshot().texts(['00001'])['00001']['description'] == 'Updated'
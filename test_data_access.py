@@ -0,0 +1,147 @@
+"""
+Tests for the data access layer against a local stub PostgREST server
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from data_access import DataAccess, make_client
+
+
+class StubPostgrest:
+    """Records requests; `routes` maps a path prefix to (status, json body)"""
+
+    def __init__(self, routes):
+        self.requests = []
+        self.ports = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _answer(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                stub.requests.append((self.command, self.path, body))
+                stub.ports.add(self.client_address[1])
+                status, payload = next(
+                    (answer for prefix, answer in routes.items() if self.path.startswith(prefix)), (200, [])
+                )
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def make_db(routes):
+    stub = StubPostgrest(routes)
+    calls = []
+    client = make_client(stub.url, 'service-key', on_request=lambda: calls.append(1))
+    return stub, DataAccess(client), calls
+
+
+def test_signup_is_one_insert_and_reports_taken_emails():
+    duplicate = {'code': '23505', 'message': 'duplicate key value violates unique constraint', 'details': None, 'hint': None}
+    stub, db, calls = make_db({'/rest/v1/users': (409, duplicate)})
+
+    assert db.create_user('a@example.com', 'hash', 'Ann', '2024-01-01T00:00:00') is None
+    assert [(method, path.split('?')[0]) for method, path, _ in stub.requests] == [('POST', '/rest/v1/users')]
+    assert len(calls) == 1
+    stub.close()
+
+
+def test_apply_uses_one_rpc_call():
+    row = {'user_name': 'Ann', 'user_phone': '+254700000001', 'scholarship_name': 'Merit'}
+    stub, db, calls = make_db({'/rest/v1/rpc/apply_for_scholarship': (200, [row])})
+
+    assert db.apply('u1', 's1', '2024-01-01T00:00:00') == row
+    assert stub.requests == [('POST', '/rest/v1/rpc/apply_for_scholarship', {'p_user_id': 'u1', 'p_scholarship_id': 's1'})]
+    assert len(calls) == 1
+    stub.close()
+
+
+def test_apply_falls_back_without_the_function():
+    missing = {'code': 'PGRST202', 'message': 'Could not find the function', 'details': None, 'hint': None}
+    stub, db, calls = make_db({
+        '/rest/v1/rpc/': (404, missing),
+        '/rest/v1/users': (200, [{'name': 'Ann', 'phone_number': '+1'}]),
+        '/rest/v1/applications': (201, [{'id': 'a1'}])
+    })
+
+    result = db.apply('u1', 's1', '2024-01-01T00:00:00', lookup_scholarship=lambda i: {'name': 'Merit'})
+
+    assert result == {'user_name': 'Ann', 'user_phone': '+1', 'scholarship_name': 'Merit'}
+    assert [path.split('?')[0] for _, path, _ in stub.requests] == [
+        '/rest/v1/rpc/apply_for_scholarship', '/rest/v1/applications', '/rest/v1/users'
+    ]
+    assert len(calls) == 3
+    stub.close()
+
+
+def test_repeat_application_returns_none():
+    stub, db, calls = make_db({'/rest/v1/rpc/apply_for_scholarship': (200, [])})
+    assert db.apply('u1', 's1', '2024-01-01T00:00:00') is None
+    stub.close()
+
+    # Older function, or no function at all: the unique violation means the same
+    duplicate = {'code': '23505', 'message': 'duplicate key value violates unique constraint', 'details': None, 'hint': None}
+    missing = {'code': 'PGRST202', 'message': 'Could not find the function', 'details': None, 'hint': None}
+    for routes in ({'/rest/v1/rpc/': (409, duplicate)},
+                   {'/rest/v1/rpc/': (404, missing), '/rest/v1/applications': (409, duplicate)}):
+        stub, db, calls = make_db(routes)
+        assert db.apply('u1', 's1', '2024-01-01T00:00:00') is None
+        assert not any(path.startswith('/rest/v1/users') for _, path, _ in stub.requests)
+        stub.close()
+
+
+def test_profile_select_names_columns_and_reuses_the_connection():
+    stub, db, calls = make_db({'/rest/v1/users': (200, [{'id': 'u1', 'age': 20}])})
+
+    for _ in range(3):
+        assert db.get_match_profile('u1') == {'id': 'u1', 'age': 20}
+
+    assert all('select=id%2Cage%2Ccountry' in path or 'select=id,age,country' in path for _, path, _ in stub.requests)
+    assert len(stub.ports) == 1
+    assert len(calls) == 3
+    stub.close()
+
+
+def test_upsert_rows_is_one_request_with_the_conflict_target():
+    stub, db, calls = make_db({'/rest/v1/user_feedback': (201, [])})
+    rows = [{'user_id': 'u1', 'scholarship_id': f's{i}', 'feedback_type': 'like'} for i in range(3)]
+
+    db.upsert_rows('user_feedback', rows)
+
+    (method, path, body), = stub.requests
+    assert (method, path.split('?')[0], body) == ('POST', '/rest/v1/user_feedback', rows)
+    assert 'on_conflict=user_id%2Cscholarship_id' in path
+    assert len(calls) == 1
+    stub.close()
+
+
+def test_match_profile_is_read_without_feedback_version_on_older_databases():
+    undefined = {'code': '42703', 'message': 'column users.feedback_version does not exist', 'details': None, 'hint': None}
+    stub, db, calls = make_db({'/rest/v1/users?select=id%2Cage%2Ccountry%2Ceducation_level%2Cgpa%2Cfield_of_study%2Cfinancial_need%2Cfeedback_version': (400, undefined),
+                               '/rest/v1/users': (200, [{'id': 'u1', 'age': 20}])})
+
+    assert db.get_match_profile('u1') == {'id': 'u1', 'age': 20}
+    assert db.get_match_profile('u1') == {'id': 'u1', 'age': 20}
+    assert len(calls) == 3
+    assert 'feedback_version' not in stub.requests[-1][1]
+    stub.close()
@@ -0,0 +1,63 @@
+"""
+Differential tests: EligibilityIndex must agree with filter_eligible_scholarships
+"""
+
+import random
+
+from eligibility import EligibilityIndex, filter_eligible_scholarships
+
+COUNTRIES = ['Kenya', 'Nigeria', 'USA', 'International', '', None]
+LEVELS = ['Undergraduate', 'Graduate', 'PhD', '', None]
+FIELDS = [
+    'Computer Science', 'STEM', 'Any', 'Engineering', 'Business Administration',
+    'Medicine', 'Arts and Humanities', 'Environmental Science', 'Technology',
+    'computer', 'science', 'Data Science & AI', '   ', '', None
+]
+
+
+def random_scholarship(rng, i):
+    return {
+        'id': str(i),
+        'min_gpa': rng.choice([None, 2.5, 3.0, 3.3, 3.5, 3.8, 4.0]),
+        'min_age': rng.choice([None, 16, 17, 18, 20]),
+        'max_age': rng.choice([None, 25, 30, 35]),
+        'country': rng.choice(COUNTRIES),
+        'education_level': rng.choice(LEVELS),
+        'field_of_study': rng.choice(FIELDS)
+    }
+
+
+def random_profile(rng):
+    return {
+        'gpa': rng.choice([None, 2.0, 3.0, 3.3, 3.5, 3.79, 3.8, 4.0]),
+        'age': rng.choice([None, 16, 18, 22, 25, 30, 40]),
+        'country': rng.choice(COUNTRIES),
+        'education_level': rng.choice(LEVELS),
+        'field_of_study': rng.choice(FIELDS + ['Mechanical Engineering', 'sci', 'Business'])
+    }
+
+
+def test_index_matches_reference_filter():
+    rng = random.Random(1234)
+    scholarships = [random_scholarship(rng, i) for i in range(500)]
+    index = EligibilityIndex(scholarships)
+
+    for _ in range(300):
+        profile = random_profile(rng)
+        assert index.filter(profile) == filter_eligible_scholarships(profile, scholarships), profile
+
+
+def test_sample_data_profile():
+    scholarships = [
+        {'id': 'cs', 'min_gpa': 3.8, 'min_age': 17, 'max_age': 25, 'country': 'International',
+         'education_level': 'Undergraduate', 'field_of_study': 'Computer Science'},
+        {'id': 'mba', 'min_gpa': 3.5, 'min_age': 17, 'max_age': 26, 'country': 'International',
+         'education_level': 'Undergraduate', 'field_of_study': 'Business Administration'},
+        {'id': 'ke', 'min_gpa': None, 'min_age': None, 'max_age': None, 'country': 'Kenya',
+         'education_level': None, 'field_of_study': None}
+    ]
+    profile = {'gpa': 3.9, 'age': 20, 'country': 'Kenya',
+               'education_level': 'Undergraduate', 'field_of_study': 'Computer Engineering'}
+
+    assert [s['id'] for s in EligibilityIndex(scholarships).filter(profile)] == ['cs', 'ke']
+    assert EligibilityIndex([]).filter(profile) == []
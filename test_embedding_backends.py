@@ -0,0 +1,94 @@
+"""
+Tests for the embedding inference backends
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from embedding_backends import OnnxBackend, make_backend
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from bench_backends import FIXTURE_PROFILES, load_sample_scholarships, top3_rankings
+from embeddings import profile_text
+from synthetic import hashing_encode
+
+
+class FakeTokenizer:
+    """One token per word, padded to the longest text"""
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        lengths = [len(text.split()) for text in texts]
+        width = max(lengths)
+        mask = np.array([[1] * n + [0] * (width - n) for n in lengths], dtype=np.int64)
+        return {'input_ids': mask * 7, 'attention_mask': mask}
+
+
+class FakeSession:
+    """Hidden state of token t is [t + 1, 1]; padded positions are garbage"""
+
+    def run(self, outputs, feeds):
+        batch, width = feeds['input_ids'].shape
+        hidden = np.full((batch, width, 2), 99.0, dtype=np.float32)
+        for row, n in enumerate(feeds['attention_mask'].sum(axis=1)):
+            hidden[row, :n, 0] = np.arange(1, n + 1)
+            hidden[row, :n, 1] = 1
+        return [hidden]
+
+
+def fake_onnx_backend():
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend.tokenizer = FakeTokenizer()
+    backend.session = FakeSession()
+    backend.input_names = {'input_ids', 'attention_mask'}
+    return backend
+
+
+def expected_vector(text):
+    n = len(text.split())
+    pooled = np.array([(n + 1) / 2, 1.0])
+    return pooled / np.linalg.norm(pooled)
+
+
+def test_onnx_backend_mean_pools_over_real_tokens_in_input_order():
+    backend = fake_onnx_backend()
+    texts = ['a b c d e', 'a', 'a b c', 'a b']
+
+    vectors = backend.encode(texts, batch_size=2)
+
+    assert vectors.dtype == np.float32
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, expected_vector(text), rtol=1e-6)
+
+
+def test_onnx_backend_single_string_gives_vector():
+    vector = fake_onnx_backend().encode('a b c')
+
+    assert vector.shape == (2,)
+    np.testing.assert_allclose(vector, expected_vector('a b c'), rtol=1e-6)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        make_backend('tensorrt', 'some-model')
+
+
+class StubModel:
+    """Bag-of-words vectors in place of a real model"""
+
+    def encode(self, texts, batch_size=32):
+        return hashing_encode(texts, batch_size)
+
+
+def test_bench_backends_top3_rankings():
+    scholarships = load_sample_scholarships()
+    matrix, rankings = top3_rankings(StubModel(), scholarships, FIXTURE_PROFILES)
+
+    assert matrix.shape[0] == len(scholarships)
+    assert len(rankings) == len(FIXTURE_PROFILES)
+    for profile, ranking in zip(FIXTURE_PROFILES, rankings):
+        scores = matrix @ hashing_encode(profile_text(profile))
+        assert ranking == [scholarships[row]['id'] for row in np.argsort(-scores, kind='stable')[:3]]
@@ -0,0 +1,66 @@
+"""
+Tests for the micro-batching embedding service and its client
+"""
+
+import threading
+
+import numpy as np
+
+from embedding_service import EmbeddingServiceClient, MicroBatcher, make_server
+
+
+def fake_encode(texts):
+    """One row per text: [len(text), 1, 2]"""
+    return np.array([[len(text), 1, 2] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_share_batches():
+    batch_sizes = []
+
+    def encode_batch(texts):
+        batch_sizes.append(len(texts))
+        return fake_encode(texts)
+
+    batcher = MicroBatcher(encode_batch, max_batch_size=64, max_wait_ms=50)
+    texts = ['x' * i for i in range(1, 33)]
+    results = {}
+
+    def worker(text):
+        results[text] = batcher.encode([text], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(batch_sizes) == len(texts)
+    assert len(batch_sizes) < len(texts)
+    for text in texts:
+        np.testing.assert_array_equal(results[text], fake_encode([text]))
+
+
+def test_errors_reach_every_caller():
+    def encode_batch(texts):
+        raise RuntimeError('model failed')
+
+    batcher = MicroBatcher(encode_batch, max_wait_ms=1)
+    try:
+        batcher.encode(['a'], timeout=5)
+    except RuntimeError as e:
+        assert str(e) == 'model failed'
+    else:
+        raise AssertionError('expected RuntimeError')
+
+
+def test_http_round_trip():
+    server = make_server('127.0.0.1', 0, MicroBatcher(fake_encode, max_wait_ms=1))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = EmbeddingServiceClient(f"http://127.0.0.1:{server.server_address[1]}")
+        np.testing.assert_array_equal(client.encode(['ab', 'abc']), fake_encode(['ab', 'abc']))
+        np.testing.assert_array_equal(client.encode('abcd'), fake_encode(['abcd'])[0])
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,176 @@
+"""
+Tests for the scholarship embedding store
+Uses a deterministic encoder so no model download is needed
+"""
+
+import numpy as np
+
+from embeddings import ScholarshipEmbeddingStore, UserEmbeddingCache, scholarship_text
+from scoring import normalize
+
+
+class CountingEncoder:
+    """Deterministic stand-in for model.encode that records every call"""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(sum(text.encode('utf-8')))
+            vectors.append(rng.standard_normal(self.dim))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def make_scholarship(scholarship_id, name='Merit Scholarship', description='For top students'):
+    return {
+        'id': scholarship_id,
+        'name': name,
+        'description': description,
+        'requirements': 'Strong academic record',
+        'field_of_study': 'Computer Science',
+        'country': 'International'
+    }
+
+
+def test_sync_encodes_each_scholarship_once(tmp_path):
+    encoder = CountingEncoder()
+    store = ScholarshipEmbeddingStore(str(tmp_path), encoder)
+    scholarships = [make_scholarship('a'), make_scholarship('b', name='Other')]
+
+    assert store.sync(scholarships) == ['a', 'b']
+    assert store.sync(scholarships) == []
+    assert len(encoder.calls) == 1
+
+    vectors = store.lookup(['b', 'a'])
+    assert vectors.dtype == np.float32
+    assert vectors.flags['C_CONTIGUOUS']
+    np.testing.assert_allclose(vectors[1], normalize(encoder([scholarship_text(scholarships[0])])[0]), rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+
+
+def test_changed_content_is_reencoded_incrementally(tmp_path):
+    encoder = CountingEncoder()
+    store = ScholarshipEmbeddingStore(str(tmp_path), encoder)
+    store.sync([make_scholarship('a'), make_scholarship('b', name='Other')])
+    before = store.lookup(['b'])
+
+    changed = make_scholarship('a', description='Now for graduate students')
+    assert store.sync([changed, make_scholarship('b', name='Other')]) == ['a']
+    assert encoder.calls[-1] == [scholarship_text(changed)]
+    np.testing.assert_array_equal(store.lookup(['b']), before)
+
+
+def test_store_is_reloaded_from_disk(tmp_path):
+    store = ScholarshipEmbeddingStore(str(tmp_path), CountingEncoder())
+    store.sync([make_scholarship('a')])
+    expected = store.lookup(['a'])
+
+    encoder = CountingEncoder()
+    reopened = ScholarshipEmbeddingStore(str(tmp_path), encoder)
+    assert 'a' in reopened
+    assert reopened.sync([make_scholarship('a')]) == []
+    assert encoder.calls == []
+    np.testing.assert_array_equal(reopened.lookup(['a']), expected)
+
+
+def test_store_from_another_model_is_rebuilt(tmp_path):
+    scholarships = [make_scholarship('a'), make_scholarship('b', name='Other')]
+    ScholarshipEmbeddingStore(str(tmp_path), CountingEncoder(), model='torch:small').sync(scholarships)
+
+    encoder = CountingEncoder(dim=5)
+    switched = ScholarshipEmbeddingStore(str(tmp_path), encoder, model='onnx:large')
+    assert len(switched) == 0
+    assert switched.sync(scholarships) == ['a', 'b']
+    assert switched.lookup(['a', 'b']).shape == (2, 5)
+    assert 'a' not in ScholarshipEmbeddingStore(str(tmp_path), model='torch:small')
+
+
+def make_profile(field='Computer Science'):
+    return {
+        'age': 20,
+        'country': 'Kenya',
+        'education_level': 'Undergraduate',
+        'gpa': 3.7,
+        'field_of_study': field,
+        'financial_need': 'High'
+    }
+
+
+def test_user_cache_hits_until_profile_changes():
+    encoder = CountingEncoder()
+    encode = lambda text: encoder([text])[0]
+    cache = UserEmbeddingCache(max_entries=10)
+
+    first = cache.get_or_encode('u1', make_profile(), encode)
+    assert cache.get_or_encode('u1', make_profile(), encode) is first
+    assert len(encoder.calls) == 1
+
+    cache.get_or_encode('u1', make_profile(field='Medicine'), encode)
+    assert len(encoder.calls) == 2
+
+    cache.invalidate('u1')
+    cache.get_or_encode('u1', make_profile(field='Medicine'), encode)
+    assert len(encoder.calls) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_user_cache_evicts_least_recently_used():
+    encode = lambda text: np.zeros(4)
+    cache = UserEmbeddingCache(max_entries=2)
+    for user_id in ['a', 'b']:
+        cache.get_or_encode(user_id, make_profile(), encode)
+    cache.get_or_encode('a', make_profile(), encode)
+    cache.get_or_encode('c', make_profile(), encode)
+
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * 4 * 4
+    cache.get_or_encode('a', make_profile(), encode)
+    assert cache.hits == 2
+
+
+def test_put_appends_chunks_and_survives_torn_index(tmp_path):
+    rng = np.random.default_rng(3)
+    store = ScholarshipEmbeddingStore(str(tmp_path))
+    expected = {}
+    for chunk in range(5):
+        ids = [f"{chunk}-{i}" for i in range(100)]
+        vectors = rng.standard_normal((100, 8)).astype(np.float32)
+        store.put(ids, ['h'] * 100, vectors)
+        expected.update(zip(ids, normalize(vectors)))
+
+    # Overwrite an existing row, then simulate a crash mid-way through an index line
+    store.put(['2-7'], ['h2'], np.ones((1, 8)))
+    expected['2-7'] = normalize(np.ones(8))
+    with open(tmp_path / 'index.tsv', 'a', encoding='utf-8') as f:
+        f.write('9-9\th')
+
+    reopened = ScholarshipEmbeddingStore(str(tmp_path))
+    assert len(reopened) == 500
+    assert '9-9' not in reopened
+    ids = sorted(expected)
+    np.testing.assert_allclose(reopened.lookup(ids), np.array([expected[i] for i in ids]), rtol=1e-6)
+
+
+def test_put_falls_back_to_rewrite(tmp_path, monkeypatch):
+    store = ScholarshipEmbeddingStore(str(tmp_path))
+    store.put(['a', 'b'], ['h', 'h'], np.eye(2, 8))
+    monkeypatch.setattr(store, '_append_rows', lambda rows: False)
+
+    store.put(['c', 'a'], ['h', 'h2'], np.eye(3, 8)[[2, 1]])
+    assert store.ids() == ['a', 'b', 'c']
+    np.testing.assert_allclose(store.lookup(['a', 'b', 'c']), np.eye(3, 8)[[1, 1, 2]])
+
+
+def test_writes_from_another_instance_are_picked_up(tmp_path):
+    first = ScholarshipEmbeddingStore(str(tmp_path), CountingEncoder())
+    second = ScholarshipEmbeddingStore(str(tmp_path), CountingEncoder())
+    first.sync([make_scholarship('a')])
+    second.sync([make_scholarship('b', name='Other')])
+    first.sync([make_scholarship('a'), make_scholarship('b', name='Other')])
+
+    assert first.ids() == ['a', 'b']
+    np.testing.assert_array_equal(first.lookup(['a', 'b']), second.lookup(['a', 'b']))
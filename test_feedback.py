@@ -0,0 +1,98 @@
+"""
+Tests for feedback-driven re-ranking
+"""
+
+import numpy as np
+
+from feedback import FeedbackRanker
+from scoring import normalize
+
+
+def setup_catalog():
+    vectors = normalize(np.array([
+        [1.0, 0.0, 0.0],
+        [0.9, 0.4, 0.0],
+        [0.8, 0.0, 0.6],
+        [0.7, 0.7, 0.0],
+    ], dtype=np.float32))
+    ids = ['a', 'b', 'c', 'd']
+    user_vector = normalize(np.array([1.0, 0.1, 0.1], dtype=np.float32))
+    return ids, vectors, user_vector
+
+
+def test_likes_promote_similar_and_dislikes_are_dropped():
+    ids, vectors, user_vector = setup_catalog()
+    scores = vectors @ user_vector
+    ranker = FeedbackRanker(user_weight=0.5)
+    ranker.load_user('u1', [
+        {'scholarship_id': 'd', 'feedback_type': 'like'},
+        {'scholarship_id': 'a', 'feedback_type': 'dislike'},
+    ], vectors[[3, 0]], user_vector)
+
+    ranked, adjusted = ranker.rerank('u1', user_vector, ids, scores, vectors)
+
+    assert ranker.disliked('u1') == {'a'}
+    assert 'a' not in ranked
+    assert ranked[0] == 'd'
+    assert ranked.index('b') < ranked.index('c')
+    assert np.all(np.diff(adjusted) <= 0)
+    assert adjusted.max() <= 1.0
+
+
+def test_record_applies_changed_votes_incrementally():
+    ids, vectors, user_vector = setup_catalog()
+    ranker = FeedbackRanker()
+    ranker.record('u1', 'b', 'like', vectors[1])
+    assert 'u1' not in ranker
+
+    ranker.load_user('u1', [], [], user_vector)
+    ranker.record('u1', 'b', 'like', vectors[1])
+    np.testing.assert_allclose(ranker._users['u1'].vector, vectors[1])
+
+    ranker.record('u1', 'b', 'dislike', vectors[1])
+    np.testing.assert_allclose(ranker._users['u1'].vector, -vectors[1])
+    assert ranker.disliked('u1') == {'b'}
+
+
+def test_scholarship_vectors_boost_for_similar_users():
+    ids, vectors, user_vector = setup_catalog()
+    ranker = FeedbackRanker(user_weight=0.0, scholarship_weight=0.5)
+    ranker.load_user('fan', [{'scholarship_id': 'c', 'feedback_type': 'like'}], vectors[[2]], user_vector)
+    scores = np.full(len(ids), 0.5, dtype=np.float32)
+
+    ranked, _ = ranker.rerank('someone-else', user_vector, ids, scores, vectors)
+
+    assert ranked[0] == 'c'
+
+
+def test_rank_by_orders_results_but_scores_stay_cosine():
+    ids, vectors, user_vector = setup_catalog()
+    scores = vectors @ user_vector
+    # e.g. hybrid fused scores that favour 'd' and 'c'
+    fused = np.array([0.1, 0.2, 0.9, 1.2], dtype=np.float32)
+
+    ranked, reported = FeedbackRanker().rerank('u1', user_vector, ids, scores, vectors, rank_by=fused)
+
+    assert ranked == ['d', 'c', 'b', 'a']
+    np.testing.assert_allclose(reported, scores[[3, 2, 1, 0]])
+
+
+def test_reload_at_a_new_version_picks_up_votes_from_other_workers():
+    ids, vectors, user_vector = setup_catalog()
+    ranker = FeedbackRanker()
+    ranker.load_user('u1', [{'scholarship_id': 'c', 'feedback_type': 'like'}], vectors[[2]], user_vector, version=1)
+    assert ranker.is_current('u1', 1)
+    assert not ranker.is_current('u1', 2) and not ranker.is_current('u2', 1)
+
+    # Another worker recorded a dislike of c and a like of d
+    ranker.load_user('u1', [
+        {'scholarship_id': 'c', 'feedback_type': 'dislike'},
+        {'scholarship_id': 'd', 'feedback_type': 'like'},
+    ], vectors[[2, 3]], user_vector, version=2)
+
+    assert ranker.is_current('u1', 2)
+    assert ranker.disliked('u1') == {'c'}
+    np.testing.assert_allclose(ranker._users['u1'].vector, vectors[3] - vectors[2], atol=1e-6)
+    rows = ranker._scholarship_rows
+    np.testing.assert_allclose(ranker._scholarship_vectors[rows['c']], -user_vector, atol=1e-6)
+    np.testing.assert_allclose(ranker._scholarship_vectors[rows['d']], user_vector, atol=1e-6)
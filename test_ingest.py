@@ -0,0 +1,115 @@
+"""
+Tests for bulk scholarship ingestion
+"""
+
+import argparse
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import ingest
+from embeddings import ScholarshipEmbeddingStore
+from ingest import INGEST_NAMESPACE, clean_row, load_checkpoint, read_rows, save_checkpoint, uniform_rows
+
+RAW = {
+    'name': ' Merit Award ', 'description': 'For top students', 'amount': '2500.50', 'deadline': '2099-01-01',
+    'min_gpa': '3.5', 'min_age': '18.0', 'max_age': '', 'is_active': 'TRUE', 'country': 'Kenya', 'unknown': 'x'
+}
+
+
+def test_clean_row_coerces_types_and_drops_unknown_columns():
+    row = clean_row(RAW)
+
+    assert row['name'] == 'Merit Award'
+    assert row['amount'] == 2500.5 and row['min_gpa'] == 3.5
+    assert row['min_age'] == 18 and isinstance(row['min_age'], int)
+    assert row['max_age'] is None
+    assert row['is_active'] is True
+    assert 'unknown' not in row
+
+
+@pytest.mark.parametrize('column', ['name', 'description', 'amount', 'deadline'])
+def test_clean_row_requires_fields(column):
+    assert clean_row(dict(RAW, **{column: '  '})) is None
+    assert clean_row({k: v for k, v in RAW.items() if k != column}) is None
+
+
+@pytest.mark.parametrize('column, value', [('amount', 'lots'), ('min_gpa', '3,5'), ('min_age', 'inf'), ('max_age', [])])
+def test_clean_row_skips_unparseable_numbers(column, value):
+    assert clean_row(dict(RAW, **{column: value})) is None
+
+
+def test_clean_row_ids_are_deterministic():
+    row = clean_row(RAW)
+    assert row['id'] == str(uuid.uuid5(INGEST_NAMESPACE, 'Merit Award|2099-01-01'))
+    assert clean_row(dict(RAW))['id'] == row['id']
+
+    with_url = clean_row(dict(RAW, application_url='https://example.org/apply'))
+    assert with_url['id'] == str(uuid.uuid5(INGEST_NAMESPACE, 'https://example.org/apply'))
+    assert clean_row(dict(RAW, id='given'))['id'] == 'given'
+
+
+def test_uniform_rows_share_keys_and_fill_defaults():
+    rows = uniform_rows([{'id': 'a', 'name': 'A'}, {'id': 'b', 'country': 'Kenya', 'currency': 'EUR'}])
+
+    assert all(set(row) == {'id', 'name', 'country', 'currency'} for row in rows)
+    assert rows[0]['currency'] == 'USD' and rows[1]['currency'] == 'EUR'
+    assert rows[0]['country'] is None and rows[1]['name'] is None
+
+
+def test_checkpoint_round_trip_is_tied_to_the_source(tmp_path):
+    checkpoint = str(tmp_path / 'run.checkpoint.json')
+    source = str(tmp_path / 'scholarships.jsonl')
+
+    assert load_checkpoint(checkpoint, source) == 0
+    save_checkpoint(checkpoint, source, 4000)
+    assert load_checkpoint(checkpoint, source) == 4000
+    assert load_checkpoint(checkpoint, str(tmp_path / 'other.jsonl')) == 0
+    assert not os.path.exists(checkpoint + '.tmp')
+
+
+def test_interrupted_ingest_resumes_after_the_last_chunk(tmp_path, monkeypatch):
+    source = tmp_path / 'scholarships.jsonl'
+    with open(source, 'w', encoding='utf-8') as f:
+        for i in range(7):
+            f.write(json.dumps(dict(RAW, name=f'Award {i}')) + '\n')
+        f.write(json.dumps(dict(RAW, name='Bad amount', amount='TBD')) + '\n')
+    encoded = []
+
+    def encode_chunk(pool, workers, texts, batch_size):
+        encoded.extend(texts)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(ingest, 'ProcessPoolExecutor', lambda workers, **kwargs: ThreadPoolExecutor(workers))
+    monkeypatch.setattr(ingest, 'encode_chunk', encode_chunk)
+    args = argparse.Namespace(source=str(source), store_dir=str(tmp_path / 'store'), checkpoint=None, restart=False,
+                              skip_upsert=True, workers=1, chunk_size=3, batch_size=8)
+
+    # Crash while storing the second chunk
+    put = ScholarshipEmbeddingStore.put
+    calls = []
+
+    def failing_put(store, *put_args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('killed')
+        return put(store, *put_args)
+
+    monkeypatch.setattr(ScholarshipEmbeddingStore, 'put', failing_put)
+    with pytest.raises(RuntimeError):
+        ingest.ingest(args)
+    assert load_checkpoint(str(source) + '.checkpoint.json', str(source)) == 3
+
+    monkeypatch.setattr(ScholarshipEmbeddingStore, 'put', put)
+    encoded.clear()
+    ingest.ingest(args)
+
+    assert len(encoded) == 4
+    assert load_checkpoint(str(source) + '.checkpoint.json', str(source)) == 8
+    store = ScholarshipEmbeddingStore(args.store_dir)
+    assert sorted(store.ids()) == sorted(row['id'] for row in map(clean_row, read_rows(str(source))) if row)
+    assert len(store.ids()) == 7
@@ -0,0 +1,75 @@
+"""
+Tests for the BM25 candidate index and score fusion
+"""
+
+import numpy as np
+import pytest
+
+from lexical_index import BM25Index, get_fusion, profile_query, rrf_fusion, tokenize, weighted_fusion
+
+
+def scholarship(i, field, description='A scholarship', requirements='Personal statement'):
+    return {'id': f's{i}', 'name': f'{field} award', 'description': description,
+            'requirements': requirements, 'field_of_study': field}
+
+
+def test_bm25_ranks_rare_terms_and_respects_allowed():
+    index = BM25Index()
+    index.add([scholarship(i, 'Engineering') for i in range(20)])
+    index.add([scholarship(20, 'Nursing', description='For nursing students with financial need')])
+
+    ids, scores = index.search('Nursing financial need', 5)
+    assert ids[0] == 's20'
+    assert np.all(np.diff(scores) <= 0)
+    assert sorted(index.search('Engineering', 50)[0]) == sorted(f's{i}' for i in range(20))
+    assert index.search('Engineering', 50, allowed=['s3', 's20'])[0] == ['s3']
+    assert index.search('astrophysics', 5)[0] == []
+
+
+def test_updates_replace_and_remove_documents():
+    index = BM25Index()
+    index.add([scholarship(i, 'Engineering') for i in range(2000)])
+    index.add([scholarship(5, 'Music')])
+    assert len(index) == 2000
+    assert index.search('music', 5)[0] == ['s5']
+    assert 's5' not in index.search('engineering', 5000)[0]
+
+    # Removing most documents compacts the postings without changing results
+    index.remove([f's{i}' for i in range(6, 2000)])
+    assert sorted(index.search('engineering', 10)[0]) == ['s0', 's1', 's2', 's3', 's4']
+    assert index.search('music', 5)[0] == ['s5']
+    assert index._dead == 0
+    assert index._size == len(index._ids) == 6
+
+
+def test_churn_does_not_grow_the_index():
+    index = BM25Index()
+    for generation in range(5):
+        index.add([scholarship(generation * 2000 + i, 'Engineering') for i in range(2000)])
+        index.remove([f's{(generation - 1) * 2000 + i}' for i in range(2000)])
+    assert len(index) == 2000 and index._size <= 4000 and len(index._alive) <= 8192
+
+    fresh = BM25Index()
+    fresh.add([scholarship(8000 + i, 'Engineering') for i in range(2000)])
+    found, scores = index.search('engineering', 10)
+    expected, expected_scores = fresh.search('engineering', 10)
+    assert found == expected
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_fusion_strategies():
+    semantic = np.array([0.9, 0.5, 0.1], dtype=np.float32)
+    lexical = np.array([0.0, 4.0, 2.0], dtype=np.float32)
+
+    assert np.allclose(weighted_fusion(semantic, lexical, alpha=0.5), [0.45, 0.75, 0.3])
+    fused = rrf_fusion(semantic, np.array([3.0, 2.0, 0.0], dtype=np.float32))
+    assert fused[0] == pytest.approx(1.0)
+    assert fused[0] > fused[1] > fused[2]
+    assert get_fusion('rrf') is rrf_fusion
+    with pytest.raises(ValueError):
+        get_fusion('borda')
+
+
+def test_profile_query():
+    query = profile_query({'field_of_study': 'Computer Science', 'education_level': 'PhD', 'financial_need': 'High'})
+    assert tokenize(query) == ['computer', 'science', 'phd', 'financial', 'need']
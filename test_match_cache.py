@@ -0,0 +1,68 @@
+"""
+Tests for the per-user match result cache
+"""
+
+import threading
+
+import pytest
+
+from match_cache import FRESH, STALE, MatchEntry, MatchResultCache, decode_cursor, encode_cursor
+
+
+def test_lookup_reports_fresh_and_stale():
+    cache = MatchResultCache()
+    assert cache.lookup('u1', 'p1', 'v1') == (None, None)
+
+    entry = MatchEntry('p1', 'v1', ['a', 'b'], [0.9, 0.5])
+    cache.store('u1', entry)
+
+    assert cache.lookup('u1', 'p1', 'v1') == (entry, FRESH)
+    assert cache.lookup('u1', 'p1', 'v2') == (entry, STALE)
+    assert cache.lookup('u1', 'p2', 'v1') == (entry, STALE)
+
+
+def test_refresh_async_deduplicates_and_stores():
+    cache = MatchResultCache()
+    release = threading.Event()
+    done = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        done.set()
+        return MatchEntry('p1', 'v2', ['c'], [0.7])
+
+    assert cache.refresh_async('u1', compute)
+    assert not cache.refresh_async('u1', compute)
+    release.set()
+    done.wait(5)
+    cache._executor.shutdown(wait=True)
+
+    assert len(calls) == 1
+    entry, status = cache.lookup('u1', 'p1', 'v2')
+    assert status == FRESH and entry.ids == ['c']
+
+
+def test_lru_bound():
+    cache = MatchResultCache(max_entries=2)
+    for user_id in ['a', 'b', 'c']:
+        cache.store(user_id, MatchEntry('p', 'v', [], []))
+    assert len(cache) == 2
+    assert cache.lookup('a', 'p', 'v') == (None, None)
+
+
+def test_cursor_round_trips_and_is_tied_to_the_ranking():
+    entry = MatchEntry('p1', (10, '2024-01-01'), ['a', 'b', 'c'], [0.9, 0.5, 0.1])
+    other = MatchEntry('p2', (10, '2024-01-01'), ['a'], [0.9])
+
+    offset, key = decode_cursor(encode_cursor(entry, 2))
+
+    assert offset == 2
+    assert key == entry.key != other.key
+
+
+def test_malformed_cursor_is_rejected():
+    for cursor in ['', 'not-a-cursor', encode_cursor(MatchEntry('p', 'v', [], []), 0)[:-3]]:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
@@ -0,0 +1,50 @@
+"""
+Tests for the Prometheus registry and sampled logging
+"""
+
+import logging
+
+from metrics import Registry, SamplingFilter
+
+
+def test_render_counters_histograms_and_values():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests', labels=('route',))
+    latency = registry.histogram('latency_seconds', 'Latency', labels=('stage',), buckets=(0.1, 1))
+    registry.value('entries', 'Cached entries', lambda: 7)
+
+    requests.inc(route='/api/match')
+    requests.inc(2, route='/api/match')
+    for value in (0.05, 0.5, 3):
+        latency.observe(value, stage='scoring')
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/api/match"} 3' in lines
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{stage="scoring",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="scoring",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="scoring",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="scoring"} 3.55' in lines
+    assert 'latency_seconds_count{stage="scoring"} 3' in lines
+    assert 'entries 7' in lines
+
+
+def test_histogram_time_records_a_span():
+    histogram = Registry().histogram('span_seconds', 'Span', labels=('stage',))
+
+    with histogram.time(stage='filtering'):
+        pass
+
+    assert histogram.count(stage='filtering') == 1
+    assert histogram.count(stage='scoring') == 0
+
+
+def test_sampling_filter_keeps_warnings():
+    never = SamplingFilter(0.0)
+    record = lambda level: logging.LogRecord('app', level, __file__, 1, 'message', None, None)
+
+    assert not never.filter(record(logging.INFO))
+    assert never.filter(record(logging.WARNING))
+    assert SamplingFilter(1.0).filter(record(logging.DEBUG))
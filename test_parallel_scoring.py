@@ -0,0 +1,56 @@
+"""
+Tests for sharded scoring over shared memory
+"""
+
+import numpy as np
+
+from ann_index import ExactIndex
+from parallel_scoring import ShardedScorer
+
+
+def build(index, n=3000, dim=24):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    ids = [f"s{i}" for i in range(n)]
+    # Added in chunks so the shared buffer is regrown and copied a few times
+    for start in range(0, n, 700):
+        index.add(ids[start:start + 700], vectors[start:start + 700])
+    return ids, rng.standard_normal(dim).astype(np.float32)
+
+
+def test_sharded_search_matches_serial_search():
+    serial = ExactIndex()
+    sharded = ExactIndex(scorer=ShardedScorer(processes=3, min_rows=0))
+    ids, query = build(serial)
+    build(sharded)
+    sharded.remove(ids[:10])
+    serial.remove(ids[:10])
+
+    for allowed in (None, ids[::7], ids[:2]):
+        expected_ids, expected_scores = serial.search(query, 50, allowed=allowed)
+        found_ids, found_scores = sharded.search(query, 50, allowed=allowed)
+        assert found_ids == expected_ids
+        assert np.allclose(found_scores, expected_scores)
+
+
+def test_small_indexes_are_scored_in_process():
+    scorer = ShardedScorer(processes=3, min_rows=10000)
+    index, serial = ExactIndex(scorer=scorer), ExactIndex()
+    ids, query = build(index)
+    build(serial)
+
+    assert index.search(query, 5)[0] == serial.search(query, 5)[0]
+    assert scorer._executor is None
+    # Below min_rows the vectors are a private buffer, not a shared segment
+    assert scorer._segment is None and not index._shared
+
+
+def test_buffer_moves_to_shared_memory_at_min_rows():
+    scorer = ShardedScorer(processes=2, min_rows=2000)
+    index, serial = ExactIndex(scorer=scorer), ExactIndex()
+    ids, query = build(index)
+    build(serial)
+
+    assert index._shared and scorer._segment is not None
+    assert index.search(query, 5)[0] == serial.search(query, 5)[0]
+    scorer.close()
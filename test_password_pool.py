@@ -0,0 +1,50 @@
+"""
+Tests for the bounded bcrypt pool
+"""
+
+import threading
+
+import bcrypt
+import pytest
+
+from password_pool import PasswordPool, PoolSaturated, hash_cost
+
+
+def test_hash_and_verify_use_configured_cost():
+    pool = PasswordPool(rounds=4, workers=1)
+
+    hashed = pool.hash('secret')
+
+    assert hash_cost(hashed) == 4
+    assert pool.verify('secret', hashed)
+    assert not pool.verify('wrong', hashed)
+
+
+def test_needs_rehash_when_cost_differs():
+    pool = PasswordPool(rounds=5, workers=1)
+    old = bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode('utf-8')
+
+    assert pool.needs_rehash(old)
+    assert not pool.needs_rehash(pool.hash('secret'))
+
+    done = threading.Event()
+    rehashed = []
+    assert pool.rehash_later('secret', lambda new_hash: (rehashed.append(new_hash), done.set()))
+    assert done.wait(5)
+    assert hash_cost(rehashed[0]) == 5
+    assert bcrypt.checkpw(b'secret', rehashed[0].encode('utf-8'))
+
+
+def test_rejects_work_when_saturated():
+    pool = PasswordPool(rounds=4, workers=1, max_queue=1, wait=0.01)
+    release = threading.Event()
+    blockers = [pool._submit(release.wait, 5) for _ in range(2)]
+
+    with pytest.raises(PoolSaturated):
+        pool.hash('secret')
+    assert not pool.rehash_later('secret', lambda new_hash: None)
+
+    release.set()
+    for future in blockers:
+        future.result(5)
+    assert pool.verify('secret', pool.hash('secret'))
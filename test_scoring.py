@@ -0,0 +1,59 @@
+"""
+Tests for vectorized similarity scoring
+"""
+
+import numpy as np
+
+from scoring import cosine_scores, normalize, top_k, top_k_batch
+
+
+def test_cosine_scores_match_reference():
+    rng = np.random.default_rng(0)
+    user_vector = rng.standard_normal(16)
+    raw = rng.standard_normal((50, 16))
+
+    expected = raw @ user_vector / (np.linalg.norm(raw, axis=1) * np.linalg.norm(user_vector))
+    scores = cosine_scores(user_vector, normalize(raw))
+
+    assert scores.dtype == np.float32
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_top_k_returns_best_first():
+    scores = np.array([0.1, 0.9, 0.4, 0.8, 0.2], dtype=np.float32)
+
+    assert list(top_k(scores, 3)) == [1, 3, 2]
+    assert list(top_k(scores, 10)) == [1, 3, 2, 4, 0]
+    assert list(top_k(scores, 0)) == []
+
+
+def test_empty_candidates():
+    assert len(cosine_scores(np.ones(4), np.empty((0, 4), dtype=np.float32))) == 0
+    assert len(top_k(np.empty(0, dtype=np.float32), 3)) == 0
+
+
+def test_top_k_batch_matches_per_user_scoring():
+    rng = np.random.default_rng(1)
+    users = rng.standard_normal((7, 16))
+    matrix = normalize(rng.standard_normal((1000, 16)))
+    allowed = rng.random((7, 1000)) < 0.3
+
+    rows, scores = top_k_batch(users, matrix, 5, allowed=allowed, block_size=128)
+
+    for i, user in enumerate(users):
+        user_scores = cosine_scores(user, matrix)
+        user_scores[~allowed[i]] = -np.inf
+        expected = top_k(user_scores, 5)
+        assert list(rows[i]) == list(expected)
+        np.testing.assert_allclose(scores[i], user_scores[expected], rtol=1e-5)
+
+
+def test_top_k_batch_pads_users_with_few_candidates():
+    matrix = normalize(np.eye(4, dtype=np.float32))
+    allowed = np.array([[True, False, False, False], [False, False, False, False]])
+
+    rows, scores = top_k_batch(np.eye(2, 4), matrix, 3, allowed=allowed, block_size=2)
+
+    assert list(rows[0]) == [0, -1, -1]
+    assert list(rows[1]) == [-1, -1, -1]
+    assert np.isneginf(scores[1]).all()
@@ -0,0 +1,109 @@
+"""
+Tests for the SMS outbox against a local stub provider
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sms_outbox import SmsOutbox, TokenBucket
+
+
+class StubProvider:
+    """Local HTTP server that records posted bodies and answers with scripted statuses"""
+
+    def __init__(self, statuses=(), delay=0):
+        self.bodies = []
+        self.statuses = list(statuses)
+        self.delay = delay
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(provider.delay)
+                provider.bodies.append((self.path, body))
+                status = provider.statuses.pop(0) if provider.statuses else 200
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_enqueue_returns_before_a_slow_provider_answers():
+    provider = StubProvider(delay=0.5)
+    outbox = SmsOutbox(provider.url + '/sms', 'key', rate=100)
+
+    started = time.perf_counter()
+    assert outbox.enqueue('+254700000001', 'hello')
+    assert time.perf_counter() - started < 0.1
+
+    assert outbox.flush(timeout=5)
+    assert provider.bodies == [('/sms', {'to': '+254700000001', 'message': 'hello'})]
+    assert outbox.sent == 1
+    provider.close()
+
+
+def test_retries_server_errors_and_drops_client_errors():
+    provider = StubProvider(statuses=[503, 503, 400])
+    outbox = SmsOutbox(provider.url + '/sms', 'key', rate=100, backoff=0.01)
+
+    outbox.enqueue('+1', 'first')
+    assert outbox.flush(timeout=5)
+    outbox.enqueue('+2', 'second')
+    assert outbox.flush(timeout=5)
+
+    assert [body['to'] for _, body in provider.bodies] == ['+1', '+1', '+1', '+2']
+    assert (outbox.sent, outbox.retried, outbox.failed) == (1, 2, 1)
+    provider.close()
+
+
+def test_gives_up_after_max_attempts():
+    provider = StubProvider(statuses=[500] * 10)
+    outbox = SmsOutbox(provider.url + '/sms', 'key', rate=100, backoff=0.01, max_attempts=3)
+
+    outbox.enqueue('+1', 'hello')
+
+    assert outbox.flush(timeout=5)
+    assert len(provider.bodies) == 3
+    assert outbox.failed == 1
+    provider.close()
+
+
+def test_batches_queued_messages_when_provider_supports_it():
+    provider = StubProvider(delay=0.2)
+    outbox = SmsOutbox(provider.url + '/sms', 'key', batch_url=provider.url + '/sms/batch', batch_size=10, rate=100)
+
+    for i in range(7):
+        outbox.enqueue(f"+{i}", 'hello')
+
+    assert outbox.flush(timeout=5)
+    assert all(path == '/sms/batch' for path, _ in provider.bodies)
+    delivered = [m['to'] for _, body in provider.bodies for m in body['messages']]
+    assert sorted(delivered) == sorted(f"+{i}" for i in range(7))
+    assert len(provider.bodies) < 7
+    provider.close()
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=5)
+
+    started = time.perf_counter()
+    for _ in range(15):
+        bucket.acquire()
+
+    # 5 tokens up front, the other 10 at 50 per second
+    assert time.perf_counter() - started >= 0.18
@@ -0,0 +1,124 @@
+"""
+Tests for the write-behind buffer
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+from write_buffer import RejectedWrite, WriteBehindBuffer
+
+KEYS = {'user_feedback': ('user_id', 'scholarship_id')}
+
+
+def vote(scholarship_id, feedback_type='like', user_id='u1'):
+    return {'user_id': user_id, 'scholarship_id': scholarship_id, 'feedback_type': feedback_type}
+
+
+def make_buffer(directory, writer, **kwargs):
+    kwargs.setdefault('flush_interval', 60)
+    return WriteBehindBuffer(str(directory), writer, KEYS, **kwargs)
+
+
+def spools(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.spool'))
+
+
+def test_flush_coalesces_by_row_key_and_clears_the_spool(tmp_path):
+    batches = []
+    buffer = make_buffer(tmp_path, lambda table, rows: batches.append((table, rows)))
+
+    buffer.submit('user_feedback', vote('s1', 'like'))
+    buffer.submit('user_feedback', vote('s2', 'like'))
+    buffer.submit('user_feedback', vote('s1', 'dislike'))
+    assert len(buffer) == 2 and buffer.coalesced == 1
+    assert len(spools(tmp_path)) == 1
+
+    assert buffer.flush()
+    assert batches == [('user_feedback', [vote('s1', 'dislike'), vote('s2', 'like')])]
+    assert len(buffer) == 0 and buffer.written == 2
+    assert spools(tmp_path) == []
+
+
+def test_background_flush_when_the_batch_fills(tmp_path):
+    written = threading.Event()
+    buffer = make_buffer(tmp_path, lambda table, rows: written.set(), max_batch=3)
+
+    for i in range(2):
+        buffer.submit('user_feedback', vote(f's{i}'))
+    assert not written.wait(0.2)
+    buffer.submit('user_feedback', vote('s2'))
+    assert written.wait(5)
+
+
+def test_failed_writes_are_kept_and_rejected_rows_isolated(tmp_path):
+    attempts = []
+
+    def writer(table, rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise ConnectionError('database unreachable')
+        if any(row['scholarship_id'] == 'bad' for row in rows):
+            raise RejectedWrite('invalid input syntax for type uuid')
+
+    buffer = make_buffer(tmp_path, writer)
+    for scholarship_id in ('s1', 'bad', 's2'):
+        buffer.submit('user_feedback', vote(scholarship_id))
+
+    assert not buffer.flush()
+    assert len(buffer) == 3 and len(spools(tmp_path)) == 1
+
+    assert buffer.flush()
+    assert attempts == [3, 3, 1, 1, 1]
+    assert (buffer.written, buffer.dropped) == (2, 1)
+    assert spools(tmp_path) == []
+
+
+def test_spool_of_a_dead_worker_is_recovered(tmp_path):
+    live = make_buffer(tmp_path, lambda table, rows: None)
+    live.submit('user_feedback', vote('s3'))
+
+    # Another worker buffers two votes and dies before its flusher runs
+    script = (
+        "import os, sys; from write_buffer import WriteBehindBuffer\n"
+        "buffer = WriteBehindBuffer(sys.argv[1], None, {'user_feedback': ('user_id', 'scholarship_id')}, flush_interval=60)\n"
+        "buffer.submit('user_feedback', {'user_id': 'u1', 'scholarship_id': 's1', 'feedback_type': 'like'})\n"
+        "buffer.submit('user_feedback', {'user_id': 'u1', 'scholarship_id': 's2', 'feedback_type': 'dislike'})\n"
+        "os._exit(1)\n"
+    )
+    subprocess.run([sys.executable, '-c', script, str(tmp_path)], cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert len(spools(tmp_path)) == 2
+
+    # Its replacement writes them; the live worker's spool is left alone
+    batches = []
+    successor = make_buffer(tmp_path, lambda table, rows: batches.append(rows))
+    assert successor.flush()
+    assert batches == [[vote('s1', 'like'), vote('s2', 'dislike')]]
+    assert len(spools(tmp_path)) == 1
+    assert live.flush()
+    assert spools(tmp_path) == []
+
+
+def test_leftover_spool_with_this_pid_does_not_block_submit(tmp_path):
+    # A previous worker with the same pid left a segment behind, and the database is down
+    with open(os.path.join(tmp_path, f'{os.getpid()}.1.spool'), 'w') as leftover:
+        leftover.write('{"table": "user_feedback", "row": {"user_id": "u1", "scholarship_id": "s1", "feedback_type": "like"}}\n')
+    database_down = threading.Event()
+    database_down.set()
+
+    def writer(table, rows):
+        if database_down.is_set():
+            raise ConnectionError('database unreachable')
+
+    buffer = make_buffer(tmp_path, writer)
+    submitted = threading.Thread(target=lambda: [buffer.submit('user_feedback', vote(f's{i}')) for i in range(2, 5)], daemon=True)
+    submitted.start()
+    submitted.join(5)
+    assert not submitted.is_alive()
+    assert not buffer.flush()
+    assert len(buffer) == 4 and len(spools(tmp_path)) == 2
+
+    database_down.clear()
+    assert buffer.flush()
+    assert spools(tmp_path) == []
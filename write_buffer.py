@@ -0,0 +1,266 @@
+"""
+Write-behind buffer for Scholarship Matchmaker
+Feedback events are appended to a local spool file and acknowledged at
+once; a background flusher coalesces them by row key (the last event for a
+user and scholarship wins) and writes each table with one batched upsert once `max_batch` rows are pending or `flush_interval` seconds
+have passed. Spool files are deleted only after their rows are written, and a
+worker starting up replays the spools of workers that died, so a restart
+loses nothing.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: spools are not shared between live workers there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class RejectedWrite(Exception):
+    """Raised by a writer when the rows themselves are invalid, so retrying cannot help"""
+
+
+class SpoolFile:
+    """One append-only spool segment, locked while its owner is alive"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, 'a+', encoding='utf-8')
+
+    @classmethod
+    def claim(cls, path):
+        """Open an existing segment whose owner is gone, or None if it is still held"""
+        spool = cls(path)
+        if not spool.lock(blocking=False):
+            spool._file.close()
+            return None
+        return spool
+
+    def lock(self, blocking=True):
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            return False
+        return True
+
+    def append(self, event):
+        self._file.write(json.dumps(event) + '\n')
+        # Flushed to the OS, the event survives the process; fsync also a power cut
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def events(self):
+        """Every complete event in the segment, oldest first"""
+        self._file.seek(0)
+        events = []
+        for line in self._file:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping a torn line in %s", self.path)
+        return events
+
+    def delete(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._file.close()
+
+
+class WriteBehindBuffer:
+    """Coalescing, spooled buffer of row writes, flushed by a daemon thread
+
+    `keys` maps each table to the columns that identify a row (its upsert
+    conflict target); `writer(table, rows)` writes a batch. A writer raising
+    RejectedWrite has the batch retried one row at a time, and the rows still
+    rejected are dropped; any other failure keeps the batch and retries it
+    with exponential backoff.
+    """
+
+    def __init__(self, directory, writer, keys, max_batch=200, flush_interval=1.0, fsync=False, max_backoff=60):
+        self.directory = directory
+        self.writer = writer
+        self.keys = keys
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_backoff = max_backoff
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failures = 0
+        self._pending = {}
+        self._pending_since = None
+        self._retry_at = 0.0
+        self._spool = None
+        # Segments whose rows are pending or being written
+        self._sealed = []
+        self._sequence = 0
+        self._changed = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        atexit.register(self.close)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _key(self, table, row):
+        return (table,) + tuple(str(row[column]) for column in self.keys[table])
+
+    def _next_spool(self):
+        self._sequence += 1
+        # A restarted worker can get its predecessor's pid, so the name also carries a per-run token
+        name = f'{os.getpid()}.{self._run_id}.{self._sequence}.spool'
+        spool = SpoolFile(os.path.join(self.directory, name), self.fsync)
+        spool.lock()
+        return spool
+
+    def _ensure_started(self):
+        # Started on first use, so each gunicorn worker has its own spool and thread
+        if self._pid == os.getpid():
+            return
+        with self._changed:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._pending, self._sealed, self._spool, self._pending_since = {}, [], None, None
+            self._run_id, self._sequence = uuid.uuid4().hex[:12], 0
+            self._recover()
+            threading.Thread(target=self._run, name='write-behind', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _recover(self):
+        """Take over the spools of workers that exited before flushing them"""
+        paths = sorted(glob.glob(os.path.join(self.directory, '*.spool')), key=os.path.getmtime)
+        for path in paths:
+            spool = SpoolFile.claim(path)
+            if spool is None:
+                continue
+            events = spool.events()
+            for event in events:
+                self._add(event['table'], event['row'])
+            self._sealed.append(spool)
+            if events:
+                logger.info("Recovered %d buffered write(s) from %s", len(events), path)
+
+    def _add(self, table, row):
+        key = self._key(table, row)
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (table, row)
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+
+    def submit(self, table, row):
+        """Spool and buffer one row write; it reaches the table on the next flush"""
+        if table not in self.keys:
+            raise ValueError(f"No row key configured for table: {table}")
+        self._ensure_started()
+        with self._changed:
+            if self._spool is None:
+                self._spool = self._next_spool()
+            self._spool.append({'table': table, 'row': row})
+            self._add(table, row)
+            if len(self._pending) in (1, self.max_batch):
+                self._changed.notify_all()
+
+    def _due(self):
+        if not self._pending or time.monotonic() < self._retry_at:
+            return False
+        return len(self._pending) >= self.max_batch or time.monotonic() - self._pending_since >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while not self._due():
+                    if self._pending:
+                        wake = max(self._retry_at, self._pending_since + self.flush_interval)
+                        self._changed.wait(max(0.0, wake - time.monotonic()))
+                    else:
+                        self._changed.wait()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error flushing buffered writes")
+
+    def _take(self):
+        """Swap out the pending rows and seal the spool segments holding them"""
+        with self._changed:
+            batch, self._pending, self._pending_since = self._pending, {}, None
+            if self._spool is not None:
+                self._sealed.append(self._spool)
+                self._spool = None
+            sealed, self._sealed = self._sealed, []
+            return batch, sealed
+
+    def _restore(self, batch, sealed):
+        """Put a failed batch back behind anything submitted since"""
+        with self._changed:
+            for key, value in batch.items():
+                self._pending.setdefault(key, value)
+            if self._pending and self._pending_since is None:
+                self._pending_since = time.monotonic()
+            self._sealed = sealed + self._sealed
+
+    def _write_table(self, table, rows):
+        try:
+            self.writer(table, rows)
+            return len(rows)
+        except RejectedWrite as e:
+            if len(rows) == 1:
+                logger.error("Dropping a buffered %s row rejected by the database: %s", table, e)
+                self.dropped += 1
+                return 0
+        # Isolate the rejected rows; a transient error here raises and retries the rest
+        return sum(self._write_table(table, [row]) for row in rows)
+
+    def flush(self):
+        """Write everything pending now; True if it all reached the database (or was rejected)"""
+        self._ensure_started()
+        with self._flush_lock:
+            batch, sealed = self._take()
+            if not batch and not sealed:
+                return True
+            by_table = {}
+            for table, row in batch.values():
+                by_table.setdefault(table, []).append(row)
+            try:
+                for table, rows in by_table.items():
+                    self.written += self._write_table(table, rows)
+                    # Rows written are not retried if a later table fails
+                    for row in rows:
+                        batch.pop(self._key(table, row), None)
+            except Exception as e:
+                self.failures += 1
+                delay = min(self.max_backoff, self.flush_interval * 2 ** min(self.failures, 10))
+                self._retry_at = time.monotonic() + delay
+                logger.warning("Buffered write of %d row(s) failed, retrying in %.0fs: %s", len(batch), delay, e)
+                self._restore(batch, sealed)
+                return False
+            self.failures = 0
+            self._retry_at = 0.0
+            for spool in sealed:
+                spool.delete()
+            return True
+
+    def close(self, timeout=5):
+        """Flush before exit; what is not written stays spooled for the next worker"""
+        if self._pid != os.getpid() or not (self._pending or self._sealed):
+            return
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.flush():
+            time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))